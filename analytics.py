@@ -0,0 +1,210 @@
+"""
+📊 Performance Analytics
+Tearsheet ของผลเทรดจากตาราง trades แบบ columnar (DataFrame) - คำนวณด้วย NumPy/pandas group-by ทั้งหมด
+ใช้ได้ทั้ง backtest (GoldenTrendBacktest.trades), ผลจาก results store และ live demo (closed_trades)
+1 ล้าน trades ใช้เวลาระดับไม่กี่ร้อย ms
+
+คอลัมน์ที่ใช้: time (เข้า), exit_time, pnl และถ้ามี: action, costs, balance, mae, mfe, exit_reason
+(ชื่อแบบ live demo - entry_time, close_time, type, reason - ถูกแปลงให้อัตโนมัติ)
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+_ALIASES = {'entry_time': 'time', 'close_time': 'exit_time', 'type': 'action', 'reason': 'exit_reason'}
+
+def to_frame(trades):
+    """list ของ dict หรือ DataFrame → DataFrame ที่ใช้ชื่อคอลัมน์มาตรฐาน"""
+    df = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame(list(trades))
+    renames = {old: new for old, new in _ALIASES.items() if old in df and new not in df}
+    return df.rename(columns=renames) if renames else df
+
+def balance_curve(trades, initial_balance):
+    """balance หลังปิดแต่ละ trade (ใช้คอลัมน์ balance ถ้ามี ไม่งั้นสะสมจาก pnl)"""
+    if 'balance' in trades:
+        return trades['balance'].to_numpy(dtype=float)
+    return initial_balance + np.cumsum(trades['pnl'].to_numpy(dtype=float))
+
+def drawdown(equity):
+    """(drawdown % ต่อจุด, ความยาวช่วง drawdown ที่นานสุดเป็นจำนวนจุด)"""
+    equity = np.asarray(equity, dtype=float)
+    peak = np.maximum.accumulate(equity)
+    dd = (peak - equity) / peak * 100
+    # ความยาว = ระยะจากจุดที่ทำ high ใหม่ล่าสุด
+    at_peak = np.flatnonzero(dd <= 0)
+    last_peak = at_peak[np.searchsorted(at_peak, np.arange(len(dd)), side='right') - 1] if at_peak.size else 0
+    longest = int((np.arange(len(dd)) - last_peak).max()) if len(dd) else 0
+    return dd, longest
+
+def streaks(wins):
+    """(ชนะติดกันมากสุด, แพ้ติดกันมากสุด) - run-length แบบ vectorized"""
+    wins = np.asarray(wins, dtype=bool)
+    if not wins.size:
+        return 0, 0
+    edges = np.flatnonzero(np.diff(wins.astype(np.int8))) + 1
+    starts = np.r_[0, edges]
+    lengths = np.diff(np.r_[starts, wins.size])
+    values = wins[starts]
+    return int(lengths[values].max(initial=0)), int(lengths[~values].max(initial=0))
+
+def daily_returns(trades, initial_balance, equity=None):
+    """ผลตอบแทนรายวัน (วันทำการ, วันที่ไม่มี trade ปิด = 0) จาก equity หรือ balance ตอนปิด trade"""
+    if equity is None:
+        times, values = trades['exit_time'].to_numpy(dtype='datetime64[ns]'), balance_curve(trades, initial_balance)
+    else:
+        times, values = equity.index.to_numpy(dtype='datetime64[ns]'), equity.to_numpy(dtype=float)
+    if not len(values):
+        return pd.Series(dtype=float)
+
+    # ค่าสุดท้ายของแต่ละวัน (ตามลำดับ trade) แล้วเติมวันทำการที่ไม่มี trade ด้วยค่าก่อนหน้า
+    days = times.astype('datetime64[D]').view(np.int64)
+    unique, first_reversed = np.unique(days[::-1], return_index=True)
+    closing = values[len(values) - 1 - first_reversed]
+    calendar = np.arange(unique[0], unique[-1] + 1)
+    calendar = np.union1d(calendar[np.is_busday(calendar.view('datetime64[D]'))], unique)
+    daily = closing[np.searchsorted(unique, calendar, side='right') - 1]
+    start = np.r_[initial_balance, daily[:-1]]
+    return pd.Series(daily / start - 1, index=calendar.view('datetime64[D]').astype('datetime64[ns]'))
+
+def ratios(returns, periods=TRADING_DAYS):
+    """(Sharpe, Sortino) แบบ annualized, risk-free = 0"""
+    r = np.asarray(returns, dtype=float)
+    if r.size < 2:
+        return 0.0, 0.0
+    mean, std = r.mean(), r.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(r, 0.0) ** 2))
+    scale = np.sqrt(periods)
+    return (float(mean / std * scale) if std > 0 else 0.0,
+            float(mean / downside * scale) if downside > 0 else 0.0)
+
+def mae_mfe(is_buy, entry, highest, lowest, sl=None, tp=None):
+    """
+    MAE/MFE (หน่วยราคา, ≥ 0) จากราคาสูงสุด/ต่ำสุดระหว่างถือ position
+    ข้อมูลระดับแท่งอาจเลย SL/TP ไปแล้ว (position ปิดไปก่อน) จึงตัดไม่ให้เกินระยะ SL/TP
+    """
+    is_buy, entry = np.asarray(is_buy, dtype=bool), np.asarray(entry, dtype=float)
+    mae = np.maximum(np.where(is_buy, entry - lowest, highest - entry), 0.0)
+    mfe = np.maximum(np.where(is_buy, highest - entry, entry - lowest), 0.0)
+    if sl is not None:
+        mae = np.minimum(mae, np.abs(entry - np.asarray(sl, dtype=float)))
+    if tp is not None:
+        mfe = np.minimum(mfe, np.abs(np.asarray(tp, dtype=float) - entry))
+    return mae, mfe
+
+def excursions(is_buy, entry, start, end, high, low, sl=None, tp=None):
+    """
+    MAE/MFE ของหลาย trade พร้อมกัน - ช่วงแท่ง [start, end] รวมแท่งปิด
+    ใช้ reduceat บนคู่ index จึงรองรับช่วงที่ซ้อนกัน (หลาย position พร้อมกัน)
+    """
+    start, end = np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64)
+    if not start.size:
+        return np.zeros(0), np.zeros(0)
+    high, low = np.append(high, np.nan), np.append(low, np.nan)  # ให้ end + 1 ชี้ได้เสมอ
+    bounds = np.column_stack([start, np.maximum(end, start) + 1]).ravel()
+    highest = np.fmax.reduceat(high, bounds)[::2]
+    lowest = np.fmin.reduceat(low, bounds)[::2]
+    return mae_mfe(is_buy, entry, highest, lowest, sl, tp)
+
+def summary(trades, initial_balance, equity=None):
+    """
+    Metrics หลักของผลเทรด (dict ของตัวเลข)
+
+    Args:
+        trades: DataFrame หรือ list ของ dict
+        equity: pd.Series ของ equity ตามเวลา (None = ใช้ balance ตอนปิด trade)
+    """
+    trades = to_frame(trades)
+    if trades.empty:
+        return {'trades': 0, 'wins': 0, 'losses': 0, 'win_rate': 0.0, 'net_profit': 0.0, 'return_pct': 0.0,
+                'gross_profit': 0.0, 'gross_loss': 0.0, 'profit_factor': 0.0, 'max_drawdown': 0.0,
+                'total_costs': 0.0, 'final_balance': float(initial_balance)}
+
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    wins = pnl > 0
+    profit, loss = pnl[wins].sum(), pnl[pnl < 0].sum()
+    net = float(pnl.sum())
+    balance = np.r_[initial_balance, balance_curve(trades, initial_balance)]
+    dd, dd_trades = drawdown(balance if equity is None else equity.to_numpy())
+    win_streak, loss_streak = streaks(wins)
+    win_rate = float(wins.mean())
+    avg_win = float(pnl[wins].mean()) if wins.any() else 0.0
+    avg_loss = float(pnl[~wins].mean()) if (~wins).any() else 0.0
+
+    stats = {
+        'trades': len(pnl),
+        'wins': int(wins.sum()),
+        'losses': int((~wins).sum()),
+        'win_rate': win_rate * 100,
+        'net_profit': net,
+        'return_pct': net / initial_balance * 100,
+        'gross_profit': float(profit),
+        'gross_loss': float(loss),
+        'profit_factor': float(abs(profit / loss)) if loss != 0 else float('inf'),
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'payoff_ratio': abs(avg_win / avg_loss) if avg_loss else float('inf'),
+        'expectancy': win_rate * avg_win + (1 - win_rate) * avg_loss,
+        'max_drawdown': float(dd.max()),
+        'max_drawdown_trades': dd_trades,
+        'max_win_streak': win_streak,
+        'max_loss_streak': loss_streak,
+        'total_costs': float(trades['costs'].sum()) if 'costs' in trades else 0.0,
+        'final_balance': float(balance[-1]),
+    }
+
+    if 'time' in trades and 'exit_time' in trades:
+        entry = trades['time'].to_numpy(dtype='datetime64[ns]')
+        hours = (trades['exit_time'].to_numpy(dtype='datetime64[ns]') - entry) / np.timedelta64(1, 'h')
+        days = (entry.max() - entry.min()) / np.timedelta64(1, 'D') + 1
+        stats.update({
+            'avg_hours': float(hours.mean()),
+            'median_hours': float(np.median(hours)),
+            'max_hours': float(hours.max()),
+            'avg_win_hours': float(hours[wins].mean()) if wins.any() else 0.0,
+            'avg_loss_hours': float(hours[~wins].mean()) if (~wins).any() else 0.0,
+            'trading_days': int(days),
+            'trades_per_day': float(len(pnl) / days),
+        })
+        stats['sharpe'], stats['sortino'] = ratios(daily_returns(trades, initial_balance, equity))
+
+    if 'mae' in trades and 'mfe' in trades:
+        mae, mfe = trades['mae'].to_numpy(dtype=float), trades['mfe'].to_numpy(dtype=float)
+        stats.update({
+            'avg_mae': float(np.nanmean(mae)),
+            'avg_mfe': float(np.nanmean(mfe)),
+            'mfe_mae_ratio': float(np.nanmean(mfe) / np.nanmean(mae)) if np.nanmean(mae) > 0 else float('inf'),
+            'avg_win_mae': float(np.nanmean(mae[wins])) if wins.any() else 0.0,   # ถอยลึกแค่ไหนก่อนชนะ
+            'avg_loss_mfe': float(np.nanmean(mfe[~wins])) if (~wins).any() else 0.0,  # เคยกำไรแค่ไหนก่อนแพ้
+        })
+    return stats
+
+def breakdown(trades, by):
+    """
+    สรุปแยกกลุ่ม (DataFrame: trades, win_rate, pnl, avg_pnl)
+    by: ชื่อคอลัมน์ (action, exit_reason, symbol, ...) หรือ 'month' (ตามเวลาเข้า)
+    """
+    trades = to_frame(trades)
+    if trades.empty:
+        return pd.DataFrame(columns=['trades', 'win_rate', 'pnl', 'avg_pnl'])
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    if by == 'month':
+        key = pd.Index(trades['time'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]'), name='month')
+    else:
+        key = trades[by].to_numpy()
+    grouped = pd.DataFrame({'pnl': pnl, 'win': pnl > 0}).groupby(key, sort=True)
+    out = grouped.agg(trades=('pnl', 'size'), win_rate=('win', 'mean'), pnl=('pnl', 'sum'))
+    out['win_rate'] *= 100
+    out['avg_pnl'] = out['pnl'] / out['trades']
+    if by == 'month':
+        out.index = out.index.strftime('%Y-%m')
+    return out
+
+def tearsheet(trades, initial_balance, equity=None):
+    """summary + ตารางรายเดือน / ตามทิศ / ตามเหตุผลที่ปิด"""
+    trades = to_frame(trades)
+    sheet = {'summary': summary(trades, initial_balance, equity)}
+    for by in ('month', 'action', 'exit_reason'):
+        if by == 'month' and 'time' in trades or by in trades:
+            sheet[by] = breakdown(trades, by)
+    return sheet
@@ -0,0 +1,167 @@
+"""
+🗄️ Bar Store
+เก็บแท่งราคาเป็นไฟล์ binary (structured records) + meta.json แล้วอ่านแบบ memory-mapped ทีละ chunk
+ใช้กับข้อมูลหลายปี (เช่น M1) ที่ใหญ่เกินจะโหลดเป็น DataFrame เดียว
+
+Usage:
+    python bar_store.py data/XAUUSD_M1 --from-csv XAUUSD_M1.csv --symbol XAUUSD --timeframe M1
+    python bar_store.py data/XAUUSD_H1 --download --symbol XAUUSD --timeframe H1 --days 730
+    (เพิ่ม --append เพื่อต่อท้าย store เดิมแทนการสร้างใหม่)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+BAR_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                      ('close', '<f8'), ('volume', '<f8')])
+
+_DATA_FILE = "bars.bin"
+_META_FILE = "meta.json"
+
+class BarStore:
+    """
+    โฟลเดอร์เก็บแท่งของ symbol/timeframe เดียว เรียงตามเวลา (time = int64 ns UTC)
+
+    Usage:
+        store = BarStore.create("data/XAUUSD_M1", symbol="XAUUSD", timeframe="M1")
+        store.append(df)                      # เพิ่มทีละ DataFrame ได้เรื่อยๆ
+        for chunk in store.chunks(100_000):   # อ่านทีละ chunk (DataFrame)
+            ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, _META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+    @classmethod
+    def create(cls, path, symbol="", timeframe=""):
+        """สร้าง store ว่าง (ลบข้อมูลเดิมถ้ามี)"""
+        os.makedirs(path, exist_ok=True)
+        open(os.path.join(path, _DATA_FILE), 'wb').close()
+        with open(os.path.join(path, _META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'symbol': symbol, 'timeframe': timeframe, 'count': 0, 'last_time': None}, f)
+        return cls(path)
+
+    @property
+    def symbol(self):
+        return self.meta['symbol']
+
+    def __len__(self):
+        return self.meta['count']
+
+    def append(self, df):
+        """เพิ่มแท่งต่อท้าย - แท่งที่เวลาไม่ใหม่กว่าแท่งสุดท้ายจะถูกข้าม"""
+        records = to_records(df)
+        if self.meta['last_time'] is not None:
+            records = records[records['time'] > self.meta['last_time']]
+        if not len(records):
+            return 0
+
+        with open(os.path.join(self.path, _DATA_FILE), 'ab') as f:
+            f.write(records.tobytes())
+        self.meta['count'] += len(records)
+        self.meta['last_time'] = int(records['time'][-1])
+        with open(os.path.join(self.path, _META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        return len(records)
+
+    def records(self):
+        """ข้อมูลทั้งหมดแบบ memory-mapped (ไม่โหลดเข้า RAM จนกว่าจะอ่าน)"""
+        if not len(self):
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(os.path.join(self.path, _DATA_FILE), dtype=BAR_DTYPE, mode='r', shape=(len(self),))
+
+    def chunks(self, size):
+        """อ่านทีละ chunk เป็น DataFrame (copy ออกจาก memmap ทีละส่วน - หน่วยความจำคงที่)"""
+        data = self.records()
+        for start in range(0, len(data), size):
+            yield to_frame(np.array(data[start:start + size]))
+
+    def fingerprint(self, size=1_000_000):
+        """Hash ของข้อมูลทั้งหมด (อ่านทีละ chunk - หน่วยความจำคงที่)"""
+        h = hashlib.blake2b(digest_size=16)
+        data = self.records()
+        for start in range(0, len(data), size):
+            h.update(np.ascontiguousarray(data[start:start + size]).tobytes())
+        return h.hexdigest()
+
+    def to_frame(self):
+        """โหลดทั้งหมดเป็น DataFrame (ใช้กับข้อมูลที่พอดีกับ RAM)"""
+        return to_frame(np.array(self.records()))
+
+def to_records(df):
+    """DataFrame (time, open, high, low, close, volume) -> structured array"""
+    times = pd.to_datetime(df['time'])
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records['time'] = times.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    for name in ('open', 'high', 'low', 'close'):
+        records[name] = df[name].to_numpy(dtype=float)
+    records['volume'] = df['volume'].to_numpy(dtype=float) if 'volume' in df.columns else 0.0
+    return records
+
+def to_frame(records):
+    """structured array -> DataFrame ในรูปแบบคอลัมน์ที่ strategy ใช้"""
+    df = pd.DataFrame({name: records[name] for name in BAR_DTYPE.names})
+    df['time'] = pd.to_datetime(df['time'].to_numpy().view('datetime64[ns]'))
+    return df
+
+def read_csv(path):
+    """CSV ของแท่ง - รองรับไฟล์ export ของ MT5 (<DATE> <TIME> แยกคอลัมน์, คั่นด้วย tab) และ CSV ทั่วไป"""
+    with open(path, encoding='utf-8-sig') as f:
+        header = f.readline()
+    df = pd.read_csv(path, sep='\t' if '\t' in header else ',')
+    df.columns = [str(c).strip().strip('<>').lower() for c in df.columns]
+    if 'date' in df and 'time' in df:
+        df['time'] = df.pop('date').astype(str) + ' ' + df['time'].astype(str)
+    if 'volume' not in df:
+        for name in ('tickvol', 'vol'):
+            if name in df:
+                df['volume'] = df[name]
+                break
+    return df
+
+def main():
+    args = sys.argv[1:]
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    if not args or args[0].startswith('--'):
+        print(__doc__)
+        return
+    path = args[0]
+    symbol = option("--symbol", "XAUUSD")
+    timeframe = option("--timeframe", "H1")
+
+    from config import TF_MAP
+    from data_quality import clean_bars, log_report
+    csv_path = option("--from-csv")
+    if csv_path:
+        df, report = clean_bars(read_csv(csv_path), TF_MAP[timeframe])
+        log_report(f"{symbol} {timeframe} ({csv_path})", report)
+    elif "--download" in args:
+        from market_data import download_bars
+        df = download_bars(symbol, timeframe, int(option("--days", "730")))
+    else:
+        print("❌ ต้องระบุ --from-csv <file> หรือ --download")
+        return
+    if df is None or df.empty:
+        print("❌ ไม่มีข้อมูลให้บันทึก")
+        return
+
+    if "--append" in args and os.path.exists(os.path.join(path, _META_FILE)):
+        store = BarStore(path)
+    else:
+        store = BarStore.create(path, symbol=symbol, timeframe=timeframe)
+    added = store.append(df)
+    print(f"🗄️ {symbol} {timeframe}: +{added:,} bars → {path} ({len(store):,} bars, "
+          f"{df['time'].iloc[0]} → {df['time'].iloc[-1]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+⚡ Indicator Benchmark
+เปรียบเทียบเวลา/ความถูกต้องของ fused kernel กับสูตร pandas เดิม ที่ 1M bars
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+import indicators
+
+def legacy_trend_indicators(df: pd.DataFrame):
+    """สูตร pandas เดิมของ calculate_indicators (ใช้เป็น reference)"""
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    
+    high_low = df['high'] - df['low']
+    high_close = np.abs(df['high'] - df['close'].shift(1))
+    low_close = np.abs(df['low'] - df['close'].shift(1))
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    true_range = ranges.max(axis=1)
+    
+    plus_dm = df['high'].diff()
+    minus_dm = df['low'].diff() * -1
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm < 0] = 0
+    
+    plus_di = 100 * (plus_dm.rolling(14).mean() / true_range.rolling(14).mean())
+    minus_di = 100 * (minus_dm.rolling(14).mean() / true_range.rolling(14).mean())
+    
+    dx = (np.abs(plus_di - minus_di) / np.abs(plus_di + minus_di)) * 100
+    adx = dx.rolling(14).mean()
+    atr = true_range.rolling(window=14).mean()
+    return {'rsi': rsi.to_numpy(), 'adx': adx.to_numpy(), 'atr': atr.to_numpy()}
+
+def make_bars(n, seed=42):
+    """สร้าง OHLC แบบ random walk สำหรับ benchmark"""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 2, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.exponential(1.5, n)
+    low = np.minimum(open_, close) - rng.exponential(1.5, n)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close})
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(n=1_000_000):
+    print(f"⚡ Indicator Benchmark - {n:,} bars")
+    print("=" * 50)
+    df = make_bars(n)
+    h, l, c = df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy()
+    
+    legacy_time, reference = timed(lambda: legacy_trend_indicators(df))
+    print(f"🐼 pandas (เดิม): {legacy_time * 1000:8.1f} ms")
+    
+    backends = ["numpy"] + (["numba"] if indicators.numba_available() else [])
+    for backend in backends:
+        indicators.trend_kernel(h[:100], l[:100], c[:100], backend=backend)  # warm-up / JIT compile
+        elapsed, result = timed(lambda: indicators.trend_kernel(h, l, c, backend=backend))
+        max_err = max(
+            np.nanmax(np.abs(result[k] - reference[k]) / np.maximum(1.0, np.abs(reference[k])))
+            for k in reference
+        )
+        print(f"⚡ {backend:14s}: {elapsed * 1000:8.1f} ms | x{legacy_time / elapsed:4.1f} | max rel err {max_err:.1e}")
+    
+    if not indicators.numba_available():
+        print("💡 ติดตั้ง numba เพื่อใช้ JIT kernel: pip install numba")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
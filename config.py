@@ -1,5 +1,10 @@
 import os
-from dotenv import load_dotenv
+import time
+import threading
+from dataclasses import dataclass, fields
+from dotenv import load_dotenv, dotenv_values
+
+ENV_PATH = ".env"
 
 load_dotenv()
 
@@ -29,15 +34,214 @@ MAX_OPEN_TRADES = int(os.getenv("MAX_OPEN_TRADES", "1"))
 EMA_SHORT = int(os.getenv("EMA_SHORT", "20"))
 EMA_LONG = int(os.getenv("EMA_LONG", "50"))
 EMA_VERY_LONG = int(os.getenv("EMA_VERY_LONG", "200"))
+STRATEGY_RULES = os.getenv("STRATEGY_RULES", "")  # path ไฟล์ JSON ของกฎ (ว่าง = ใช้ Golden Trend ในตัว)
+MACD_FAST = int(os.getenv("MACD_FAST", "12"))
+MACD_SLOW = int(os.getenv("MACD_SLOW", "26"))
+MACD_SIGNAL = int(os.getenv("MACD_SIGNAL", "9"))
+RSI_PERIOD = int(os.getenv("RSI_PERIOD", "14"))
+ADX_PERIOD = int(os.getenv("ADX_PERIOD", "14"))
+ATR_PERIOD = int(os.getenv("ATR_PERIOD", "14"))
+INDICATOR_CACHE_MB = float(os.getenv("INDICATOR_CACHE_MB", "64"))  # เพดานหน่วยความจำของ indicator cache
 
 # Risk Management
 RISK_PERCENT = float(os.getenv("RISK_PERCENT", "1.5"))
 MAX_POSITIONS = int(os.getenv("MAX_POSITIONS", "3"))
 MAX_CONSECUTIVE_LOSSES = int(os.getenv("MAX_CONSECUTIVE_LOSSES", "3"))
 
+# Trade Management - trailing stop / break-even / partial TP (0 = ปิด)
+TRAIL_ATR = float(os.getenv("TRAIL_ATR", "0"))
+BREAKEVEN_ATR = float(os.getenv("BREAKEVEN_ATR", "0"))
+PARTIAL_TP_ATR = float(os.getenv("PARTIAL_TP_ATR", "0"))
+PARTIAL_TP_FRACTION = float(os.getenv("PARTIAL_TP_FRACTION", "0.5"))
+SLTP_STEP_POINTS = float(os.getenv("SLTP_STEP_POINTS", "50"))  # MT5: ส่ง modify เมื่อ SL ขยับ >= N points
+
+# Trading Sessions - true = เทรดเฉพาะช่วง London/NY (false = ทุกเวลาที่ตลาดเปิด)
+SESSION_FILTER = os.getenv("SESSION_FILTER", "false").lower() in ("1", "true", "yes")
+
+# Trading Costs - spread/commission/swap/slippage ใน backtest และ demo (ตาราง default: costs.DEFAULT_COSTS)
+COST_MODEL = os.getenv("COST_MODEL", "true").lower() in ("1", "true", "yes")
+COSTS_FILE = os.getenv("COSTS_FILE", "")  # path ไฟล์ JSON ตารางต้นทุนราย symbol (ทับค่า default)
+SWAP_ROLLOVER_HOUR = int(os.getenv("SWAP_ROLLOVER_HOUR", "21"))  # ชั่วโมง UTC ที่คิด swap
+
+# Exit Detection - sl_first / tp_first / nearest_open (เมื่อ SL และ TP อยู่ในแท่งเดียวกัน)
+INTRABAR_EXIT_RULE = os.getenv("INTRABAR_EXIT_RULE", "sl_first").lower()
+
+# Signal Gate - กฎเดียวกันทั้ง backtest และ live (นับเป็นแท่ง ไม่ใช่เวลาเครื่อง)
+SIGNAL_EDGE_ONLY = os.getenv("SIGNAL_EDGE_ONLY", "true").lower() in ("1", "true", "yes")  # เข้าเฉพาะตอนสัญญาณเปลี่ยน
+SIGNAL_COOLDOWN_BARS = int(os.getenv("SIGNAL_COOLDOWN_BARS", "3"))  # หลังเข้าแล้ว ไม่รับสัญญาณอีกกี่แท่ง
+
+# Data Source - yahoo (ดาวน์โหลดจริง) / synthetic (ข้อมูลจำลองแบบ deterministic สำหรับ test/benchmark/offline)
+DATA_SOURCE = os.getenv("DATA_SOURCE", "yahoo").lower()
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "42"))
+SYNTHETIC_START = os.getenv("SYNTHETIC_START", "2024-01-01")  # จุดเริ่มของ path จำลอง
+
+# Data Quality - ตรวจ/ซ่อมแท่งทุกครั้งที่โหลดข้อมูล (data_quality.py)
+DQ_SPIKE_MULT = float(os.getenv("DQ_SPIKE_MULT", "8"))      # กระโดดเกินกี่เท่าของ range มัธยฐาน = spike
+DQ_SPIKE_WINDOW = int(os.getenv("DQ_SPIKE_WINDOW", "50"))   # จำนวนแท่งก่อนหน้าที่ใช้หา range มัธยฐาน
+DQ_MAX_GAP_BARS = int(os.getenv("DQ_MAX_GAP_BARS", "3"))    # แท่งหายเกินเท่านี้ (ไม่นับเสาร์-อาทิตย์) = รายงาน gap
+DQ_DROP_ZERO_VOLUME = os.getenv("DQ_DROP_ZERO_VOLUME", "true").lower() in ("1", "true", "yes")  # ตัดแท่ง roll ของ futures
+
 BACKTEST_DAYS = int(os.getenv("BACKTEST_DAYS", "180"))
+STREAM_CHUNK_BARS = int(os.getenv("STREAM_CHUNK_BARS", "100000"))  # จำนวนแท่งต่อ chunk ของ streaming backtest
+
+# Headless service (python service.py)
+SERVICE_WORKERS = os.getenv("SERVICE_WORKERS", "demo")               # worker ที่รัน: demo, real (คั่นด้วย ,)
+SERVICE_STATE_DIR = os.getenv("SERVICE_STATE_DIR", "state")          # state + แท่งที่ cache ไว้สำหรับ warm start
+SERVICE_BACKOFF_MIN = float(os.getenv("SERVICE_BACKOFF_MIN", "1"))   # วินาทีก่อน restart ครั้งแรก (x2 ทุกครั้งที่ crash ติดกัน)
+SERVICE_BACKOFF_MAX = float(os.getenv("SERVICE_BACKOFF_MAX", "300"))
+SERVICE_STABLE_SECONDS = float(os.getenv("SERVICE_STABLE_SECONDS", "600"))  # รันได้นานเท่านี้ = รีเซ็ต backoff
+SERVICE_STOP_TIMEOUT = float(os.getenv("SERVICE_STOP_TIMEOUT", "20"))       # รอ worker หยุดเองก่อน SIGKILL
+WARM_START_DAYS = int(os.getenv("WARM_START_DAYS", "5"))             # มีแท่ง cache แล้ว ดาวน์โหลดเพิ่มแค่กี่วัน
+REAL_TRADING_CONFIRM = os.getenv("REAL_TRADING_CONFIRM", "")         # "YES" = ไม่ถามยืนยันก่อนเทรดเงินจริง (จำเป็นสำหรับ headless)
+
+# Profiling (--profile)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # ระยะห่างของ stack sample
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))                   # จำนวนอันดับในรายงาน
+PROFILE_TRACE_FRAMES = int(os.getenv("PROFILE_TRACE_FRAMES", "25"))  # ความลึก traceback ของ tracemalloc
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "0"))  # จำนวน worker processes (0 = ตามจำนวน CPU)
+RESULTS_DB = os.getenv("RESULTS_DB", "results/backtests.sqlite")  # SQLite เก็บผล backtest ทุก run
+RESULTS_CACHE = os.getenv("RESULTS_CACHE", "true").lower() in ("1", "true", "yes")  # ใช้ผลเดิมถ้ารันซ้ำแบบเดียวกัน
+
+# Portfolio Backtest - หลาย symbols บนบัญชีเดียว
+PORTFOLIO_SYMBOLS = [s.strip() for s in os.getenv("PORTFOLIO_SYMBOLS", SYMBOL).split(",") if s.strip()]
+PORTFOLIO_TIMEFRAME = os.getenv("PORTFOLIO_TIMEFRAME", "H1")
+PORTFOLIO_MAX_POSITIONS = int(os.getenv("PORTFOLIO_MAX_POSITIONS", "6"))
+PORTFOLIO_MAX_PER_SYMBOL = int(os.getenv("PORTFOLIO_MAX_PER_SYMBOL", "1"))
+PORTFOLIO_MAX_RISK = float(os.getenv("PORTFOLIO_MAX_RISK", "6.0"))  # % ของ balance ที่เสี่ยงรวมทุก position
+CORR_THRESHOLD = float(os.getenv("CORR_THRESHOLD", "0.7"))         # |correlation| ที่ถือว่าเป็นความเสี่ยงเดียวกัน
+CORR_MAX_POSITIONS = int(os.getenv("CORR_MAX_POSITIONS", "2"))     # position สูงสุดในกลุ่มที่ correlate ทิศเดียวกัน
+CORR_WINDOW = int(os.getenv("CORR_WINDOW", "500"))                 # จำนวนแท่งย้อนหลังที่ใช้คำนวณ correlation
+
+# Launcher - subprocess (แยก process ทุกครั้ง) / inprocess (รันใน process เดิม, import ครั้งเดียว)
+LAUNCH_MODE = os.getenv("LAUNCH_MODE", "subprocess").lower()
+
+# Market Data Bus - ชื่อ shared memory ของ data feeder (ว่าง = แต่ละ process ดาวน์โหลดเอง)
+MARKET_BUS = os.getenv("MARKET_BUS", "")
+MARKET_BUS_CAPACITY = int(os.getenv("MARKET_BUS_CAPACITY", "5000"))
+FEED_INTERVAL = int(os.getenv("FEED_INTERVAL", "30"))
+
+# Tick Feed - real_trading สร้างแท่งจาก tick เอง (false = ดึงแท่งจาก copy_rates ทุก 60 วินาทีแบบเดิม)
+TICK_FEED = os.getenv("TICK_FEED", "true").lower() in ("1", "true", "yes")
+TICK_POLL_MS = int(os.getenv("TICK_POLL_MS", "250"))              # ความถี่ดึง tick ใหม่ (ms)
+TICK_RING_CAPACITY = int(os.getenv("TICK_RING_CAPACITY", "200000"))  # จำนวน tick ล่าสุดที่เก็บไว้วัด spread
+TICK_HISTORY_BARS = int(os.getenv("TICK_HISTORY_BARS", "300"))    # จำนวนแท่งปิดแล้วที่ส่งให้ strategy
+
+# Reconciliation - mirror position ของบอทจาก deal ใหม่ แทนการถาม positions_get ทุกครั้ง
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "5"))          # วินาทีระหว่างดึง deal ใหม่
+RECONCILE_FULL_INTERVAL = float(os.getenv("RECONCILE_FULL_INTERVAL", "300"))  # วินาทีระหว่างตรวจ drift กับ snapshot เต็ม
 
 # MT5 Connection
 MT5_LOGIN = os.getenv("MT5_LOGIN")
 MT5_PASSWORD = os.getenv("MT5_PASSWORD")
 MT5_SERVER = os.getenv("MT5_SERVER")
+
+
+# =============================================================================
+# Hot-reload - ค่าที่เปลี่ยนได้ระหว่างรันโดยไม่ต้อง restart live loop
+# =============================================================================
+
+@dataclass(frozen=True)
+class Settings:
+    """Snapshot ของค่าที่ live loop อ่านทุกรอบ (frozen - เปลี่ยนทั้งก้อนแบบ atomic)"""
+    RISK_PERCENT: float = RISK_PERCENT
+    MAX_POSITIONS: int = MAX_POSITIONS
+    MAX_CONSECUTIVE_LOSSES: int = MAX_CONSECUTIVE_LOSSES
+    MAX_OPEN_TRADES: int = MAX_OPEN_TRADES
+    DAILY_PROFIT_TARGET: float = DAILY_PROFIT_TARGET
+    DAILY_DRAWDOWN_LIMIT: float = DAILY_DRAWDOWN_LIMIT
+    LOT: float = LOT
+    EMA_SHORT: int = EMA_SHORT
+    EMA_LONG: int = EMA_LONG
+    EMA_VERY_LONG: int = EMA_VERY_LONG
+
+    def validate(self):
+        """ตรวจความถูกต้อง - raise ValueError พร้อมรายการปัญหาทั้งหมด"""
+        problems = []
+        if not 0 < self.RISK_PERCENT <= 10:
+            problems.append(f"RISK_PERCENT={self.RISK_PERCENT} (ต้องอยู่ระหว่าง 0-10)")
+        for name in ("MAX_POSITIONS", "MAX_CONSECUTIVE_LOSSES", "MAX_OPEN_TRADES"):
+            if getattr(self, name) < 1:
+                problems.append(f"{name}={getattr(self, name)} (ต้อง >= 1)")
+        for name in ("DAILY_PROFIT_TARGET", "DAILY_DRAWDOWN_LIMIT", "LOT"):
+            if getattr(self, name) <= 0:
+                problems.append(f"{name}={getattr(self, name)} (ต้อง > 0)")
+        if not 1 < self.EMA_SHORT < self.EMA_LONG < self.EMA_VERY_LONG:
+            problems.append(f"EMA {self.EMA_SHORT}/{self.EMA_LONG}/{self.EMA_VERY_LONG} "
+                            f"(ต้องเป็น 1 < EMA_SHORT < EMA_LONG < EMA_VERY_LONG)")
+        if problems:
+            raise ValueError("Invalid config: " + "; ".join(problems))
+        return self
+
+def load_settings(path=ENV_PATH):
+    """อ่าน .env ใหม่เป็น Settings (ค่าที่ไม่มีในไฟล์ใช้ค่าตอนเริ่มโปรแกรม)"""
+    values = dotenv_values(path) if os.path.exists(path) else {}
+    kwargs = {}
+    for field in fields(Settings):
+        raw = values.get(field.name)
+        if raw is None or raw == "":
+            continue
+        try:
+            kwargs[field.name] = field.type(raw) if field.type is not int else int(float(raw))
+        except ValueError:
+            raise ValueError(f"Invalid config: {field.name}={raw!r} ไม่ใช่ {field.type.__name__}")
+    return Settings(**kwargs).validate()
+
+class ConfigWatcher:
+    """ตรวจ .env ด้วย mtime polling แล้วสลับ Settings ใหม่แบบ atomic เมื่อไฟล์เปลี่ยนและผ่าน validation"""
+
+    def __init__(self, path=ENV_PATH, interval=2.0):
+        self.path = path
+        self.interval = interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._mtime = self._stat()
+        self._checked_at = time.monotonic()
+        try:
+            self._settings = load_settings(path)
+        except ValueError as e:
+            self.last_error = str(e)
+            self._settings = Settings()
+
+    @property
+    def current(self):
+        """Settings ที่ใช้อยู่ (อ่านครั้งเดียวต่อรอบ loop เพื่อให้ค่าสอดคล้องกัน)"""
+        return self._settings
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def poll(self, force=False):
+        """
+        ตรวจว่า .env เปลี่ยนหรือไม่ (ไม่เกินทุก interval วินาที)
+
+        Returns:
+            dict: {ชื่อ: (ค่าเดิม, ค่าใหม่)} ของค่าที่เปลี่ยน (ว่าง = ไม่มีการเปลี่ยนแปลง)
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.interval:
+            return {}
+        self._checked_at = now
+
+        mtime = self._stat()
+        if mtime == self._mtime and not force:
+            return {}
+
+        with self._lock:
+            self._mtime = mtime
+            try:
+                new = load_settings(self.path)
+            except ValueError as e:
+                # ค่าไม่ถูกต้อง - ใช้ค่าเดิมต่อไปจนกว่าไฟล์จะถูกแก้อีกครั้ง
+                self.last_error = str(e)
+                return {}
+
+            self.last_error = None
+            old = self._settings
+            changes = {f.name: (getattr(old, f.name), getattr(new, f.name))
+                       for f in fields(Settings) if getattr(old, f.name) != getattr(new, f.name)}
+            self._settings = new
+            return changes
@@ -0,0 +1,168 @@
+"""
+💸 Trading Cost Model
+ค่า spread (ตามชั่วโมงของวัน), commission ต่อ lot, swap ข้ามคืน และ slippage
+คำนวณเป็นดอลลาร์ต่อ 1 lot สำหรับทุก trade ในครั้งเดียว - คูณ lot ทีหลังได้เพราะต้นทุนเป็นเส้นตรงกับ lot
+ขนาดสัญญาอยู่ใน SymbolCosts ของแต่ละ symbol (ค่า default จาก instruments.INSTRUMENTS)
+"""
+
+import json
+from dataclasses import dataclass, replace
+import numpy as np
+from config import COST_MODEL, COSTS_FILE, SWAP_ROLLOVER_HOUR
+from instruments import INSTRUMENTS
+from utils.logger import get_logger
+
+log = get_logger("costs")
+
+_NS_PER_HOUR = 3600 * 10 ** 9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+@dataclass(frozen=True)
+class SymbolCosts:
+    """ต้นทุนของ symbol เดียว (spread/slippage เป็นหน่วยราคา, commission/swap เป็น $ ต่อ lot)"""
+    spread: float = 0.0
+    spread_curve: tuple = ()    # ตัวคูณ spread 24 ค่าตามชั่วโมง UTC (ว่าง = spread คงที่)
+    commission: float = 0.0     # ต่อ lot ต่อรอบ (เปิด+ปิด)
+    swap_long: float = 0.0      # ต่อ lot ต่อคืน (ติดลบ = เสียเงิน)
+    swap_short: float = 0.0
+    slippage: float = 0.0       # ต่อข้าง (เข้าและออก)
+    contract_size: float = 100.0  # หน่วยต่อ 1 lot - แปลง spread/slippage (หน่วยราคา) เป็นเงิน
+    quote_usd: bool = True      # False = ราคาเป็นสกุลอื่นต่อ 1 USD (USDJPY) - แปลงเป็น $ ด้วยราคา
+
+    def spread_at(self, hours):
+        """spread ตามชั่วโมง UTC (array)"""
+        if not self.spread_curve:
+            return np.full(np.shape(hours), self.spread)
+        return self.spread * np.asarray(self.spread_curve, dtype=float)[hours]
+
+def symbol_costs(symbol, **values):
+    """SymbolCosts ที่ขนาดสัญญามาจาก instruments.INSTRUMENTS (ระบุ contract_size/quote_usd เองได้)"""
+    spec = INSTRUMENTS.get(symbol)
+    if spec is not None:
+        values.setdefault('contract_size', spec.contract_size)
+        values.setdefault('quote_usd', spec.quote_usd)
+    elif 'contract_size' not in values:
+        raise ValueError(f"{symbol}: ไม่รู้ขนาดสัญญา - ระบุ contract_size ในตารางต้นทุน")
+    return SymbolCosts(**values)
+
+# Exness Standard (ประมาณ) - spread กว้างขึ้นช่วง rollover 21:00-23:00 UTC
+_ROLLOVER_CURVE = tuple([1.0] * 21 + [3.0, 2.0, 1.5])
+DEFAULT_COSTS = {
+    'XAUUSD': symbol_costs('XAUUSD', spread=0.20, spread_curve=_ROLLOVER_CURVE, swap_long=-4.0, swap_short=1.0,
+                           slippage=0.02),
+    'EURUSD': symbol_costs('EURUSD', spread=0.00010, spread_curve=_ROLLOVER_CURVE, swap_long=-7.0, swap_short=2.0,
+                           slippage=0.00001),
+    'GBPUSD': symbol_costs('GBPUSD', spread=0.00013, spread_curve=_ROLLOVER_CURVE, swap_long=-5.0, swap_short=0.5,
+                           slippage=0.00001),
+    'USDJPY': symbol_costs('USDJPY', spread=0.014, spread_curve=_ROLLOVER_CURVE, swap_long=10.0, swap_short=-20.0,
+                           slippage=0.002),
+}
+
+def _count_weekday(start_day, end_day, weekday):
+    """จำนวนวันในช่วง (start_day, end_day] ที่ตรงกับ weekday (0 = จันทร์) - วันนับจาก epoch"""
+    # 1970-01-01 เป็นวันพฤหัส (weekday 3)
+    target = (weekday - 3) % 7
+    return (end_day - target) // 7 - (start_day - target) // 7
+
+class CostModel:
+    """
+    ตารางต้นทุนราย symbol
+
+    Args:
+        table: {symbol: SymbolCosts} (None = DEFAULT_COSTS, ดู from_config สำหรับ COSTS_FILE)
+        enabled: False = ต้นทุนเป็นศูนย์ทั้งหมด
+    """
+
+    def __init__(self, table=None, enabled=True, rollover_hour=SWAP_ROLLOVER_HOUR):
+        self.table = dict(DEFAULT_COSTS if table is None else table)
+        self.enabled = enabled
+        self.rollover_hour = rollover_hour
+        self._missing = set()  # symbol ที่เตือนว่าไม่มีในตารางไปแล้ว
+
+    @classmethod
+    def from_config(cls):
+        """สร้างจาก config (COST_MODEL, COSTS_FILE)"""
+        table = dict(DEFAULT_COSTS)
+        if COSTS_FILE:
+            table.update(load_costs(COSTS_FILE))
+        return cls(table, enabled=COST_MODEL)
+
+    def for_symbol(self, symbol):
+        if not self.enabled:
+            return SymbolCosts()
+        costs = self.table.get(symbol)
+        if costs is None:
+            if symbol not in self._missing:
+                self._missing.add(symbol)
+                log.warning(f"⚠️ {symbol}: ไม่มีในตารางต้นทุน - คิดต้นทุนเป็นศูนย์ (เพิ่มใน COSTS_FILE)")
+            return SymbolCosts()
+        return costs
+
+    def scaled(self, spread=1.0, commission=1.0, swap=1.0, slippage=1.0):
+        """Model ใหม่ที่คูณต้นทุนแต่ละส่วน (สำหรับ sensitivity sweep)"""
+        table = {s: replace(c, spread=c.spread * spread, commission=c.commission * commission,
+                            swap_long=c.swap_long * swap, swap_short=c.swap_short * swap,
+                            slippage=c.slippage * slippage)
+                 for s, c in self.table.items()}
+        return CostModel(table, self.enabled, self.rollover_hour)
+
+    def per_lot(self, symbol, is_buy, entry_time, exit_time, price=None):
+        """
+        ต้นทุนต่อ 1 lot ของทุก trade (vectorized)
+
+        Args:
+            is_buy: bool array
+            entry_time, exit_time: เวลาเข้า/ออก (int64 ns UTC หรือ datetime64)
+            price: ราคาเข้า - ใช้แปลง spread/slippage เป็น $ เมื่อ quote ไม่ใช่ USD (USDJPY)
+
+        Returns:
+            dict: {'spread', 'commission', 'swap', 'slippage', 'total'} เป็น $ ต่อ lot (บวก = เสียเงิน)
+        """
+        costs = self.for_symbol(symbol)
+        is_buy = np.asarray(is_buy, dtype=bool)
+        entry_ns = np.asarray(entry_time).astype('datetime64[ns]').view(np.int64)
+        exit_ns = np.asarray(exit_time).astype('datetime64[ns]').view(np.int64)
+
+        # spread: ครึ่งหนึ่งตอนเข้า ครึ่งหนึ่งตอนออก ตามชั่วโมงของแต่ละฝั่ง
+        entry_hour = (entry_ns // _NS_PER_HOUR) % 24
+        exit_hour = (exit_ns // _NS_PER_HOUR) % 24
+        multiplier = costs.contract_size
+        if not costs.quote_usd:
+            if price is None:
+                raise ValueError(f"{symbol}: ต้องส่ง price เพื่อแปลงต้นทุนเป็น $")
+            multiplier = multiplier / np.asarray(price, dtype=float)
+        spread = (costs.spread_at(entry_hour) + costs.spread_at(exit_hour)) / 2 * multiplier
+
+        slippage = np.broadcast_to(2 * costs.slippage * multiplier, is_buy.shape).astype(float)
+        commission = np.full(is_buy.shape, float(costs.commission))
+
+        # swap: นับ rollover ที่ข้ามผ่าน เฉพาะจันทร์-ศุกร์ และวันพุธคิด 3 เท่า (ชดเชยเสาร์-อาทิตย์)
+        offset = self.rollover_hour * _NS_PER_HOUR
+        start_day = (entry_ns - offset) // _NS_PER_DAY
+        end_day = (exit_ns - offset) // _NS_PER_DAY
+        nights = (end_day - start_day
+                  - _count_weekday(start_day, end_day, 5) - _count_weekday(start_day, end_day, 6)
+                  + 2 * _count_weekday(start_day, end_day, 2))
+        swap = -np.where(is_buy, costs.swap_long, costs.swap_short) * nights
+
+        total = spread + slippage + commission + swap
+        return {'spread': spread, 'commission': commission, 'swap': swap, 'slippage': slippage, 'total': total}
+
+def load_costs(path):
+    """
+    โหลดตารางต้นทุนจากไฟล์ JSON
+
+    รูปแบบ: {"XAUUSD": {"spread": 0.2, "spread_curve": [...24 ค่า], "commission": 7.0,
+                        "swap_long": -4.0, "swap_short": 1.0, "slippage": 0.02}, ...}
+    contract_size / quote_usd ไม่ต้องใส่ถ้า symbol อยู่ใน instruments.INSTRUMENTS
+    """
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+
+    table = {}
+    for symbol, values in spec.items():
+        curve = tuple(values.pop('spread_curve', ()))
+        if curve and len(curve) != 24:
+            raise ValueError(f"{symbol}: spread_curve ต้องมี 24 ค่า (ได้ {len(curve)})")
+        table[symbol] = symbol_costs(symbol, spread_curve=curve, **values)
+    return table
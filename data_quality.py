@@ -0,0 +1,266 @@
+"""
+🧹 Data Quality
+ตรวจและซ่อมแท่ง OHLCV ก่อนเข้า indicators - รันทุกครั้งที่โหลดข้อมูล (download_bars) รวมถึงรอบอัปเดตของ live
+ทุกขั้นเป็น vectorized NumPy/pandas และจับเวลาแยกต่อขั้น (QualityReport.timings)
+
+ลำดับขั้น:
+- columns     : ชื่อคอลัมน์ตามชื่อ (รองรับ MultiIndex ของ yfinance) → time, open, high, low, close, volume
+                เวลาแบบมี timezone แปลงเป็น UTC แบบ naive
+- invalid     : ตัดแถวที่ราคาเป็น NaN/inf หรือ ≤ 0 (volume ที่หายไป = 0)
+- duplicates  : เรียงตามเวลา เวลาซ้ำใช้แถวหลังสุด
+- zero_volume : ตัดแท่ง volume = 0 (roll ของ futures เช่น GC=F) - เฉพาะ symbol ที่มี volume จริง
+- ohlc        : ซ่อม high/low ให้ครอบ open/close
+- spikes      : ตัดแท่งที่ close กระโดดแล้วกลับทันที และตัดไส้เทียนที่ยาวผิดปกติ (เทียบ range มัธยฐานก่อนหน้า)
+- gaps        : รายงานช่วงที่แท่งหายเกิน DQ_MAX_GAP_BARS (ไม่นับเสาร์-อาทิตย์) - ไม่เติมแท่งปลอม
+
+Usage:
+    df, report = clean_bars(raw, step_minutes=60)
+    python data_quality.py --bars 1000000     # benchmark บนข้อมูลจำลองที่ใส่ข้อผิดพลาดไว้
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from config import DQ_SPIKE_MULT, DQ_SPIKE_WINDOW, DQ_MAX_GAP_BARS, DQ_DROP_ZERO_VOLUME
+from utils.logger import get_logger
+
+log = get_logger("data_quality")
+
+BAR_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+_TIME_NAMES = ('time', 'datetime', 'date', 'timestamp')
+
+_NS_PER_MINUTE = 60 * 10 ** 9
+_NS_PER_DAY = 24 * 60 * _NS_PER_MINUTE
+_NS_PER_WEEK = 7 * _NS_PER_DAY
+_MONDAY = 3 * _NS_PER_DAY  # 1970-01-01 เป็นวันพฤหัส → +3 วัน = นับจากวันจันทร์
+
+@dataclass(frozen=True)
+class QualityRules:
+    spike_mult: float = DQ_SPIKE_MULT          # กระโดดเกินกี่เท่าของ range มัธยฐาน = spike
+    spike_window: int = DQ_SPIKE_WINDOW        # จำนวนแท่งก่อนหน้าที่ใช้หา range มัธยฐาน
+    max_gap_bars: int = DQ_MAX_GAP_BARS        # แท่งหายเกินเท่านี้ (เวลาเทรด) = รายงานเป็น gap
+    drop_zero_volume: bool = DQ_DROP_ZERO_VOLUME
+
+@dataclass
+class QualityReport:
+    """ผลของ clean_bars: จำนวนแถวที่ตัด/ซ่อมและเวลาที่ใช้ (ms) ต่อขั้น + ตาราง gap"""
+    rows_in: int = 0
+    rows_out: int = 0
+    fixed: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    gaps: pd.DataFrame = None
+
+    @property
+    def total_ms(self):
+        return sum(self.timings.values())
+
+    def issues(self):
+        return {name: count for name, count in self.fixed.items() if count}
+
+    def line(self):
+        """สรุปบรรทัดเดียว (สำหรับ log)"""
+        found = ', '.join(f"{name} {count}" for name, count in self.issues().items()) or "clean"
+        return f"{self.rows_in:,} → {self.rows_out:,} bars ({found}) in {self.total_ms:.1f} ms"
+
+    def table(self):
+        """ตารางต่อขั้น: จำนวนที่ตัด/ซ่อม และเวลา"""
+        lines = [f"{'check':<12} {'fixed':>9} {'ms':>9}"]
+        for name, ms in self.timings.items():
+            lines.append(f"{name:<12} {self.fixed.get(name, 0):>9,} {ms:>9.2f}")
+        lines.append(f"{'total':<12} {self.rows_in - self.rows_out:>9,} {self.total_ms:>9.2f}")
+        return '\n'.join(lines)
+
+# ---------- แต่ละขั้น: (df, rules, step) → (df, จำนวนที่ตัด/ซ่อม) ----------
+
+def normalize_columns(data):
+    """DataFrame ดิบ (yfinance / MT5 / ที่มีอยู่แล้ว) → คอลัมน์ BAR_COLUMNS ตามชื่อ ไม่ใช่ตามตำแหน่ง"""
+    df = data
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance ใหม่: (Price, Ticker) - ใช้ level ที่มีชื่อราคา
+        level = next((i for i in range(df.columns.nlevels)
+                      if set(PRICE_COLUMNS) <= {str(v).lower() for v in df.columns.get_level_values(i)}), 0)
+        df = df.set_axis(df.columns.get_level_values(level), axis=1)
+    df = df.set_axis([str(c).strip().lower() for c in df.columns], axis=1)
+    df = df.loc[:, ~df.columns.duplicated()]  # หลาย ticker - ใช้ตัวแรก
+
+    if not any(name in df for name in _TIME_NAMES) and isinstance(df.index, pd.DatetimeIndex):
+        df = df.rename_axis('time').reset_index()
+    time_col = next((name for name in _TIME_NAMES if name in df), None)
+    missing = [c for c in PRICE_COLUMNS if c not in df] + ([] if time_col else ['time'])
+    if missing:
+        raise ValueError(f"Missing columns {missing} (got {list(df.columns)})")
+
+    times = pd.to_datetime(df[time_col])
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    out = pd.DataFrame({'time': times.to_numpy(dtype='datetime64[ns]')})
+    for name in PRICE_COLUMNS:
+        out[name] = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+    volume = pd.to_numeric(df['volume'], errors='coerce').to_numpy(dtype=float) if 'volume' in df else 0.0
+    out['volume'] = np.nan_to_num(volume, nan=0.0) if np.ndim(volume) else volume
+    return out
+
+def _invalid(df, rules, step):
+    prices = df[PRICE_COLUMNS].to_numpy()
+    bad = ~(np.isfinite(prices) & (prices > 0)).all(axis=1)
+    return (df[~bad] if bad.any() else df), int(bad.sum())
+
+def _duplicates(df, rules, step):
+    t = df['time'].to_numpy().view(np.int64)
+    if len(t) > 1 and (t[1:] < t[:-1]).any():
+        order = np.argsort(t, kind='stable')
+        df, t = df.iloc[order], t[order]
+    keep = np.r_[t[1:] != t[:-1], True] if len(t) else np.ones(0, dtype=bool)
+    return (df[keep] if not keep.all() else df), int((~keep).sum())
+
+def _zero_volume(df, rules, step):
+    volume = df['volume'].to_numpy()
+    if not rules.drop_zero_volume or not (volume > 0).any():
+        return df, 0  # FX ของ Yahoo ไม่มี volume ทั้งชุด - ไม่ใช่ข้อผิดพลาด
+    bad = volume <= 0
+    bad[-1:] = False  # แท่งล่าสุดอาจกำลังก่อตัว (ยังไม่มี volume)
+    return (df[~bad] if bad.any() else df), int(bad.sum())
+
+def _ohlc(df, rules, step):
+    o, h, l, c = (df[name].to_numpy() for name in PRICE_COLUMNS)
+    high = np.maximum.reduce([o, h, l, c])
+    low = np.minimum.reduce([o, h, l, c])
+    bad = (high != h) | (low != l)
+    if not bad.any():
+        return df, 0
+    df = df.copy()
+    df['high'], df['low'] = high, low
+    return df, int(bad.sum())
+
+def _spikes(df, rules, step):
+    if len(df) < 3:
+        return df, 0
+    o, h, l, c = (df[name].to_numpy() for name in PRICE_COLUMNS)
+    rng = h - l
+    # range มัธยฐานของแท่งก่อนหน้า (ไม่รวมแท่งตัวเอง) - ต้นชุดใช้มัธยฐานทั้งชุด
+    scale = pd.Series(rng).rolling(rules.spike_window, min_periods=1).median().shift(1).to_numpy()
+    scale = np.where(np.isfinite(scale) & (scale > 0), scale, np.median(rng))
+    limit = rules.spike_mult * np.maximum(scale, np.finfo(float).eps)
+
+    # close กระโดดแล้วกลับในแท่งถัดไป = ราคาผิด (gap จริงไม่กลับ) - แท่งสุดท้ายยังไม่รู้จึงไม่ตัด
+    jump = np.r_[0.0, np.diff(c)]
+    back = np.r_[np.diff(c), 0.0]
+    bad = (np.abs(jump) > limit) & (np.abs(back) > limit) & (np.sign(jump) != np.sign(back))
+
+    # ไส้เทียนยาวผิดปกติ - ตัดให้เหลือ limit จากตัวแท่ง
+    top, bottom = np.maximum(o, c), np.minimum(o, c)
+    high = np.minimum(h, top + limit)
+    low = np.maximum(l, bottom - limit)
+    wick = ~bad & ((high != h) | (low != l))
+    if not (bad.any() or wick.any()):
+        return df, 0
+    df = df.copy()
+    df['high'], df['low'] = high, low
+    return df[~bad], int(bad.sum() + wick.sum())
+
+def _trading_ns(t):
+    """เวลาเทรดสะสม (ns) นับเฉพาะจันทร์-ศุกร์ - เสาร์-อาทิตย์ทั้งหมดเป็นจุดเดียว"""
+    shifted = t + _MONDAY
+    weeks, rest = np.divmod(shifted, _NS_PER_WEEK)
+    return weeks * 5 * _NS_PER_DAY + np.minimum(rest, 5 * _NS_PER_DAY)
+
+def find_gaps(times, step_minutes=None, max_gap_bars=DQ_MAX_GAP_BARS):
+    """
+    ช่วงที่แท่งหายเกิน max_gap_bars (DataFrame: start, end, missing_bars) - ไม่นับเวลาเสาร์-อาทิตย์
+    step_minutes: ความยาวแท่ง (None = มัธยฐานของระยะห่างระหว่างแท่ง)
+    """
+    t = np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+    if len(t) < 2:
+        return pd.DataFrame({'start': [], 'end': [], 'missing_bars': []})
+    elapsed = np.diff(_trading_ns(t))
+    step = step_minutes * _NS_PER_MINUTE if step_minutes else max(np.median(elapsed), 1)
+    missing = elapsed // step - 1
+    at = np.flatnonzero(missing > max_gap_bars)
+    return pd.DataFrame({
+        'start': t[at].view('datetime64[ns]'),
+        'end': t[at + 1].view('datetime64[ns]'),
+        'missing_bars': missing[at].astype(np.int64),
+    })
+
+CHECKS = (
+    ('invalid', _invalid),
+    ('duplicates', _duplicates),
+    ('zero_volume', _zero_volume),
+    ('ohlc', _ohlc),
+    ('spikes', _spikes),
+)
+
+def clean_bars(data, step_minutes=None, rules=None):
+    """
+    ตรวจ + ซ่อมแท่งทั้งชุด - คืน (DataFrame ที่สะอาด, QualityReport)
+
+    Args:
+        data: DataFrame ดิบ (ชื่อคอลัมน์แบบใดก็ได้ที่ normalize_columns รองรับ)
+        step_minutes: ความยาวแท่ง (นาที) สำหรับหา gap (None = เดาจากข้อมูล)
+        rules: QualityRules (None = ตาม config)
+    """
+    rules = rules or QualityRules()
+    report = QualityReport(rows_in=len(data))
+
+    started = time.perf_counter()
+    df = normalize_columns(data)
+    report.timings['columns'] = (time.perf_counter() - started) * 1000
+
+    for name, check in CHECKS:
+        started = time.perf_counter()
+        df, report.fixed[name] = check(df, rules, step_minutes)
+        report.timings[name] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    report.gaps = find_gaps(df['time'].to_numpy(), step_minutes, rules.max_gap_bars)
+    report.fixed['gaps'] = len(report.gaps)
+    report.timings['gaps'] = (time.perf_counter() - started) * 1000
+
+    df = df.reset_index(drop=True)
+    report.rows_out = len(df)
+    return df, report
+
+def log_report(label, report):
+    """log บรรทัดเดียวเมื่อมีการตัด/ซ่อม (ตารางเวลาต่อขั้นอยู่ระดับ debug)"""
+    if report.issues():
+        log.info(f"🧹 {label}: {report.line()}")
+    log.debug(f"🧹 {label}\n{report.table()}")
+
+def inject_defects(df, seed=0, rate=0.001):
+    """ใส่ข้อผิดพลาดแบบเดียวกับข้อมูลจริง (ซ้ำ, volume 0, spike, high/low กลับด้าน, NaN) - ใช้กับ benchmark"""
+    rng = np.random.default_rng(seed)
+    n = len(df)
+    df = df.copy()
+    pick = lambda: rng.choice(np.arange(1, n - 1), size=max(1, int(n * rate)), replace=False)
+    df.loc[pick(), 'volume'] = 0.0
+    spike = pick()
+    df.loc[spike, 'close'] *= 1.2
+    df.loc[spike, 'high'] = df.loc[spike, ['high', 'close']].max(axis=1)
+    swap = pick()
+    df.loc[swap, ['high', 'low']] = df.loc[swap, ['low', 'high']].to_numpy()
+    df.loc[pick(), 'open'] = np.nan
+    return pd.concat([df, df.iloc[pick()]]).sort_values('time', kind='stable').reset_index(drop=True)
+
+def main():
+    from synthetic import generate_bars
+    from config import TF_MAP
+    args = sys.argv[1:]
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    symbol = option("--symbol", "XAUUSD")
+    timeframe = option("--timeframe", "H1")
+    n = int(option("--bars", "100000"))
+
+    raw = inject_defects(generate_bars(symbol, timeframe, n))
+    df, report = clean_bars(raw, TF_MAP[timeframe])
+    print(f"🧹 {symbol} {timeframe}: {report.line()}")
+    print(report.table())
+    if len(report.gaps):
+        print(f"\n⚠️ Gaps:\n{report.gaps.to_string(index=False)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+🎯 Exit Detection
+ตรวจจับการชน SL/TP จาก high/low ของแท่งเทียน (intrabar)
+"""
+
+import numpy as np
+
+# กฎตัดสินเมื่อทั้ง SL และ TP อยู่ในแท่งเดียวกัน
+#   sl_first     - ถือว่าชน SL ก่อน (conservative)
+#   tp_first     - ถือว่าชน TP ก่อน (optimistic)
+#   nearest_open - ระดับที่ใกล้ราคาเปิดแท่งมากกว่าถูกชนก่อน
+EXIT_RULES = ("sl_first", "tp_first", "nearest_open")
+
+EXIT_NONE = 0
+EXIT_SL = 1
+EXIT_TP = 2
+
+def detect_exits(is_buy, sl, tp, bar_open, bar_high, bar_low, rule="sl_first"):
+    """
+    ตรวจหา positions ที่ชน SL/TP ภายในแท่งเดียว (vectorized ทุก position)
+
+    Args:
+        is_buy: bool array - True = BUY, False = SELL
+        sl, tp: array ราคา SL/TP ของแต่ละ position
+        bar_open, bar_high, bar_low: ราคาของแท่งที่ตรวจสอบ
+        rule: หนึ่งใน EXIT_RULES
+
+    Returns:
+        (exit_code, exit_price): EXIT_NONE/EXIT_SL/EXIT_TP และราคาที่ปิด
+        ถ้าแท่งเปิด gap ทะลุระดับไปแล้ว จะปิดที่ราคาเปิดแท่ง
+    """
+    if rule not in EXIT_RULES:
+        raise ValueError(f"Unknown exit rule: {rule} (ใช้ได้: {', '.join(EXIT_RULES)})")
+
+    is_buy = np.asarray(is_buy, dtype=bool)
+    sl = np.asarray(sl, dtype=float)
+    tp = np.asarray(tp, dtype=float)
+
+    sl_hit = np.where(is_buy, bar_low <= sl, bar_high >= sl)
+    tp_hit = np.where(is_buy, bar_high >= tp, bar_low <= tp)
+    sl_gap = np.where(is_buy, bar_open <= sl, bar_open >= sl)
+    tp_gap = np.where(is_buy, bar_open >= tp, bar_open <= tp)
+
+    if rule == "sl_first":
+        sl_wins = np.ones_like(sl_hit)
+    elif rule == "tp_first":
+        sl_wins = np.zeros_like(sl_hit)
+    else:
+        sl_wins = np.abs(bar_open - sl) <= np.abs(tp - bar_open)
+
+    # gap ที่ราคาเปิด ตัดสินลำดับได้แน่นอนโดยไม่ต้องใช้กฎ
+    sl_wins = (sl_wins | sl_gap) & ~tp_gap
+
+    take_sl = sl_hit & (~tp_hit | sl_wins)
+    take_tp = tp_hit & ~take_sl
+
+    exit_code = np.full(sl.shape, EXIT_NONE, dtype=np.int8)
+    exit_code[take_sl] = EXIT_SL
+    exit_code[take_tp] = EXIT_TP
+
+    exit_price = np.where(take_sl, np.where(sl_gap, bar_open, sl),
+                          np.where(take_tp, np.where(tp_gap, bar_open, tp), np.nan))
+    return exit_code, exit_price
+
+def scan_exits(entry_idx, is_buy, sl, tp, bar_open, bar_high, bar_low, rule="sl_first", window=32, max_cells=4_000_000):
+    """
+    หาแท่งแรกหลังแท่งเข้าที่ชน SL/TP ของแต่ละ position (SL/TP คงที่ตลอดอายุ position)
+    ตรวจทุก position พร้อมกันทีละช่วง window แท่ง (2D vectorized) - position ที่ยังไม่ปิด
+    จะถูกตรวจต่อในช่วงถัดไปที่ยาวขึ้นเท่าตัว
+
+    Args:
+        entry_idx: index แท่งที่เข้า (ปิดได้ตั้งแต่แท่งถัดไป)
+        is_buy, sl, tp: array ของแต่ละ position
+        bar_open, bar_high, bar_low: arrays ราคาของทุกแท่ง
+        max_cells: จำนวนช่อง (positions × แท่ง) สูงสุดต่อรอบ - จำกัดหน่วยความจำ
+
+    Returns:
+        (exit_idx, exit_code, exit_price): exit_idx = -1 ถ้ายังไม่ปิดจนถึงแท่งสุดท้าย
+    """
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    sl = np.asarray(sl, dtype=float)
+    tp = np.asarray(tp, dtype=float)
+    n = len(bar_open)
+    m = len(entry_idx)
+    exit_idx = np.full(m, -1, dtype=np.int64)
+    exit_code = np.full(m, EXIT_NONE, dtype=np.int8)
+    exit_price = np.full(m, np.nan)
+
+    pending = np.arange(m)
+    offset = 1
+    while pending.size:
+        pending = pending[entry_idx[pending] + offset < n]
+        step = max(1, max_cells // window)
+        for chunk in (pending[i:i + step] for i in range(0, len(pending), step)):
+            cols = entry_idx[chunk, None] + offset + np.arange(window)
+            valid = cols < n
+            cols = np.minimum(cols, n - 1)
+            shape = cols.shape
+            codes, prices = detect_exits(np.broadcast_to(is_buy[chunk, None], shape),
+                                         np.broadcast_to(sl[chunk, None], shape),
+                                         np.broadcast_to(tp[chunk, None], shape),
+                                         bar_open[cols], bar_high[cols], bar_low[cols], rule)
+            hit = (codes != EXIT_NONE) & valid
+            first = hit.argmax(axis=1)
+            rows = np.flatnonzero(hit[np.arange(len(chunk)), first])
+            done = chunk[rows]
+            exit_idx[done] = cols[rows, first[rows]]
+            exit_code[done] = codes[rows, first[rows]]
+            exit_price[done] = prices[rows, first[rows]]
+        pending = pending[exit_idx[pending] < 0]
+        offset += window
+        window *= 2
+    return exit_idx, exit_code, exit_price
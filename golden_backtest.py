@@ -4,20 +4,40 @@
 ทดสอบ Golden Trend System แบบ comprehensive
 """
 
+import sys
+import json
+from dataclasses import asdict
 import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
 import numpy as np
-from config import SYMBOL, RISK_PERCENT, BACKTEST_DAYS
-from strategy import golden_trend_system
+from config import (SYMBOL, RISK_PERCENT, BACKTEST_DAYS, INTRABAR_EXIT_RULE, STREAM_CHUNK_BARS,
+                    STRATEGY_RULES, RESULTS_CACHE, SESSION_FILTER)
+from strategy import (calculate_indicators, trade_candidates, signal_setups,
+                      setup_directions, DEFAULT_PARAMS, GOLDEN_TREND, GOLDEN_TREND_RULES)
+from signal_gate import SignalGate
+from indicators import IndicatorStream, data_version
+from results_store import ResultsStore, run_key, code_version
+from sessions import get_calendar
+from bar_store import BarStore
+from market_data import download_bars
+from costs import CostModel
+from instruments import instrument
+from analytics import tearsheet, summary, excursions, mae_mfe
+from exits import detect_exits, EXIT_SL, EXIT_TP
 from utils.logger import get_logger
 
 log = get_logger("golden_backtest")
 
+ENGINE = "golden_trend"
+# module ที่มีผลต่อ trades - source เปลี่ยน = key ของ results store เปลี่ยน
+ENGINE_MODULES = ('strategy', 'rules', 'indicators', 'exits', 'signal_gate', 'sessions', 'costs', 'instruments',
+                  'analytics')
+
 class GoldenTrendBacktest:
-    def __init__(self, initial_balance=10000):
+    def __init__(self, initial_balance=10000, costs=None, store=None, symbol=SYMBOL):
         self.initial_balance = initial_balance
+        self.use_symbol(symbol)
+        self.store = store  # ResultsStore (None = ไม่บันทึกผล)
+        self.costs = costs or CostModel.from_config()
         self.balance = initial_balance
         self.equity = initial_balance
         self.trades = []
@@ -25,50 +45,24 @@ class GoldenTrendBacktest:
         self.consecutive_losses = 0
         self.max_consecutive_losses = 0
         
+    def use_symbol(self, symbol):
+        """symbol ที่ backtest - ขนาดสัญญาจาก instruments (ไม่มีในตาราง = ValueError)"""
+        self.symbol = symbol
+        self.instrument = instrument(symbol)
+
     def get_historical_data(self, symbol: str, days: int):
-        """ดึงข้อมูลย้อนหลัง"""
-        try:
-            if symbol == "XAUUSD":
-                yahoo_symbol = "GC=F"
-            elif symbol == "EURUSD":
-                yahoo_symbol = "EURUSD=X"
-            else:
-                yahoo_symbol = f"{symbol}=X"
-            
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days + 50)  # Buffer สำหรับ indicators
-            
-            data = yf.download(yahoo_symbol, start=start_date, end=end_date, interval="1h")
-            
-            if data.empty:
-                return None
-            
-            df = pd.DataFrame()
-            df['time'] = data.index
-            df['open'] = data['Open'].values
-            df['high'] = data['High'].values
-            df['low'] = data['Low'].values
-            df['close'] = data['Close'].values
-            df['volume'] = data.get('Volume', [0] * len(data)).values
-            
-            return df.dropna().reset_index(drop=True)
-            
-        except Exception as e:
-            log.error(f"Error getting data: {e}")
-            return None
+        """ดึงข้อมูลย้อนหลัง H1 (+50 วันสำหรับ indicators) ผ่าน market_data - ผ่านการตรวจ/ซ่อมแท่งแล้ว"""
+        return download_bars(symbol, "H1", days + 50)
 
-    def execute_trade(self, action, entry_price, sl_price, tp_price, lot_size, entry_time):
-        """บันทึกการเทรด"""
+    def execute_trade(self, action, entry_price, sl_price, tp_price, lot_size, entry_time,
+                      exit_price, exit_time, exit_reason, cost_per_lot=0.0, mae=np.nan, mfe=np.nan):
+        """บันทึกการเทรด (ปิดที่ราคาที่ชน SL/TP จริง หักต้นทุนแล้ว) - mae/mfe เป็นหน่วยราคา"""
         multiplier = 1 if action == "BUY" else -1
         
-        # คำนวณ P&L เมื่อปิดที่ TP
-        if action == "BUY":
-            exit_price = tp_price
-        else:
-            exit_price = tp_price
-            
-        # คำนวณ P&L สำหรับ XAUUSD
-        pnl = (exit_price - entry_price) * multiplier * lot_size * 100
+        # P&L ตามขนาดสัญญาของ symbol (หน่วยเดียวกับต้นทุนใน CostModel.per_lot)
+        gross_pnl = self.instrument.usd_per_lot(exit_price - entry_price, exit_price) * multiplier * lot_size
+        costs = cost_per_lot * lot_size
+        pnl = gross_pnl - costs
         
         # อัปเดต balance
         old_balance = self.balance
@@ -84,13 +78,19 @@ class GoldenTrendBacktest:
         # บันทึก trade
         trade = {
             'time': entry_time,
+            'exit_time': exit_time,
             'action': action,
             'entry_price': entry_price,
             'exit_price': exit_price,
             'sl_price': sl_price,
             'tp_price': tp_price,
             'lot_size': lot_size,
+            'gross_pnl': gross_pnl,
+            'costs': costs,
             'pnl': pnl,
+            'exit_reason': exit_reason,
+            'mae': float(mae),
+            'mfe': float(mfe),
             'balance': self.balance,
             'result': 'WIN' if pnl > 0 else 'LOSS'
         }
@@ -104,7 +104,7 @@ class GoldenTrendBacktest:
         print(f"""
 🏆 Golden Trend System Backtest
 ================================
-📊 Symbol: {SYMBOL}
+📊 Symbol: {self.symbol}
 📅 Period: {BACKTEST_DAYS} days
 💰 Initial Balance: ${self.initial_balance:,.2f}
 🛡️ Risk per Trade: {RISK_PERCENT}%
@@ -112,7 +112,7 @@ class GoldenTrendBacktest:
         
         # ดึงข้อมูล
         print("📥 ดาวน์โหลดข้อมูล...")
-        df = self.get_historical_data(SYMBOL, BACKTEST_DAYS)
+        df = self.get_historical_data(self.symbol, BACKTEST_DAYS)
         
         if df is None or len(df) < 200:
             print("❌ ไม่สามารถดึงข้อมูลได้หรือข้อมูลไม่เพียงพอ")
@@ -120,40 +120,267 @@ class GoldenTrendBacktest:
         
         print(f"✅ ข้อมูล: {len(df)} candles ({df['time'].iloc[0].strftime('%Y-%m-%d')} ถึง {df['time'].iloc[-1].strftime('%Y-%m-%d')})")
         
-        # Backtest loop
+        # รันเดิมที่เคยเก็บไว้ (พารามิเตอร์ + ข้อมูลเหมือนกันทุก byte) ไม่ต้องจำลองใหม่
+        # (ยังคำนวณ candidates เพื่อแสดง cost sensitivity ให้เหมือน run ใหม่)
+        data_hash = data_version(df['time'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+                                 df['open'], df['high'], df['low'], df['close'])
+        cached = self.load_cached(data_hash)
+        
+        # คำนวณ indicators, สัญญาณ และจุดชน SL/TP ของทุกแท่งในครั้งเดียว
+        # (EMA/rolling เป็น causal จึงได้ค่าเท่ากับการคำนวณทีละ prefix)
         print("\n🔍 กำลังวิเคราะห์...")
-        signals = 0
+        df = calculate_indicators(df)
+        candidates = trade_candidates(df, exit_rule=INTRABAR_EXIT_RULE)
+        
+        if not cached:
+            self.simulate(df, candidates, verbose=True)
+            self.save_results(data_hash, self.symbol, "H1", df['time'].iloc[0], df['time'].iloc[-1], len(df))
         
-        for i in range(200, len(df)):  # เริ่มจากตำแหน่งที่มี indicator ครบ
+        # แสดงผลลัพธ์
+        self.show_results()
+        self.show_cost_sensitivity(df, candidates)
+
+    def simulate(self, df, candidates, verbose=False):
+        """
+        เดิน position ทีละตัวตามลำดับเวลา (เปิดใหม่ได้เมื่อ position เดิมปิดแล้ว)
+        ต้นทุนต่อ lot ของทุก candidate คำนวณในครั้งเดียวก่อนเข้า loop
+        """
+        times = df['time'].reset_index(drop=True)
+        bar, exit_bar = candidates['bar'], candidates['exit_bar']
+        cost_per_lot = self.costs.per_lot(self.symbol, candidates['is_buy'],
+                                          times.iloc[bar].to_numpy(dtype='datetime64[ns]'),
+                                          times.iloc[exit_bar].to_numpy(dtype='datetime64[ns]'),
+                                          candidates['entry'])['total']
+        # เข้าที่ราคาปิดของแท่งสัญญาณ - MAE/MFE นับจากแท่งถัดไปจนถึงแท่งที่ปิด
+        mae, mfe = excursions(candidates['is_buy'], candidates['entry'], bar + 1, exit_bar,
+                              df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+                              candidates['sl'], candidates['tp'])
+        reasons = {EXIT_SL: 'SL', EXIT_TP: 'TP'}
+        
+        busy_until = -1
+        for k in range(len(bar)):
+            if bar[k] < busy_until:
+                continue  # position เดิมยังเปิดอยู่
+            
             # ตรวจสอบ consecutive losses limit
             if self.consecutive_losses >= 3:
-                continue  # หยุดเทรดหลังขาดทุน 3 ครั้งติด
-                
-            current_data = df.iloc[:i+1].copy()
-            current_price = current_data.iloc[-1]['close']
-            current_time = current_data.iloc[-1]['time']
+                break  # หยุดเทรดหลังขาดทุน 3 ครั้งติด
             
-            # วิเคราะห์ Golden Trend System
-            result = golden_trend_system(current_data, risk_pct=RISK_PERCENT, account_balance=self.balance)
+            entry, sl = candidates['entry'][k], candidates['sl'][k]
+            trade = self.execute_trade(
+                action='BUY' if candidates['is_buy'][k] else 'SELL',
+                entry_price=entry,
+                sl_price=sl,
+                tp_price=candidates['tp'][k],
+                lot_size=self.instrument.position_size(entry, sl, RISK_PERCENT, self.balance),
+                entry_time=times.iloc[bar[k]],
+                exit_price=candidates['exit_price'][k],
+                exit_time=times.iloc[exit_bar[k]],
+                exit_reason=reasons.get(candidates['exit_code'][k], 'END'),
+                cost_per_lot=cost_per_lot[k],
+                mae=mae[k],
+                mfe=mfe[k]
+            )
+            busy_until = exit_bar[k]
             
-            if result['signal'] in ['BUY', 'SELL']:
-                signals += 1
+            if verbose:
+                print(f"🎯 {trade['action']} @ ${trade['entry_price']:.2f} → {trade['exit_reason']} "
+                      f"| P&L: ${trade['pnl']:.2f} | Balance: ${trade['balance']:.2f}")
+        return self.trades
+
+    def simulate_stream(self, store, chunk_size=STREAM_CHUNK_BARS, params=None, warmup=200):
+        """
+        Backtest แบบ streaming จาก BarStore ทีละ chunk - หน่วยความจำคงที่ไม่ว่าข้อมูลจะยาวแค่ไหน
+        indicators และ position ที่เปิดค้างต่อเนื่องข้าม chunk ผลเท่ากับ simulate() บนข้อมูลทั้งชุด
+        """
+        stream = IndicatorStream(params or DEFAULT_PARAMS)
+        gate = SignalGate()
+        total = len(store)
+        reasons = {EXIT_SL: 'SL', EXIT_TP: 'TP'}
+        self.use_symbol(store.symbol or self.symbol)
+        symbol = self.symbol
+        position = None  # position ที่เปิดค้าง (bar = index ทั้งชุด)
+        offset = 0
+        last_time = last_close = None
+        
+        def close(position, exit_price, exit_time, exit_reason):
+            cost = self.costs.per_lot(symbol, [position['is_buy']], [np.datetime64(position['time'])],
+                                      [np.datetime64(exit_time)], [position['entry']])['total'][0]
+            mae, mfe = mae_mfe(position['is_buy'], position['entry'], position['highest'], position['lowest'],
+                               position['sl'], position['tp'])
+            trade = self.execute_trade(
+                action='BUY' if position['is_buy'] else 'SELL',
+                entry_price=position['entry'],
+                sl_price=position['sl'],
+                tp_price=position['tp'],
+                lot_size=self.instrument.position_size(position['entry'], position['sl'], RISK_PERCENT,
+                                                        position['balance']),
+                entry_time=position['time'],
+                exit_price=exit_price,
+                exit_time=exit_time,
+                exit_reason=exit_reason,
+                cost_per_lot=cost,
+                mae=mae,
+                mfe=mfe
+            )
+            log.debug(f"{trade['action']} @ {trade['entry_price']:.2f} → {exit_reason} | P&L: {trade['pnl']:.2f}")
+        
+        for chunk in store.chunks(chunk_size):
+            for name, values in stream.update(chunk['high'], chunk['low'], chunk['close']).items():
+                chunk[name] = values
+            setup_idx = signal_setups(chunk)
+            fired = gate.filter(setup_directions(setup_idx))
+            
+            bar_open = chunk['open'].to_numpy()
+            high, low = chunk['high'].to_numpy(), chunk['low'].to_numpy()
+            close_prices, atr = chunk['close'].to_numpy(), chunk['atr'].to_numpy()
+            times = chunk['time']
+            bars = offset + np.arange(len(chunk))
+            candidates = np.flatnonzero(fired & (bars >= warmup) & (bars < total - 1) & np.isfinite(atr))
+            
+            free_from = 0  # แท่งแรกใน chunk ที่เปิด position ใหม่ได้
+            stopped = False
+            while True:
+                if position is not None:
+                    start = max(position['bar'] + 1 - offset, 0)
+                    size = len(chunk) - start
+                    codes, prices = detect_exits(np.full(size, position['is_buy']), np.full(size, position['sl']),
+                                                 np.full(size, position['tp']), bar_open[start:], high[start:],
+                                                 low[start:], INTRABAR_EXIT_RULE)
+                    hits = np.flatnonzero(codes)
+                    stop = start + hits[0] + 1 if hits.size else len(chunk)
+                    if stop > start:
+                        position['highest'] = max(position['highest'], high[start:stop].max())
+                        position['lowest'] = min(position['lowest'], low[start:stop].min())
+                    if not hits.size:
+                        break  # ยังไม่ปิด - ต่อใน chunk ถัดไป
+                    j = start + hits[0]
+                    close(position, prices[hits[0]], times.iloc[j], reasons[codes[hits[0]]])
+                    position = None
+                    free_from = j
+                
+                candidates = candidates[candidates >= free_from]
+                if not candidates.size:
+                    break
                 
-                # Execute trade
-                trade = self.execute_trade(
-                    action=result['signal'],
-                    entry_price=result['entry_price'],
-                    sl_price=result['sl_price'],
-                    tp_price=result['tp_price'],
-                    lot_size=result['lot_size'],
-                    entry_time=current_time
-                )
+                # ตรวจสอบ consecutive losses limit
+                if self.consecutive_losses >= 3:
+                    stopped = True
+                    break  # หยุดเทรดหลังขาดทุน 3 ครั้งติด
                 
-                print(f"🎯 {trade['action']} @ ${trade['entry_price']:.2f} | P&L: ${trade['pnl']:.2f} | Balance: ${trade['balance']:.2f}")
+                k = candidates[0]
+                setup = GOLDEN_TREND.setups[setup_idx[k]]
+                direction = 1 if setup.signal == 'BUY' else -1
+                entry = close_prices[k]
+                position = {
+                    'bar': offset + k,
+                    'time': times.iloc[k],
+                    'is_buy': direction > 0,
+                    'entry': entry,
+                    'sl': entry - direction * setup.sl_atr * atr[k],
+                    'tp': entry + direction * setup.tp_atr * atr[k],
+                    'balance': self.balance,
+                    'highest': -np.inf,   # ราคาสูงสุด/ต่ำสุดระหว่างถือ (สำหรับ MAE/MFE)
+                    'lowest': np.inf,
+                }
+                free_from = k + 1
+            
+            offset += len(chunk)
+            last_time, last_close = times.iloc[-1], close_prices[-1]
+            if stopped:
+                break
         
-        # แสดงผลลัพธ์
+        if position is not None and last_time is not None and not stopped:
+            close(position, last_close, last_time, 'END')
+        return self.trades
+
+    def run_stream_backtest(self, path, chunk_size=STREAM_CHUNK_BARS):
+        """รัน backtest แบบ streaming จาก BarStore"""
+        store = BarStore(path)
+        self.use_symbol(store.symbol or self.symbol)
+        print(f"""
+🏆 Golden Trend System Backtest (streaming)
+===========================================
+📊 Store: {path} ({self.symbol}, {len(store):,} bars)
+📦 Chunk: {chunk_size:,} bars
+💰 Initial Balance: ${self.initial_balance:,.2f}
+🛡️ Risk per Trade: {RISK_PERCENT}%
+        """)
+        data_hash = store.fingerprint()
+        if self.load_cached(data_hash):
+            self.show_results()
+            return
+        
+        self.simulate_stream(store, chunk_size)
+        records = store.records()
+        start, end = (pd.Timestamp(int(records['time'][i])) for i in (0, -1)) if len(records) else (None, None)
+        self.save_results(data_hash, self.symbol, store.meta['timeframe'], start, end, len(store))
         self.show_results()
 
+    def run_params(self):
+        """พารามิเตอร์ทั้งหมดที่มีผลต่อผลลัพธ์ (ใช้เป็น key ของ results store)"""
+        if STRATEGY_RULES:
+            with open(STRATEGY_RULES, encoding='utf-8') as f:
+                rules = json.load(f)
+        else:
+            rules = GOLDEN_TREND_RULES
+        return {
+            'code_version': code_version(__file__, *(sys.modules[name].__file__ for name in ENGINE_MODULES)),
+            'symbol': self.symbol,
+            'initial_balance': self.initial_balance,
+            'risk_pct': RISK_PERCENT,
+            'exit_rule': INTRABAR_EXIT_RULE,
+            'signal_gate': asdict(SignalGate().rules),
+            'session_filter': get_calendar().settings() if SESSION_FILTER else False,
+            'max_consecutive_losses': 3,
+            'indicators': asdict(DEFAULT_PARAMS),
+            'rules': rules,
+            'costs': {
+                'enabled': self.costs.enabled,
+                'rollover_hour': self.costs.rollover_hour,
+                'table': {symbol: asdict(c) for symbol, c in sorted(self.costs.table.items())},
+            },
+        }
+    
+    def load_cached(self, data_hash):
+        """โหลดผลจาก results store ถ้าเคยรันด้วยพารามิเตอร์และข้อมูลชุดนี้แล้ว - คืน True ถ้าเจอ"""
+        if self.store is None or not RESULTS_CACHE:
+            return False
+        run_id = run_key(ENGINE, self.run_params(), data_hash)
+        run = self.store.get(run_id)
+        if run is None:
+            return False
+        
+        self.trades = self.store.load_trades(run_id).to_dict('records')
+        self.balance = run['final_balance']
+        streak = 0
+        for trade in self.trades:
+            streak = 0 if trade['pnl'] > 0 else streak + 1
+            self.max_consecutive_losses = max(self.max_consecutive_losses, streak)
+        self.consecutive_losses = streak
+        print(f"♻️ ใช้ผลจาก results store (run {run_id[:12]}, บันทึกเมื่อ {run['created_at']})")
+        return True
+    
+    def save_results(self, data_hash, symbol, timeframe, start_time, end_time, bars):
+        """บันทึก run ลง results store"""
+        if self.store is None:
+            return
+        params = self.run_params()
+        self.store.save(run_key(ENGINE, params, data_hash), ENGINE, params, data_hash, self.trades,
+                        initial_balance=self.initial_balance, symbol=symbol, timeframe=timeframe,
+                        start_time=start_time, end_time=end_time, bars=bars)
+    
+    def show_cost_sensitivity(self, df, candidates, spread_multipliers=(0.0, 0.5, 1.0, 1.5, 2.0)):
+        """Net P&L เมื่อ spread/slippage เปลี่ยน - ใช้ candidates เดิม รันแค่ loop จำลองใหม่"""
+        print("\n💸 Cost Sensitivity (ตัวคูณ spread + slippage):")
+        for m in spread_multipliers:
+            run = GoldenTrendBacktest(self.initial_balance, self.costs.scaled(spread=m, slippage=m),
+                                      symbol=self.symbol)
+            run.simulate(df, candidates)
+            stats = summary(run.trades, self.initial_balance)
+            print(f"   • x{m:.1f}: {stats['trades']} trades, Win {stats['win_rate']:.1f}%, "
+                  f"Net ${run.balance - self.initial_balance:+,.2f}")
+
     def show_results(self):
         """แสดงผลลัพธ์"""
         if not self.trades:
@@ -164,43 +391,31 @@ class GoldenTrendBacktest:
             print("   - ตลาดไม่มี trend ที่ชัดเจน")
             return
         
-        # คำนวณสถิติ
-        total_trades = len(self.trades)
-        winning_trades = len([t for t in self.trades if t['pnl'] > 0])
-        losing_trades = total_trades - winning_trades
-        win_rate = (winning_trades / total_trades) * 100
-        
-        total_profit = sum([t['pnl'] for t in self.trades if t['pnl'] > 0])
-        total_loss = sum([t['pnl'] for t in self.trades if t['pnl'] < 0])
+        # คำนวณสถิติทั้งชุดแบบ vectorized (analytics.tearsheet)
+        sheet = tearsheet(self.trades, self.initial_balance)
+        stats = sheet['summary']
+        win_rate, profit_factor, max_drawdown = stats['win_rate'], stats['profit_factor'], stats['max_drawdown']
         net_profit = self.balance - self.initial_balance
         
-        profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
-        
-        # Max Drawdown
-        peak = self.initial_balance
-        max_drawdown = 0
-        for trade in self.trades:
-            if trade['balance'] > peak:
-                peak = trade['balance']
-            drawdown = (peak - trade['balance']) / peak * 100
-            max_drawdown = max(max_drawdown, drawdown)
-        
         print(f"""
 🏆 Golden Trend System Results
 ==============================
 📊 การเทรด:
-   • Total Trades: {total_trades}
-   • Winning: {winning_trades} ({win_rate:.1f}%)
-   • Losing: {losing_trades} ({100-win_rate:.1f}%)
+   • Total Trades: {stats['trades']}
+   • Winning: {stats['wins']} ({win_rate:.1f}%)
+   • Losing: {stats['losses']} ({100-win_rate:.1f}%)
 
 💰 ผลกำไร:
    • Initial Balance: ${self.initial_balance:,.2f}
    • Final Balance: ${self.balance:,.2f}
    • Net P&L: ${net_profit:,.2f} ({(net_profit/self.initial_balance)*100:+.2f}%)
    • Profit Factor: {profit_factor:.2f}
+   • Expectancy: ${stats['expectancy']:+,.2f} ต่อ trade (Avg Win ${stats['avg_win']:,.2f} / Avg Loss ${stats['avg_loss']:,.2f})
+   • Costs: ${stats['total_costs']:,.2f} (spread/commission/swap/slippage)
 
 📉 ความเสี่ยง:
-   • Max Drawdown: {max_drawdown:.2f}%
+   • Max Drawdown: {max_drawdown:.2f}% ({stats['max_drawdown_trades']} trades ก่อนทำ high ใหม่)
+   • Sharpe: {stats['sharpe']:.2f} | Sortino: {stats['sortino']:.2f} (รายวัน, annualized)
    • Max Consecutive Losses: {self.max_consecutive_losses}
 
 🎯 ประเมินผล:
@@ -223,44 +438,43 @@ class GoldenTrendBacktest:
             print(f"   ❌ Max Drawdown: ไม่ผ่านเกณฑ์ ({max_drawdown:.2f}% > 12%)")
         
         # สถิติเพิ่มเติม
-        if len(self.trades) > 0:
-            # คำนวณสถิติ trades ต่อวัน
-            first_trade_date = self.trades[0]['time']
-            last_trade_date = self.trades[-1]['time']
-            trading_days = (last_trade_date - first_trade_date).days + 1
-            trades_per_day = total_trades / trading_days
-            
-            # กำไรเฉลี่ยต่อ trade
-            avg_profit = net_profit / total_trades
-            
-            print(f"\n📊 สถิติเพิ่มเติม:")
-            print(f"   • Trading Period: {trading_days} วัน")
-            print(f"   • Trades per Day: {trades_per_day:.1f}")
-            print(f"   • Avg Profit per Trade: ${avg_profit:.2f}")
-            print(f"   • Total Profit: ${total_profit:,.2f}")
-            print(f"   • Total Loss: ${abs(total_loss):,.2f}")
-            
-            # แสดง trades รายเดือน
-            monthly_trades = {}
-            for trade in self.trades:
-                month_key = trade['time'].strftime('%Y-%m')
-                if month_key not in monthly_trades:
-                    monthly_trades[month_key] = {'count': 0, 'profit': 0}
-                monthly_trades[month_key]['count'] += 1
-                monthly_trades[month_key]['profit'] += trade['pnl']
-            
-            print(f"\n📅 สถิติรายเดือน:")
-            for month, stats in sorted(monthly_trades.items()):
-                print(f"   • {month}: {stats['count']} trades, ${stats['profit']:+,.2f}")
+        print(f"\n📊 สถิติเพิ่มเติม:")
+        print(f"   • Trading Period: {stats['trading_days']} วัน")
+        print(f"   • Trades per Day: {stats['trades_per_day']:.1f}")
+        print(f"   • Avg Profit per Trade: ${net_profit / stats['trades']:.2f}")
+        print(f"   • Total Profit: ${stats['gross_profit']:,.2f}")
+        print(f"   • Total Loss: ${abs(stats['gross_loss']):,.2f}")
+        print(f"   • Holding Time: เฉลี่ย {stats['avg_hours']:.1f} ชม. (ชนะ {stats['avg_win_hours']:.1f} / "
+              f"แพ้ {stats['avg_loss_hours']:.1f}), นานสุด {stats['max_hours']:.1f} ชม.")
+        if 'avg_mae' in stats and not np.isnan(stats['avg_mae']):
+            print(f"   • MAE/MFE: เฉลี่ย ${stats['avg_mae']:.2f} / ${stats['avg_mfe']:.2f} "
+                  f"(trade ชนะถอยเฉลี่ย ${stats['avg_win_mae']:.2f}, trade แพ้เคยบวกเฉลี่ย ${stats['avg_loss_mfe']:.2f})")
+        
+        print(f"\n📅 สถิติรายเดือน:")
+        for row in sheet['month'].itertuples():
+            print(f"   • {row.Index}: {row.trades} trades, ${row.pnl:+,.2f}")
         
-            print(f"\n📋 Trade ล่าสุด 5 รายการ:")
-            for trade in self.trades[-5:]:
-                result_emoji = "✅" if trade['pnl'] > 0 else "❌"
-                print(f"   {result_emoji} {trade['time'].strftime('%m-%d %H:%M')} {trade['action']} ${trade['entry_price']:.2f} → ${trade['pnl']:+.2f}")
+        print(f"\n📋 Trade ล่าสุด 5 รายการ:")
+        for trade in self.trades[-5:]:
+            result_emoji = "✅" if trade['pnl'] > 0 else "❌"
+            print(f"   {result_emoji} {trade['time'].strftime('%m-%d %H:%M')} {trade['action']} ${trade['entry_price']:.2f} → ${trade['pnl']:+.2f}")
 
 def main():
-    backtest = GoldenTrendBacktest(initial_balance=10000)
-    backtest.run_backtest()
+    # --no-store = ไม่บันทึก/ไม่ใช้ผลจาก results store
+    store = None if "--no-store" in sys.argv else ResultsStore()
+    backtest = GoldenTrendBacktest(initial_balance=10000, store=store)
+    
+    # python golden_backtest.py --store data/XAUUSD_M1 [--chunk 100000]
+    if "--store" in sys.argv:
+        path = sys.argv[sys.argv.index("--store") + 1]
+        chunk = int(sys.argv[sys.argv.index("--chunk") + 1]) if "--chunk" in sys.argv else STREAM_CHUNK_BARS
+        backtest.run_stream_backtest(path, chunk)
+    else:
+        backtest.run_backtest()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--profile" in sys.argv:
+        from profiler import run_profiled
+        run_profiled(main, "golden_backtest")
+    else:
+        main()
\ No newline at end of file
@@ -5,28 +5,51 @@ Live Demo Trading ด้วย Golden Trend System
 """
 
 import time
-import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-from config import SYMBOL, TIMEFRAME, DAILY_PROFIT_TARGET, DAILY_DRAWDOWN_LIMIT, MAX_POSITIONS, RISK_PERCENT
-from strategy import golden_trend_system
+import numpy as np
+from dataclasses import replace
+from datetime import datetime, timezone
+from config import SYMBOL, TIMEFRAME, INTRABAR_EXIT_RULE, MARKET_BUS, SESSION_FILTER, WARM_START_DAYS, ConfigWatcher
+from market_data import download_bars, merge_bars
+from market_bus import MarketBus
+from strategy import golden_trend_system, DEFAULT_PARAMS
+from signal_gate import SignalGate, SIGNAL_DIRECTION
+from exits import detect_exits, EXIT_SL, EXIT_TP
+from sessions import get_calendar
+from trade_management import manage_stops, DEFAULT_RULES as MANAGEMENT_RULES
+from costs import CostModel
+from instruments import instrument
+from analytics import summary
+from service import install_shutdown, save_state, load_state
 from utils.logger import get_logger
-import signal
 import sys
 
 log = get_logger("golden_live_demo")
 
 class GoldenTrendLiveDemo:
-    def __init__(self, initial_balance=10000):
+    STATE_NAME = "golden_live_demo"
+
+    def __init__(self, initial_balance=10000, headless=False):
         self.initial_balance = initial_balance
+        self.headless = headless  # รันใต้ service.py: warm start จาก state, crash = exit code ≠ 0
         self.balance = initial_balance
         self.daily_start_balance = initial_balance
         self.equity = initial_balance
         self.open_positions = []
         self.closed_trades = []
         self.running = True
-        self.last_signal_time = None
+        self.bus = None
+        self.bars = None  # แท่งล่าสุดที่ดึงมาแล้ว (รอบถัดไปดาวน์โหลดเฉพาะช่วงท้าย)
+        self.instrument = instrument(SYMBOL)  # ขนาดสัญญา - ไม่มีในตาราง = ValueError
+        self.gate = SignalGate()  # edge + cooldown เป็นจำนวนแท่ง (กฎเดียวกับ backtest)
+        self.last_bar_time = None  # เวลาของแท่งปิดล่าสุดที่ตรวจ SL/TP แล้ว
         self.consecutive_losses = 0
+        self.costs = CostModel.from_config()
+        
+        # ค่าที่ปรับได้ระหว่างรัน - แก้ .env แล้วมีผลในรอบถัดไปโดยไม่ต้อง restart
+        self.config = ConfigWatcher()
+        self.settings = self.config.current
+        if self.config.last_error:
+            log.warning(f"⚠️ {self.config.last_error} - ใช้ค่าเริ่มต้นแทน")
         
         # Stats
         self.total_trades = 0
@@ -38,73 +61,57 @@ class GoldenTrendLiveDemo:
 💰 Initial Balance: ${self.initial_balance:,.2f}
 📊 Symbol: {SYMBOL}
 ⏰ Timeframe: {TIMEFRAME}
-🎯 Daily Target: +{DAILY_PROFIT_TARGET}% | Limit: -{DAILY_DRAWDOWN_LIMIT}%
-🛡️ Risk per Trade: {RISK_PERCENT}%
-📦 Max Positions: {MAX_POSITIONS}
+🎯 Daily Target: +{self.settings.DAILY_PROFIT_TARGET}% | Limit: -{self.settings.DAILY_DRAWDOWN_LIMIT}%
+🛡️ Risk per Trade: {self.settings.RISK_PERCENT}%
+📦 Max Positions: {self.settings.MAX_POSITIONS}
         """)
 
     def get_live_data(self, days_back=60):
-        """ดึงข้อมูลล่าสุด"""
-        try:
-            if SYMBOL == "XAUUSD":
-                yahoo_symbol = "GC=F"
-            elif SYMBOL == "EURUSD":
-                yahoo_symbol = "EURUSD=X"
-            else:
-                yahoo_symbol = f"{SYMBOL}=X"
-
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            
-            # ใช้ interval ตาม TIMEFRAME
-            if TIMEFRAME in ["M1", "M5", "M15", "M30"]:
-                interval = "5m" if TIMEFRAME in ["M1", "M5"] else "15m" if TIMEFRAME == "M15" else "30m"
-            elif TIMEFRAME == "H1":
-                interval = "1h"
-            elif TIMEFRAME == "H4":
-                interval = "1h"  # จะ resample เป็น 4h
-            else:  # D1
-                interval = "1d"
-            
-            data = yf.download(yahoo_symbol, start=start_date, end=end_date, interval=interval)
-            
-            if data.empty:
-                return None
-            
-            df = data.reset_index()
-            df.columns = ['time', 'open', 'high', 'low', 'close', 'volume']
-            
-            # Resample เป็น H4 ถ้าจำเป็น
-            if TIMEFRAME == "H4" and interval == "1h":
-                df = df.set_index('time')
-                df_4h = df.resample('4H').agg({
-                    'open': 'first',
-                    'high': 'max',
-                    'low': 'min',
-                    'close': 'last',
-                    'volume': 'sum'
-                }).dropna().reset_index()
-                df = df_4h
-            
-            return df.dropna()
+        """ดึงข้อมูลล่าสุด (จาก market bus ถ้าตั้ง MARKET_BUS ไว้ ไม่งั้นดาวน์โหลดเอง)"""
+        if MARKET_BUS:
+            df = self.read_market_bus()
+            if df is not None:
+                return df
+        
+        # มีแท่งอยู่แล้ว (รอบก่อนหรือ warm start) - ดาวน์โหลดแค่ WARM_START_DAYS ล่าสุดแล้วต่อท้าย
+        # ถ้าช่วงใหม่ไม่ต่อกับแท่งเดิม (หยุดไปนาน) ค่อยดาวน์โหลดเต็ม
+        if self.bars is not None and len(self.bars) >= 200:
+            fresh = download_bars(SYMBOL, TIMEFRAME, WARM_START_DAYS)
+            if fresh is not None and len(fresh) and fresh['time'].iloc[0] <= self.bars['time'].iloc[-1]:
+                self.bars = merge_bars(self.bars, fresh, keep=len(self.bars))
+                return self.bars
         
+        df = download_bars(SYMBOL, TIMEFRAME, days_back)
+        if df is not None:
+            self.bars = df.reset_index(drop=True)
+        return df
+
+    def read_market_bus(self):
+        """อ่านแท่งล่าสุดจาก shared memory ของ data feeder"""
+        try:
+            if self.bus is None:
+                self.bus = MarketBus.attach(MARKET_BUS)
+                log.info(f"📡 Attached to market bus '{MARKET_BUS}'")
+            return self.bus.snapshot()
+        except FileNotFoundError:
+            log.warning(f"Market bus '{MARKET_BUS}' not found - downloading directly")
         except Exception as e:
-            log.error(f"Error getting data: {e}")
-            return None
+            log.error(f"Error reading market bus: {e}")
+        return None
 
-    def simulate_trade(self, signal_data):
+    def simulate_trade(self, signal_data, bar_time=None):
         """จำลองการเทรด"""
         if signal_data['signal'] == 'HOLD':
             return
             
         # ตรวจสอบ max positions
-        if len(self.open_positions) >= MAX_POSITIONS:
-            log.info(f"Max positions reached ({MAX_POSITIONS})")
+        if len(self.open_positions) >= self.settings.MAX_POSITIONS:
+            log.info(f"Max positions reached ({self.settings.MAX_POSITIONS})")
             return
             
         # ตรวจสอบ consecutive losses
-        if self.consecutive_losses >= 3:
-            log.warning("3 consecutive losses - pausing trading")
+        if self.consecutive_losses >= self.settings.MAX_CONSECUTIVE_LOSSES:
+            log.warning(f"{self.consecutive_losses} consecutive losses - pausing trading")
             return
         
         # สร้าง position ใหม่
@@ -116,55 +123,135 @@ class GoldenTrendLiveDemo:
             'tp_price': signal_data['tp_price'],
             'lot_size': signal_data['lot_size'],
             'entry_time': datetime.now(),
-            'current_price': signal_data['entry_price']
+            'entry_utc': datetime.now(timezone.utc).replace(tzinfo=None),
+            'entry_bar_time': bar_time,
+            'current_price': signal_data['entry_price'],
+            'atr': signal_data.get('atr'),
+            'best_price': signal_data['entry_price'],
+            'partial_done': False
         }
         
         self.open_positions.append(position)
         log.info(f"📈 {signal_data['signal']} @ ${signal_data['entry_price']:.2f} | Lot: {signal_data['lot_size']}")
         log.info(f"🛑 SL: ${signal_data['sl_price']:.2f} | 💰 TP: ${signal_data['tp_price']:.2f}")
 
-    def update_positions(self, current_price):
-        """อัปเดต positions และปิดที่ถึง SL/TP"""
-        closed_positions = []
-        
-        for position in self.open_positions[:]:
-            position['current_price'] = current_price
+    def update_positions(self, df):
+        """อัปเดต positions และปิดที่ถึง SL/TP โดยใช้ high/low ของทุกแท่งตั้งแต่รอบก่อน"""
+        times = df['time']
+        forming_idx = len(df) - 1
+
+        # ใช้เฉพาะแท่งที่ปิดใหม่หลังการตรวจครั้งก่อน + แท่งที่กำลังก่อตัว
+        if self.last_bar_time is None:
+            start = forming_idx
+        else:
+            start = int(times.searchsorted(self.last_bar_time, side='right'))
+
+        for i in range(start, len(df)):
+            if not self.open_positions:
+                break
+            bar = df.iloc[i]
+            self.check_bar_exits(bar, use_range=True)
             
-            # คำนวณ P&L
-            if position['type'] == 'BUY':
-                pnl = (current_price - position['entry_price']) * position['lot_size'] * 100
-                # ตรวจสอบ SL/TP
-                if current_price <= position['sl_price']:
-                    # Hit SL
-                    self.close_position(position, position['sl_price'], "Stop Loss")
-                    closed_positions.append(position)
-                elif current_price >= position['tp_price']:
-                    # Hit TP
-                    self.close_position(position, position['tp_price'], "Take Profit")
-                    closed_positions.append(position)
-            else:  # SELL
-                pnl = (position['entry_price'] - current_price) * position['lot_size'] * 100
-                # ตรวจสอบ SL/TP
-                if current_price >= position['sl_price']:
-                    # Hit SL
-                    self.close_position(position, position['sl_price'], "Stop Loss")
-                    closed_positions.append(position)
-                elif current_price <= position['tp_price']:
-                    # Hit TP
-                    self.close_position(position, position['tp_price'], "Take Profit")
-                    closed_positions.append(position)
+            # ปรับ trailing/break-even/partial TP เฉพาะแท่งที่ปิดแล้ว
+            if i < forming_idx:
+                self.manage_positions(bar)
+
+        # position ที่เข้าในแท่งปัจจุบัน ตรวจด้วยราคาปิดล่าสุดเท่านั้น
+        # (high/low ของแท่งนี้รวมราคาก่อนเข้าออเดอร์)
+        if self.open_positions:
+            self.check_bar_exits(df.iloc[forming_idx], use_range=False)
+
+        current_price = df.iloc[forming_idx]['close']
+        for position in self.open_positions:
+            position['current_price'] = current_price
+
+        if forming_idx > 0:
+            self.last_bar_time = times.iloc[forming_idx - 1]
+
+    def check_bar_exits(self, bar, use_range=True):
+        """ตรวจ SL/TP ของทุก position กับแท่งเดียว"""
+        bar_time = bar['time']
+        if use_range:
+            candidates = [p for p in self.open_positions
+                          if p.get('entry_bar_time') is None or p['entry_bar_time'] < bar_time]
+            bar_open, bar_high, bar_low = bar['open'], bar['high'], bar['low']
+        else:
+            candidates = [p for p in self.open_positions
+                          if p.get('entry_bar_time') is not None and p['entry_bar_time'] >= bar_time]
+            bar_open = bar_high = bar_low = bar['close']
+
+        if not candidates:
+            return
+
+        is_buy = np.array([p['type'] == 'BUY' for p in candidates])
+        sl = np.array([p['sl_price'] for p in candidates])
+        tp = np.array([p['tp_price'] for p in candidates])
+        exit_code, exit_price = detect_exits(is_buy, sl, tp, bar_open, bar_high, bar_low,
+                                             rule=INTRABAR_EXIT_RULE)
+
+        for position, code, price in zip(candidates, exit_code, exit_price):
+            if code == EXIT_SL:
+                self.close_position(position, float(price), "Stop Loss")
+            elif code == EXIT_TP:
+                self.close_position(position, float(price), "Take Profit")
+            else:
+                continue
+            self.open_positions.remove(position)
+
+    def manage_positions(self, bar):
+        """ATR trailing stop, break-even และ partial TP ของทุก position (vectorized ต่อแท่ง)"""
+        if not MANAGEMENT_RULES.enabled:
+            return
+        
+        bar_time = bar['time']
+        candidates = [p for p in self.open_positions
+                      if p.get('atr') and (p.get('entry_bar_time') is None or p['entry_bar_time'] < bar_time)]
+        if not candidates:
+            return
+        
+        result = manage_stops(
+            is_buy=[p['type'] == 'BUY' for p in candidates],
+            entry=[p['entry_price'] for p in candidates],
+            sl=[p['sl_price'] for p in candidates],
+            atr=[p['atr'] for p in candidates],
+            best=np.array([p['best_price'] for p in candidates], dtype=float),
+            bar_high=bar['high'],
+            bar_low=bar['low'],
+            partial_done=[p['partial_done'] for p in candidates],
+            rules=MANAGEMENT_RULES,
+        )
         
-        # ลบ positions ที่ปิดแล้ว
-        for pos in closed_positions:
-            if pos in self.open_positions:
-                self.open_positions.remove(pos)
+        for position, new_sl, best, partial, partial_price in zip(
+                candidates, result['sl'], result['best'], result['partial'], result['partial_price']):
+            position['best_price'] = float(best)
+            if partial:
+                self.close_partial(position, float(partial_price))
+            if new_sl != position['sl_price']:
+                log.info(f"🔧 {position['id']} SL: ${position['sl_price']:.2f} → ${new_sl:.2f}")
+                position['sl_price'] = float(new_sl)
+
+    def close_partial(self, position, close_price):
+        """ปิดบางส่วน (partial take-profit) ตาม PARTIAL_TP_FRACTION"""
+        position['partial_done'] = True
+        close_lot = round(position['lot_size'] * MANAGEMENT_RULES.partial_fraction, 2)
+        if close_lot < 0.01 or close_lot >= position['lot_size']:
+            return
+        
+        self.close_position(dict(position, lot_size=close_lot), close_price, "Partial TP")
+        position['lot_size'] = round(position['lot_size'] - close_lot, 2)
 
     def close_position(self, position, close_price, reason):
-        """ปิด position"""
-        if position['type'] == 'BUY':
-            pnl = (close_price - position['entry_price']) * position['lot_size'] * 100
-        else:
-            pnl = (position['entry_price'] - close_price) * position['lot_size'] * 100
+        """ปิด position (หัก spread/commission/swap/slippage ตาม cost model)"""
+        direction = 1 if position['type'] == 'BUY' else -1
+        gross_pnl = self.instrument.usd_per_lot(close_price - position['entry_price'], close_price) \
+            * direction * position['lot_size']
+        
+        costs = self.costs.per_lot(SYMBOL, [position['type'] == 'BUY'],
+                                   [np.datetime64(position['entry_utc'])],
+                                   [np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None))],
+                                   [position['entry_price']])
+        trade_costs = float(costs['total'][0]) * position['lot_size']
+        pnl = gross_pnl - trade_costs
         
         self.balance += pnl
         self.daily_pnl += pnl
@@ -175,6 +262,8 @@ class GoldenTrendLiveDemo:
             'entry_price': position['entry_price'],
             'close_price': close_price,
             'lot_size': position['lot_size'],
+            'gross_pnl': gross_pnl,
+            'costs': trade_costs,
             'pnl': pnl,
             'entry_time': position['entry_time'],
             'close_time': datetime.now(),
@@ -194,71 +283,167 @@ class GoldenTrendLiveDemo:
 
     def show_status(self, current_price, signal_info):
         """แสดงสถานะปัจจุบัน"""
-        win_rate = (self.winning_trades / self.total_trades * 100) if self.total_trades > 0 else 0
+        stats = summary(self.closed_trades, self.initial_balance)
         daily_pnl_pct = (self.daily_pnl / self.daily_start_balance * 100)
         
         print(f"""
 ⏰ {datetime.now().strftime('%H:%M:%S')} | 💰 ${current_price:.2f}
 💼 Balance: ${self.balance:,.2f} | 📊 Daily P&L: {daily_pnl_pct:+.2f}%
-📈 Trades: {self.total_trades} | 🎯 Win Rate: {win_rate:.1f}%
+📈 Trades: {stats['trades']} | 🎯 Win Rate: {stats['win_rate']:.1f}% | ⚖️ PF: {stats['profit_factor']:.2f}
+💵 Expectancy: ${stats.get('expectancy', 0.0):+,.2f} | 📉 Max DD: {stats['max_drawdown']:.2f}%
 📦 Open: {len(self.open_positions)} | 🔄 Consecutive Losses: {self.consecutive_losses}
 🎯 Signal: {signal_info['signal']} | 💭 {signal_info['reason']}
+⚙️ EMA {self.settings.EMA_SHORT}/{self.settings.EMA_LONG}/{self.settings.EMA_VERY_LONG} | Risk {self.settings.RISK_PERCENT}% | Max Positions {self.settings.MAX_POSITIONS}
         """)
 
+    def indicator_params(self):
+        """Indicator periods ตาม EMA ใน settings ปัจจุบัน (เปลี่ยนได้ผ่าน hot-reload)"""
+        return replace(DEFAULT_PARAMS, ema_short=self.settings.EMA_SHORT, ema_long=self.settings.EMA_LONG,
+                       ema_very_long=self.settings.EMA_VERY_LONG)
+
+    def reload_config(self):
+        """ตรวจ .env แล้วใช้ค่าใหม่ทั้งชุดเมื่อผ่าน validation (ค่าผิดจะถูกปฏิเสธและใช้ค่าเดิมต่อ)"""
+        error = self.config.last_error
+        changes = self.config.poll()
+        if self.config.last_error and self.config.last_error != error:
+            log.warning(f"⚠️ {self.config.last_error} - ใช้ค่าเดิมต่อ")
+        if changes:
+            for name, (old, new) in changes.items():
+                log.info(f"⚙️ {name}: {old} → {new}")
+        # อ่าน snapshot ครั้งเดียวต่อรอบ - ทุกส่วนของรอบนี้เห็นค่าชุดเดียวกัน
+        self.settings = self.config.current
+
+    def sleep(self, seconds):
+        """รอแบบหยุดได้ทันทีเมื่อกด Ctrl+C"""
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(max(0.0, min(1.0, deadline - time.monotonic())))
+
+    def wait_for_session(self):
+        """ถ้าตลาดปิด (หรือนอก session เมื่อเปิด SESSION_FILTER) ให้หลับจนถึงเวลาเปิดแทนการ poll"""
+        calendar = get_calendar()
+        wait = calendar.seconds_until_open(require_session=SESSION_FILTER)
+        if wait <= 0:
+            return
+        
+        next_open = calendar.next_open(datetime.now(timezone.utc), require_session=SESSION_FILTER)
+        log.info(f"💤 ตลาดปิด/นอก session - รอถึง {next_open:%Y-%m-%d %H:%M} UTC ({wait / 3600:.1f} ชม.)")
+        self.sleep(wait)
+
+    def wait_for_next_day(self):
+        """ถึง daily limit แล้ว - หยุดเทรดจนขึ้นวันใหม่ (เวลาเครื่อง เหมือน restore_state) แล้วเริ่มนับ daily P&L ใหม่"""
+        now = datetime.now()
+        wait = 86400 - (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+        log.info(f"💤 หยุดเทรดวันนี้ - เริ่มใหม่ในอีก {wait / 3600:.1f} ชม.")
+        self.save_state()
+        self.sleep(wait)
+        if self.running:
+            self.daily_start_balance, self.daily_pnl = self.balance, 0.0
+            log.info(f"🌅 วันใหม่ - daily P&L เริ่มนับจาก ${self.balance:,.2f}")
+
+    def save_state(self):
+        """บันทึกสถานะ (บัญชีจำลอง, position, สัญญาณ, แท่งล่าสุด) สำหรับ warm start"""
+        save_state(self.STATE_NAME, {
+            'saved_at': datetime.now(),
+            'balance': self.balance,
+            'daily_start_balance': self.daily_start_balance,
+            'daily_pnl': self.daily_pnl,
+            'open_positions': self.open_positions,
+            'closed_trades': self.closed_trades,
+            'consecutive_losses': self.consecutive_losses,
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'last_bar_time': self.last_bar_time,
+            'gate': self.gate.state(),
+            'bars': self.bars,
+        })
+
+    def restore_state(self):
+        """ทำงานต่อจาก state ที่บันทึกไว้ - คืน True ถ้ามี"""
+        state = load_state(self.STATE_NAME)
+        if state is None:
+            return False
+        for name in ('balance', 'daily_start_balance', 'daily_pnl', 'open_positions', 'closed_trades',
+                     'consecutive_losses', 'total_trades', 'winning_trades', 'last_bar_time', 'bars'):
+            setattr(self, name, state[name])
+        self.gate.restore(state['gate'])
+        if state['saved_at'].date() != datetime.now().date():
+            self.daily_start_balance, self.daily_pnl = self.balance, 0.0  # ข้ามวันแล้ว - เริ่มนับวันใหม่
+        bars = 0 if self.bars is None else len(self.bars)
+        log.info(f"♻️ Warm start: balance ${self.balance:,.2f}, {len(self.open_positions)} open, "
+                 f"{bars} cached bars (saved {state['saved_at']:%Y-%m-%d %H:%M:%S})")
+        return True
+
+    def stop(self):
+        print("\n🛑 กำลังหยุด Golden Trend Demo...")
+        self.running = False
+
     def run(self):
         """เริ่มการทำงาน"""
         print("🚀 เริ่ม Golden Trend Live Demo...")
         
-        # Setup signal handler
-        def signal_handler(sig, frame):
-            print("\n🛑 กำลังหยุด Golden Trend Demo...")
-            self.running = False
-        
-        signal.signal(signal.SIGINT, signal_handler)
+        # SIGINT (Ctrl+C) / SIGTERM (service.py, systemd) - ออกจาก loop แล้วบันทึก state
+        install_shutdown(self.stop)
+        if self.headless:
+            self.restore_state()
         
         try:
             while self.running:
+                # หลับข้ามช่วงตลาดปิด
+                self.wait_for_session()
+                if not self.running:
+                    break
+                
+                self.reload_config()
+                
                 # ดึงข้อมูลล่าสุด
                 df = self.get_live_data(days_back=90)
                 if df is None or len(df) < 200:
                     log.error("ไม่สามารถดึงข้อมูลได้")
-                    time.sleep(60)
+                    self.sleep(60)
                     continue
                 
                 current_price = df.iloc[-1]['close']
                 
                 # วิเคราะห์ Golden Trend System
-                signal_result = golden_trend_system(df, risk_pct=RISK_PERCENT, account_balance=self.balance)
+                signal_result = golden_trend_system(df, risk_pct=self.settings.RISK_PERCENT, account_balance=self.balance,
+                                                    params=self.indicator_params())
                 
-                # อัปเดต positions
-                self.update_positions(current_price)
+                # อัปเดต positions (ใช้ high/low ของแท่งใหม่ทั้งหมด)
+                self.update_positions(df)
                 
-                # ตรวจสอบสัญญาณใหม่
-                current_time = datetime.now()
-                if (signal_result['signal'] in ['BUY', 'SELL'] and 
-                    (self.last_signal_time is None or 
-                     (current_time - self.last_signal_time).total_seconds() > 3600)):  # 1 ชั่วโมง
-                    
-                    self.simulate_trade(signal_result)
-                    self.last_signal_time = current_time
+                # ตรวจสอบสัญญาณใหม่ (ยิงครั้งเดียวต่อ edge ต่อแท่ง แล้วพัก cooldown ตามจำนวนแท่ง)
+                bar_time = df.iloc[-1]['time']
+                if self.gate.update(bar_time, SIGNAL_DIRECTION[signal_result['signal']]):
+                    self.simulate_trade(signal_result, bar_time=bar_time)
                 
                 # แสดงสถานะ
                 self.show_status(current_price, signal_result)
+                if self.headless:
+                    self.save_state()  # บันทึกทุกรอบ - crash แบบไม่ทันเข้า finally ก็เสียแค่รอบเดียว
                 
                 # ตรวจสอบ daily limits
                 daily_pnl_pct = (self.daily_pnl / self.daily_start_balance * 100)
-                if daily_pnl_pct >= DAILY_PROFIT_TARGET:
+                if daily_pnl_pct >= self.settings.DAILY_PROFIT_TARGET:
                     print(f"🎯 ถึงเป้าหมายกำไรรายวัน! (+{daily_pnl_pct:.2f}%)")
-                    break
-                elif daily_pnl_pct <= -DAILY_DRAWDOWN_LIMIT:
+                elif daily_pnl_pct <= -self.settings.DAILY_DRAWDOWN_LIMIT:
                     print(f"🛑 ถึงขีดจำกัดการขาดทุนรายวัน! ({daily_pnl_pct:.2f}%)")
-                    break
+                else:
+                    self.sleep(30)  # รอ 30 วินาที
+                    continue
                 
-                time.sleep(30)  # รอ 30 วินาที
+                # headless: ออกด้วย exit 0 แล้ว supervisor จะไม่ restart - หลับรอวันใหม่แทน
+                if not self.headless:
+                    break
+                self.wait_for_next_day()
                 
         except Exception as e:
-            log.error(f"Error in main loop: {e}")
+            log.exception(f"Error in main loop: {e}")
+            if self.headless:
+                raise  # exit code ≠ 0 ให้ supervisor restart
         finally:
+            if self.headless:
+                self.save_state()
             print(f"""
 📊 Golden Trend Demo สิ้นสุด
 ===============================
@@ -270,8 +455,12 @@ class GoldenTrendLiveDemo:
             """)
 
 def main():
-    demo = GoldenTrendLiveDemo(initial_balance=10000)
+    demo = GoldenTrendLiveDemo(initial_balance=10000, headless="--headless" in sys.argv)
     demo.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--profile" in sys.argv:
+        from profiler import run_profiled
+        run_profiled(main, "golden_live_demo")
+    else:
+        main()
\ No newline at end of file
@@ -5,18 +5,73 @@
 """
 
 import tkinter as tk
-from tkinter import messagebox, scrolledtext
+from tkinter import messagebox, scrolledtext, ttk
 import subprocess
-import threading
+import queue
 import os
 import sys
+from collections import deque
+from utils.jobs import JobManager
+
+LOG_TICK_MS = 100       # ความถี่ที่ดึง log จาก queue ไปแสดง
+LOG_MAX_LINES = 5000    # จำนวนบรรทัดสูงสุดที่เก็บใน output area
+JOB_REFRESH_MS = 1000   # ความถี่อัปเดตตาราง job (CPU/RSS/runtime)
+MAX_JOBS = os.cpu_count() or 2  # จำนวน job ที่รันพร้อมกันสูงสุด
+
+class BatchedLog:
+    """ส่ง log จาก thread ใดก็ได้เข้า ScrolledText เป็นชุดตาม tick และเก็บเฉพาะ N บรรทัดล่าสุด"""
+    
+    def __init__(self, root, widget, tick_ms=LOG_TICK_MS, max_lines=LOG_MAX_LINES):
+        self.root = root
+        self.widget = widget
+        self.tick_ms = tick_ms
+        self.max_lines = max_lines
+        self.queue = queue.SimpleQueue()
+        self.line_count = 0
+        self.after_id = self.root.after(self.tick_ms, self.drain)
+        
+    def write(self, text):
+        """เพิ่มข้อความ (thread-safe ไม่แตะ Tk โดยตรง)"""
+        self.queue.put(text)
+        
+    def drain(self):
+        """รวมทุกบรรทัดที่ค้างใน queue แล้ว insert ครั้งเดียว"""
+        batch = deque(maxlen=self.max_lines)
+        try:
+            while True:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if batch:
+            text = "\n".join(batch) + "\n"
+            self.widget.insert(tk.END, text)
+            self.line_count += text.count("\n")
+            
+            # ตัดบรรทัดเก่าทิ้งให้เหลือไม่เกิน max_lines
+            excess = self.line_count - self.max_lines
+            if excess > 0:
+                self.widget.delete("1.0", f"{excess + 1}.0")
+                self.line_count -= excess
+            self.widget.see(tk.END)
+        
+        self.after_id = self.root.after(self.tick_ms, self.drain)
+        
+    def close(self):
+        """หยุด tick (เรียกก่อนทำลาย widget)"""
+        self.root.after_cancel(self.after_id)
 
 class TradingBotGUI:
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("🚀 MT5 Forex Trading Bot")
-        self.root.geometry("600x500")
+        self.root.geometry("800x800")
         self.root.configure(bg="#1e1e1e")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.jobs = JobManager(max_workers=MAX_JOBS)
+        self.job_tabs = {}
+        self.refresh_id = None
         
         # เปลี่ยน directory
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -65,22 +120,39 @@ class TradingBotGUI:
         self.create_button(settings_frame, "⚙️ View Settings", self.view_settings, "#666666")
         self.create_button(settings_frame, "📝 Edit Settings", self.edit_settings, "#666666")
         
-        # Output Area
+        # Jobs Area
+        jobs_frame = tk.Frame(self.root, bg="#1e1e1e")
+        jobs_frame.pack(pady=(10, 0), padx=20, fill=tk.X)
+        
+        tk.Label(jobs_frame, text="🧵 Jobs:", font=("Arial", 12, "bold"),
+                fg="#ffffff", bg="#1e1e1e").pack(anchor="w")
+        
+        columns = ("job", "status", "cpu", "rss", "runtime")
+        self.job_tree = ttk.Treeview(jobs_frame, columns=columns, show="headings", height=4)
+        for column, heading, width in zip(columns, ("Job", "Status", "CPU", "RSS", "Runtime"),
+                                          (300, 100, 80, 100, 100)):
+            self.job_tree.heading(column, text=heading)
+            self.job_tree.column(column, width=width, anchor="w")
+        self.job_tree.pack(fill=tk.X)
+        
+        job_buttons = tk.Frame(jobs_frame, bg="#1e1e1e")
+        job_buttons.pack(anchor="e", pady=5)
+        tk.Button(job_buttons, text="⛔ Cancel Selected", command=self.cancel_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(job_buttons, text="🧹 Clear Finished", command=self.clear_finished).pack(side=tk.LEFT)
+        
+        # Output Area - tab หลัก + tab ละ job
         output_frame = tk.Frame(self.root, bg="#1e1e1e")
-        output_frame.pack(pady=20, padx=20, fill=tk.BOTH, expand=True)
+        output_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
         
         tk.Label(output_frame, text="📋 Output:", font=("Arial", 12, "bold"), 
                 fg="#ffffff", bg="#1e1e1e").pack(anchor="w")
         
-        self.output_text = scrolledtext.ScrolledText(
-            output_frame,
-            height=8,
-            bg="#2d2d2d",
-            fg="#00ff00",
-            font=("Monaco", 10),
-            insertbackground="#00ff00"
-        )
-        self.output_text.pack(fill=tk.BOTH, expand=True)
+        self.notebook = ttk.Notebook(output_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        
+        main_tab, self.log = self.create_log_pane(self.notebook)
+        self.output_text = main_tab.text
+        self.notebook.add(main_tab, text="📋 Main")
         
         # Status
         self.status_label = tk.Label(
@@ -109,61 +181,143 @@ class TradingBotGUI:
         btn.pack(pady=5)
         return btn
         
+    def create_log_pane(self, parent):
+        """สร้าง frame ที่มี ScrolledText + BatchedLog ของตัวเอง"""
+        frame = tk.Frame(parent, bg="#1e1e1e")
+        frame.text = scrolledtext.ScrolledText(
+            frame,
+            height=8,
+            bg="#2d2d2d",
+            fg="#00ff00",
+            font=("Monaco", 10),
+            insertbackground="#00ff00"
+        )
+        frame.text.pack(fill=tk.BOTH, expand=True)
+        return frame, BatchedLog(self.root, frame.text)
+        
+    def create_job_tab(self, description):
+        """สร้าง tab output สำหรับ job ใหม่"""
+        frame, job_log = self.create_log_pane(self.notebook)
+        self.notebook.add(frame, text=description)
+        return frame, job_log
+        
     def log_output(self, text):
-        """แสดงข้อความใน output area"""
-        self.output_text.insert(tk.END, f"{text}\n")
-        self.output_text.see(tk.END)
+        """แสดงข้อความใน output area (เรียกจาก thread ไหนก็ได้)"""
+        self.log.write(text)
         
     def run_command(self, script_name, description):
-        """รันคำสั่งใน background"""
-        def worker():
-            self.status_label.config(text=f"🔄 Running {description}...")
-            self.log_output(f"🚀 Starting {description}...")
-            
-            try:
-                venv_python = ".venv/bin/python"
-                if os.path.exists(venv_python):
-                    cmd = [venv_python, script_name]
-                else:
-                    cmd = ["python3", script_name]
-                
-                process = subprocess.Popen(
-                    cmd, 
-                    stdout=subprocess.PIPE, 
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                )
-                
-                # อ่าน output แบบ real-time
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        self.root.after(0, self.log_output, output.strip())
-                
-                return_code = process.poll()
-                if return_code == 0:
-                    self.root.after(0, self.log_output, f"✅ {description} completed successfully!")
-                else:
-                    self.root.after(0, self.log_output, f"❌ {description} failed with code {return_code}")
-                    
-            except Exception as e:
-                self.root.after(0, self.log_output, f"❌ Error: {str(e)}")
-                
-            finally:
-                self.root.after(0, lambda: self.status_label.config(text="✅ Ready to Trade"))
-        
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
+        """รันสคริปต์เป็น job ใหม่ - รันพร้อมกันได้หลาย job และแต่ละ job มี output ของตัวเอง"""
+        venv_python = ".venv/bin/python"
+        python = venv_python if os.path.exists(venv_python) else "python3"
+        
+        frame, job_log = self.create_job_tab(description)
+        job = self.jobs.submit(description, [python, script_name],
+                               on_output=job_log.write, on_exit=self.on_job_exit)
+        self.job_tabs[job.id] = (frame, job_log)
+        self.notebook.tab(frame, text=f"#{job.id} {description}")
+        self.notebook.select(frame)
+        
+        job_log.write(f"🚀 Starting {description}...")
+        self.log_output(f"🚀 Job #{job.id}: {description} (max {self.jobs.max_workers} concurrent)")
+        self.refresh_jobs()
+        
+    def on_job_exit(self, job):
+        """เรียกจาก worker thread เมื่อ job จบ"""
+        if job.status == "done":
+            message = f"✅ {job.name} completed successfully!"
+        elif job.status == "cancelled":
+            message = f"⛔ {job.name} cancelled"
+        else:
+            message = f"❌ {job.name} failed with code {job.returncode}"
+        
+        _, job_log = self.job_tabs.get(job.id, (None, None))
+        if job_log:
+            job_log.write(message)
+        self.log_output(f"Job #{job.id}: {message} ({job.runtime():.1f}s)")
+        
+    def refresh_jobs(self):
+        """อัปเดตตาราง job (สถานะ, CPU, RSS, เวลา) ทุก JOB_REFRESH_MS"""
+        if self.refresh_id is not None:
+            self.root.after_cancel(self.refresh_id)
+        
+        for job in list(self.jobs.jobs.values()):
+            cpu, rss = job.usage()
+            values = (
+                f"#{job.id} {job.name}",
+                job.status,
+                f"{cpu:.0f}%" if cpu is not None else "-",
+                f"{rss / 1024 / 1024:.0f} MB" if rss is not None else "-",
+                f"{job.runtime():.0f}s",
+            )
+            iid = str(job.id)
+            if self.job_tree.exists(iid):
+                self.job_tree.item(iid, values=values)
+            else:
+                self.job_tree.insert("", tk.END, iid=iid, values=values)
+        
+        active = len(self.jobs.active())
+        self.status_label.config(text=f"🔄 Running {active} job(s)..." if active else "✅ Ready to Trade")
+        self.refresh_id = self.root.after(JOB_REFRESH_MS, self.refresh_jobs)
+        
+    def cancel_selected(self):
+        """ยกเลิก job ที่เลือกในตาราง"""
+        for iid in self.job_tree.selection():
+            if self.jobs.cancel(int(iid)):
+                self.log_output(f"⛔ Cancelling job #{iid}...")
+        
+    def clear_finished(self):
+        """ลบ job ที่จบแล้วออกจากตารางและปิด tab ของมัน"""
+        for job in self.jobs.remove_finished():
+            if self.job_tree.exists(str(job.id)):
+                self.job_tree.delete(str(job.id))
+            frame, job_log = self.job_tabs.pop(job.id, (None, None))
+            if frame is not None:
+                job_log.close()
+                self.notebook.forget(frame)
+                frame.destroy()
+        
+    def on_close(self):
+        """ปิดหน้าต่าง - หยุดทุก job เพื่อไม่ให้เหลือ process ค้าง"""
+        active = self.jobs.active()
+        if active and not messagebox.askyesno(
+            "⚠️ Running Jobs",
+            f"{len(active)} job(s) are still running.\nStop them and exit?"
+        ):
+            return
+        self.jobs.shutdown()
+        self.root.destroy()
         
     def run_golden_live(self):
         """รัน Golden Trend Live Demo"""
+        self.ensure_market_feeder()
         self.run_command("golden_live_demo.py", "Golden Trend Live Demo")
         
+    def ensure_market_feeder(self):
+        """เริ่ม Market Data Feeder เบื้องหลัง ถ้าตั้ง MARKET_BUS ไว้ใน .env"""
+        from config import MARKET_BUS
+        if not MARKET_BUS:
+            return
+        
+        try:
+            from market_bus import feeder_running, ensure_feeder
+            if feeder_running():
+                return
+            python = ".venv/bin/python" if os.path.exists(".venv/bin/python") else "python3"
+            # เป็น job ของ JobManager - เห็น output/CPU ในหน้าต่าง และถูกหยุดเมื่อปิดหน้าต่าง
+            frame, job_log = self.create_job_tab("Market Data Feeder")
+            job = ensure_feeder(python, manager=self.jobs, on_output=job_log.write, on_exit=self.on_job_exit)
+            if job is None:
+                job_log.close()
+                self.notebook.forget(frame)
+                frame.destroy()
+                return
+            self.job_tabs[job.id] = (frame, job_log)
+            self.notebook.tab(frame, text=f"#{job.id} Market Data Feeder")
+            self.log_output(f"📡 Started Market Data Feeder ('{MARKET_BUS}') as job #{job.id}")
+            self.refresh_jobs()
+        except Exception as e:
+            self.log_output(f"❌ Error starting feeder: {e}")
+        
     def run_golden_test(self):
         """รัน Golden Trend Test"""
         self.run_command("test_golden_trend.py", "Golden Trend System Test")
@@ -205,6 +359,7 @@ class TradingBotGUI:
             
     def run(self):
         """เริ่มรัน GUI"""
+        self.refresh_jobs()
         self.root.mainloop()
 
 def main():
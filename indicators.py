@@ -0,0 +1,345 @@
+"""
+⚡ Indicator Kernels
+คำนวณ TR, +DM/-DM, DI, DX, ADX, ATR และ RSI ใน loop เดียวบน NumPy arrays
+ใช้ numba (JIT) ถ้าติดตั้งไว้ ไม่งั้นใช้ NumPy ล้วน - ค่าตรงกับสูตร pandas เดิม (rolling mean)
+ผลลัพธ์ถูกเก็บใน LRU cache (key = data version + ชื่อ + periods) เพื่อใช้ซ้ำข้ามกลยุทธ์
+"""
+
+import hashlib
+import importlib.util
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BACKENDS = ("auto", "numba", "numpy")
+
+def _rolling_mean(x, window):
+    """Rolling mean แบบ min_periods=window (NaN ในหน้าต่างทำให้ผลเป็น NaN)"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window).sum(axis=1) / window
+    return out
+
+def _trend_kernel_numpy(high, low, close, rsi_period, adx_period, atr_period):
+    """NumPy fallback - vectorized ทีละขั้น"""
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+
+    # True Range (ข้าม NaN แบบเดียวกับ pandas max(axis=1))
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+    # Directional Movement
+    plus_dm = np.empty_like(high)
+    minus_dm = np.empty_like(low)
+    plus_dm[0] = minus_dm[0] = np.nan
+    plus_dm[1:] = np.diff(high)
+    minus_dm[1:] = np.diff(low) * -1
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm < 0] = 0
+
+    # RSI gain/loss (แท่งแรกเป็น 0 ไม่ใช่ NaN)
+    delta = np.empty_like(close)
+    delta[0] = np.nan
+    delta[1:] = np.diff(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = -np.where(delta < 0, delta, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tr_mean = _rolling_mean(tr, adx_period)
+        plus_di = 100 * (_rolling_mean(plus_dm, adx_period) / tr_mean)
+        minus_di = 100 * (_rolling_mean(minus_dm, adx_period) / tr_mean)
+        dx = (np.abs(plus_di - minus_di) / np.abs(plus_di + minus_di)) * 100
+        adx = _rolling_mean(dx, adx_period)
+        atr = tr_mean if atr_period == adx_period else _rolling_mean(tr, atr_period)
+
+        rs = _rolling_mean(gain, rsi_period) / _rolling_mean(loss, rsi_period)
+        rsi = 100 - (100 / (1 + rs))
+
+    return rsi, adx, atr, plus_di, minus_di
+
+def _window_mean(x, i, window):
+    if i < window - 1:
+        return np.nan
+    total = 0.0
+    for k in range(i - window + 1, i + 1):
+        total += x[k]
+    return total / window
+
+def _trend_kernel_loop(high, low, close, rsi_period, adx_period, atr_period):
+    """Fused kernel - loop เดียวผ่านข้อมูล (สำหรับ numba)"""
+    n = len(close)
+    tr = np.empty(n)
+    plus_dm = np.empty(n)
+    minus_dm = np.empty(n)
+    gain = np.empty(n)
+    loss = np.empty(n)
+    dx = np.empty(n)
+    rsi = np.empty(n)
+    adx = np.empty(n)
+    atr = np.empty(n)
+    plus_di = np.empty(n)
+    minus_di = np.empty(n)
+
+    for i in range(n):
+        if i == 0:
+            tr[i] = high[i] - low[i]
+            plus_dm[i] = np.nan
+            minus_dm[i] = np.nan
+            gain[i] = 0.0
+            loss[i] = 0.0
+        else:
+            # True Range - max ที่ข้าม NaN
+            best = np.nan
+            for v in (high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])):
+                if not np.isnan(v) and (np.isnan(best) or v > best):
+                    best = v
+            tr[i] = best
+
+            up = high[i] - high[i - 1]
+            down = (low[i] - low[i - 1]) * -1
+            plus_dm[i] = 0.0 if up < 0 else up
+            minus_dm[i] = 0.0 if down < 0 else down
+
+            d = close[i] - close[i - 1]
+            gain[i] = d if d > 0 else 0.0
+            loss[i] = -(d if d < 0 else 0.0)
+
+        tr_mean = _window_mean(tr, i, adx_period)
+        plus_di[i] = 100 * (_window_mean(plus_dm, i, adx_period) / tr_mean)
+        minus_di[i] = 100 * (_window_mean(minus_dm, i, adx_period) / tr_mean)
+        dx[i] = (abs(plus_di[i] - minus_di[i]) / abs(plus_di[i] + minus_di[i])) * 100
+        adx[i] = _window_mean(dx, i, adx_period)
+        atr[i] = tr_mean if atr_period == adx_period else _window_mean(tr, i, atr_period)
+
+        rs = _window_mean(gain, i, rsi_period) / _window_mean(loss, i, rsi_period)
+        rsi[i] = 100 - (100 / (1 + rs))
+
+    return rsi, adx, atr, plus_di, minus_di
+
+_trend_kernel_jit = None
+
+def numba_available():
+    """ตรวจว่าติดตั้ง numba (optional dependency) หรือไม่ - ไม่ import จริง"""
+    return importlib.util.find_spec("numba") is not None
+
+def _get_jit_kernel():
+    """JIT kernel ด้วย numba ครั้งแรกที่ใช้ (import numba ใช้เวลานาน จึงไม่ทำตอน import module)"""
+    global _trend_kernel_jit, _window_mean
+    if _trend_kernel_jit is None:
+        import numba
+        jit = numba.njit(cache=True, error_model='numpy')
+        _window_mean = jit(_window_mean)
+        _trend_kernel_jit = jit(_trend_kernel_loop)
+    return _trend_kernel_jit
+
+def trend_kernel(high, low, close, rsi_period=14, adx_period=14, atr_period=14, backend="auto"):
+    """
+    คำนวณ RSI, ADX, ATR (+DI/-DI) จาก arrays ของ high/low/close
+
+    Args:
+        backend: 'auto' (numba ถ้ามี), 'numba' หรือ 'numpy'
+
+    Returns:
+        dict: {'rsi', 'adx', 'atr', 'plus_di', 'minus_di'} เป็น float64 arrays
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (ใช้ได้: {', '.join(BACKENDS)})")
+    use_jit = backend == "numba" or (backend == "auto" and numba_available())
+    if backend == "numba" and not numba_available():
+        raise ImportError("numba is not installed")
+
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+
+    kernel = _get_jit_kernel() if use_jit else _trend_kernel_numpy
+    rsi, adx, atr, plus_di, minus_di = kernel(high, low, close,
+                                              int(rsi_period), int(adx_period), int(atr_period))
+    return {'rsi': rsi, 'adx': adx, 'atr': atr, 'plus_di': plus_di, 'minus_di': minus_di}
+
+# =============================================================================
+# Indicator cache - EMA(50) ที่กลยุทธ์หนึ่งคำนวณแล้ว กลยุทธ์อื่นบนแท่งชุดเดียวกันใช้ต่อได้เลย
+# =============================================================================
+
+@dataclass(frozen=True)
+class IndicatorParams:
+    """Periods ของ indicators ทั้งหมด (frozen - ใช้เป็นส่วนหนึ่งของ cache key ได้)"""
+    ema_short: int = 20
+    ema_long: int = 50
+    ema_very_long: int = 200
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+    rsi: int = 14
+    adx: int = 14
+    atr: int = 14
+
+class IndicatorCache:
+    """LRU cache ของ arrays ผลลัพธ์ จำกัดขนาดรวมเป็น bytes (ตัวที่ใช้ล่าสุดน้อยที่สุดถูกทิ้งก่อน)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """คืนค่าจาก cache หรือเรียก compute() แล้วเก็บไว้ (arrays ที่คืนเป็น read-only)"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+
+        value = compute()
+        arrays = value.values() if isinstance(value, dict) else [value]
+        for a in arrays:
+            a.flags.writeable = False
+        size = sum(a.nbytes for a in arrays)
+        if size > self.max_bytes:
+            return value  # ใหญ่เกินเพดาน - ไม่เก็บ
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = (value, size)
+                self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """สถิติการใช้งาน cache"""
+        return {'entries': len(self._items), 'mb': self.nbytes / 1024 ** 2,
+                'hits': self.hits, 'misses': self.misses}
+
+def _default_cache():
+    from config import INDICATOR_CACHE_MB
+    return IndicatorCache(INDICATOR_CACHE_MB * 1024 ** 2)
+
+INDICATOR_CACHE = _default_cache()
+
+def data_version(*arrays):
+    """Fingerprint ของข้อมูล (hash ของ bytes) - แท่งชุดเดียวกันได้ version เดียวกันเสมอ"""
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        a = np.ascontiguousarray(a, dtype=np.float64)
+        h.update(len(a).to_bytes(8, 'little'))
+        h.update(memoryview(a).cast('B'))
+    return h.hexdigest()
+
+def _ewm(values, span):
+    """EMA แบบ adjust=False (สูตรเดียวกับ pandas ewm)"""
+    import pandas as pd
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+def ema(close, span, version, cache=None):
+    """EMA(span) ของ close ผ่าน cache"""
+    cache = cache or INDICATOR_CACHE
+    return cache.get((version, 'ema', int(span)), lambda: _ewm(close, int(span)))
+
+def macd(close, fast, slow, signal, version, cache=None):
+    """MACD line/signal/histogram - ใช้ EMA(fast)/EMA(slow) ร่วมกับ cache ของ ema()"""
+    cache = cache or INDICATOR_CACHE
+
+    def compute():
+        line = ema(close, fast, version, cache) - ema(close, slow, version, cache)
+        signal_line = _ewm(line, int(signal))
+        return {'macd': line, 'macd_signal': signal_line, 'macd_histogram': line - signal_line}
+
+    return cache.get((version, 'macd', int(fast), int(slow), int(signal)), compute)
+
+def trend(high, low, close, rsi_period, adx_period, atr_period, version, cache=None):
+    """RSI/ADX/ATR จาก trend_kernel ผ่าน cache"""
+    cache = cache or INDICATOR_CACHE
+    return cache.get((version, 'trend', int(rsi_period), int(adx_period), int(atr_period)),
+                     lambda: trend_kernel(high, low, close, rsi_period, adx_period, atr_period))
+
+def indicator_set(high, low, close, params=None, version=None, cache=None):
+    """
+    คำนวณ indicators ชุด Golden Trend ตาม params (ส่วนที่เคยคำนวณแล้วดึงจาก cache)
+
+    Returns:
+        dict: ชื่อคอลัมน์ -> array ('ema{n}' ตาม period, ชื่อบทบาท 'ema_short'/'ema_long'/'ema_very_long',
+              'macd', 'macd_signal', 'macd_histogram', 'rsi', 'adx', 'atr')
+    """
+    params = params or IndicatorParams()
+    if version is None:
+        version = data_version(high, low, close)
+
+    out = {}
+    for role in ('ema_short', 'ema_long', 'ema_very_long'):
+        span = getattr(params, role)
+        out[f'ema{span}'] = out[role] = ema(close, span, version, cache)
+    out.update(macd(close, params.macd_fast, params.macd_slow, params.macd_signal, version, cache))
+    values = trend(high, low, close, params.rsi, params.adx, params.atr, version, cache)
+    for name in ('rsi', 'adx', 'atr'):
+        out[name] = values[name]
+    return out
+
+class IndicatorStream:
+    """
+    คำนวณ indicator_set ทีละ chunk ต่อเนื่องกัน - ผลเท่ากับการคำนวณทั้งชุดในครั้งเดียวทุกบิต
+    EMA ต่อจากค่าสุดท้ายของ chunk ก่อน, rolling windows ใช้แท่งท้ายของ chunk ก่อนเป็น context
+    """
+
+    def __init__(self, params=None):
+        self.params = params or IndicatorParams()
+        p = self.params
+        # แท่งย้อนหลังที่ค่า ณ แท่งหนึ่งต้องใช้ (ADX = ค่าเฉลี่ยของ DX ซึ่งใช้ค่าเฉลี่ยของ DM/TR อีกชั้น)
+        self.context = max(2 * p.adx, p.rsi, p.atr) + 1
+        self._ema = {}
+        self._tail = None
+
+    def _ewm(self, key, values, span):
+        """EMA ต่อเนื่อง: ใส่ค่าสุดท้ายของ chunk ก่อนเป็นจุดเริ่ม แล้วตัดออก"""
+        last = self._ema.get(key)
+        if last is None:
+            out = _ewm(values, span)
+        else:
+            out = _ewm(np.concatenate(([last], values)), span)[1:]
+        if len(out):
+            self._ema[key] = out[-1]
+        return out
+
+    def update(self, high, low, close):
+        """คำนวณ indicators ของ chunk ถัดไป - คืน dict แบบเดียวกับ indicator_set"""
+        p = self.params
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+
+        out = {}
+        emas = {}
+        for span in {p.ema_short, p.ema_long, p.ema_very_long, p.macd_fast, p.macd_slow}:
+            emas[span] = self._ewm(('ema', span), close, span)
+        for role in ('ema_short', 'ema_long', 'ema_very_long'):
+            span = getattr(p, role)
+            out[f'ema{span}'] = out[role] = emas[span]
+
+        line = emas[p.macd_fast] - emas[p.macd_slow]
+        signal_line = self._ewm(('macd_signal', p.macd_signal), line, p.macd_signal)
+        out.update({'macd': line, 'macd_signal': signal_line, 'macd_histogram': line - signal_line})
+
+        # rolling windows - ต่อท้าย context ของ chunk ก่อน แล้วเก็บเฉพาะแท่งของ chunk นี้
+        n = len(close)
+        if self._tail is not None:
+            high = np.concatenate((self._tail[0], high))
+            low = np.concatenate((self._tail[1], low))
+            close = np.concatenate((self._tail[2], close))
+        values = trend_kernel(high, low, close, p.rsi, p.adx, p.atr)
+        for name in ('rsi', 'adx', 'atr'):
+            out[name] = values[name][len(close) - n:]
+        self._tail = (high[-self.context:], low[-self.context:], close[-self.context:])
+        return out
@@ -0,0 +1,41 @@
+"""
+📏 Instruments
+ขนาดสัญญาของแต่ละ symbol - แปลงระยะราคาเป็นดอลลาร์ต่อ lot สำหรับ P&L, ความเสี่ยง และ lot ตามความเสี่ยง
+ใช้ใน backtest ที่ไม่มี mt5.symbol_info (live ใช้ orders.SymbolSpec จาก broker)
+"""
+
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Instrument:
+    contract_size: float       # หน่วยต่อ 1 lot (ทอง 100 oz, FX 100,000 หน่วย)
+    quote_usd: bool = True     # False = ราคาเป็นสกุลอื่นต่อ 1 USD (USDJPY) - แปลงเป็น $ ด้วยราคา
+    min_lot: float = 0.01
+    max_lot: float = 0.1       # lot สูงสุดต่อ trade
+
+    def usd_per_lot(self, distance, price):
+        """$ ต่อ 1 lot เมื่อราคาขยับ distance (รับ array ได้ - price ใช้แปลงสกุลเงินเมื่อ quote ไม่ใช่ USD)"""
+        value = distance * self.contract_size
+        return value if self.quote_usd else value / price
+
+    def position_size(self, entry_price, sl_price, risk_pct, account_balance):
+        """Lot ตามความเสี่ยง (risk_pct ของ balance เมื่อโดน SL) จำกัด min_lot-max_lot"""
+        loss_per_lot = self.usd_per_lot(abs(entry_price - sl_price), entry_price)
+        risk_amount = account_balance * (risk_pct / 100)
+        return round(min(self.max_lot, max(self.min_lot, risk_amount / loss_per_lot)), 2)
+
+# Exness Standard - max_lot ของ FX ให้ lot ตามความเสี่ยงใกล้เคียงทอง (SL ประมาณ 1.5-2 ATR ของ H1)
+INSTRUMENTS = {
+    'XAUUSD': Instrument(contract_size=100),
+    'EURUSD': Instrument(contract_size=100_000, max_lot=1.0),
+    'GBPUSD': Instrument(contract_size=100_000, max_lot=1.0),
+    'USDJPY': Instrument(contract_size=100_000, quote_usd=False, max_lot=1.0),
+}
+
+def instrument(symbol):
+    """Instrument ของ symbol - ไม่มีในตาราง = ValueError (ไม่เดาเป็นขนาดสัญญาของทอง)"""
+    try:
+        return INSTRUMENTS[symbol]
+    except KeyError:
+        raise ValueError(f"Unknown instrument '{symbol}' - เพิ่มขนาดสัญญาใน instruments.INSTRUMENTS "
+                         f"(มี: {', '.join(INSTRUMENTS)})") from None
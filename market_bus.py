@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+📡 Market Data Bus
+Data feeder process เดียวดาวน์โหลด/คำนวณ indicators แล้วเขียนลง shared memory ring buffer
+Strategy processes อื่น attach แบบ zero-copy และอ่านด้วย sequence counter (seqlock) โดยไม่ต้องใช้ lock
+
+Layout ของ shared memory:
+    header  int64[8]          - magic, seq, capacity, ncols, count, head, last_time, reserved
+    time    int64[capacity]   - เวลาแท่ง (UTC, nanoseconds)
+    data    float64[ncols, capacity]
+
+Writer เพิ่ม seq เป็นเลขคี่ก่อนเขียน และเป็นเลขคู่เมื่อเขียนเสร็จ
+Reader อ่านซ้ำถ้า seq เป็นเลขคี่หรือเปลี่ยนระหว่างอ่าน
+"""
+
+import os
+import signal
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory, resource_tracker
+from config import SYMBOL, TIMEFRAME, MARKET_BUS, MARKET_BUS_CAPACITY, FEED_INTERVAL
+from utils.logger import get_logger
+
+log = get_logger("market_bus")
+
+BUS_MAGIC = 0x47544255  # "GTBU"
+BUS_COLUMNS = (
+    'open', 'high', 'low', 'close', 'volume',
+    'ema_short', 'ema_long', 'ema_very_long', 'macd', 'macd_signal', 'macd_histogram',
+    'rsi', 'adx', 'atr',
+)
+
+_MAGIC, _SEQ, _CAPACITY, _NCOLS, _COUNT, _HEAD, _LAST_TIME = range(7)
+_HEADER_SIZE = 8
+
+FEEDER_LOG = os.path.join("logs", "market_feeder.log")  # output ของ feeder ที่เริ่มจาก run_bot.py
+
+def default_bus_name():
+    """ชื่อ bus ตั้งต้นเมื่อไม่ได้ตั้ง MARKET_BUS"""
+    return MARKET_BUS or f"gt_{SYMBOL}_{TIMEFRAME}".lower()
+
+def _to_utc_ns(times):
+    """แปลงคอลัมน์เวลาเป็น int64 nanoseconds (UTC) - เวลาแบบ naive ถือเป็น UTC"""
+    times = pd.to_datetime(pd.Series(times))
+    if times.dt.tz is None:
+        times = times.dt.tz_localize('UTC')
+    times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    return times.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def _attach_untracked(name):
+    """เปิด segment ที่มีอยู่โดยไม่ให้ resource tracker ของ reader ลบทิ้งตอน process จบ"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+def feeder_running(name=None):
+    """ตรวจว่ามี feeder สร้าง bus ชื่อนี้ไว้แล้วหรือยัง"""
+    try:
+        shm = _attach_untracked(name or default_bus_name())
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+def feeder_command(python="python3"):
+    return [python, "market_bus.py"]
+
+def ensure_feeder(python="python3", name=None, manager=None, on_output=None, on_exit=None):
+    """
+    เริ่ม feeder เป็น background process ถ้ายังไม่มี - ผู้เรียกต้องเก็บค่าที่คืนไว้หยุด feeder ตอนปิดโปรแกรม
+
+    Args:
+        manager: utils.jobs.JobManager - ส่งมา = รันเป็น job ของ manager (shutdown() หยุดให้เอง, output ไป on_output)
+                 (on_output/on_exit ส่งต่อให้ JobManager.submit)
+                 ไม่ส่ง = Popen ที่เขียน output ลง logs/market_feeder.log
+
+    Returns:
+        Job / Popen หรือ None ถ้ามี feeder รันอยู่แล้ว
+    """
+    import subprocess
+
+    if feeder_running(name):
+        return None
+    log.info(f"📡 Starting market data feeder '{name or default_bus_name()}'")
+    if manager is not None:
+        return manager.submit("Market Data Feeder", feeder_command(python), on_output=on_output, on_exit=on_exit,
+                              bounded=False)
+    os.makedirs("logs", exist_ok=True)
+    with open(FEEDER_LOG, "a", encoding="utf-8") as out:
+        return subprocess.Popen(feeder_command(python), start_new_session=True,
+                                stdout=out, stderr=subprocess.STDOUT)
+
+def stop_feeder(process, timeout=5.0):
+    """หยุด feeder ที่ ensure_feeder เริ่มไว้ (SIGTERM แล้ว SIGKILL ถ้าไม่หยุดภายใน timeout)"""
+    import subprocess
+
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+class MarketBus:
+    """Ring buffer ของแท่งราคา + indicators บน multiprocessing.shared_memory"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((_HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        if self.header[_MAGIC] != BUS_MAGIC:
+            raise ValueError(f"'{shm.name}' is not a market bus")
+        self.capacity = int(self.header[_CAPACITY])
+        self.columns = BUS_COLUMNS[:int(self.header[_NCOLS])]
+        offset = _HEADER_SIZE * 8
+        self.times = np.ndarray((self.capacity,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.capacity * 8
+        self.data = np.ndarray((len(self.columns), self.capacity), dtype=np.float64,
+                               buffer=shm.buf, offset=offset)
+
+    @classmethod
+    def create(cls, name, capacity=MARKET_BUS_CAPACITY):
+        """สร้าง bus ใหม่ (ฝั่ง feeder) - ถ้ามีของเก่าค้างอยู่จะลบทิ้งก่อน"""
+        size = (_HEADER_SIZE + capacity + len(BUS_COLUMNS) * capacity) * 8
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((_HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_NCOLS] = len(BUS_COLUMNS)
+        header[_MAGIC] = BUS_MAGIC
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """เชื่อมต่อกับ bus ที่มีอยู่ (ฝั่ง strategy) - ไม่ copy ข้อมูล"""
+        shm = _attach_untracked(name)
+        return cls(shm, owner=False)
+
+    @property
+    def seq(self):
+        """sequence counter - เพิ่มขึ้นทุกครั้งที่ feeder publish"""
+        return int(self.header[_SEQ])
+
+    def __len__(self):
+        return int(self.header[_COUNT])
+
+    def publish(self, df: pd.DataFrame):
+        """เขียนแท่งใหม่ลง ring (แท่งที่เวลาเท่ากับแท่งล่าสุดจะถูกเขียนทับ) - คืนจำนวนแท่งที่เขียน"""
+        if df is None or df.empty:
+            return 0
+
+        times = _to_utc_ns(df['time'])
+        values = np.column_stack([
+            df[c].to_numpy(dtype=float) if c in df.columns else np.full(len(df), np.nan)
+            for c in self.columns
+        ])
+
+        h = self.header
+        count, head = int(h[_COUNT]), int(h[_HEAD])
+        if count:
+            start = int(np.searchsorted(times, h[_LAST_TIME], side='left'))
+        else:
+            start = 0
+        times, values = times[start:], values[start:]
+        if len(times) == 0:
+            return 0
+
+        written = 0
+        h[_SEQ] += 1  # เลขคี่ = กำลังเขียน
+        try:
+            # แท่งที่กำลังก่อตัว (เวลาเดียวกับแท่งล่าสุด) - เขียนทับ slot เดิม
+            if count and times[0] == h[_LAST_TIME]:
+                slot = (head - 1) % self.capacity
+                self.data[:, slot] = values[0]
+                times, values = times[1:], values[1:]
+                written += 1
+
+            if len(times) > self.capacity:
+                times, values = times[-self.capacity:], values[-self.capacity:]
+            if len(times):
+                slots = (head + np.arange(len(times))) % self.capacity
+                self.times[slots] = times
+                self.data[:, slots] = values.T
+                h[_HEAD] = (head + len(times)) % self.capacity
+                h[_COUNT] = min(count + len(times), self.capacity)
+                h[_LAST_TIME] = times[-1]
+                written += len(times)
+        finally:
+            h[_SEQ] += 1  # เลขคู่ = ข้อมูลสมบูรณ์
+        return written
+
+    def snapshot(self, last=None, retries=10000):
+        """
+        อ่านแท่งเรียงตามเวลาเป็น DataFrame (copy เฉพาะแถวที่ขอ)
+
+        Args:
+            last: จำนวนแท่งล่าสุดที่ต้องการ (None = ทั้งหมดใน ring)
+        """
+        h = self.header
+        for _ in range(retries):
+            seq = h[_SEQ]
+            if seq & 1:
+                time.sleep(0)
+                continue
+
+            count, head = int(h[_COUNT]), int(h[_HEAD])
+            n = count if last is None else min(last, count)
+            idx = (head - n + np.arange(n)) % self.capacity
+            times = self.times[idx]
+            data = self.data[:, idx]
+
+            if h[_SEQ] == seq:
+                df = pd.DataFrame(data.T, columns=list(self.columns))
+                df.insert(0, 'time', pd.to_datetime(times, unit='ns'))  # UTC แบบ naive เหมือน download_bars
+                return df
+        raise TimeoutError("Market bus is being written continuously - snapshot failed")
+
+    def wait_for_update(self, seq, timeout=None, poll=0.05):
+        """รอจน seq เปลี่ยนจากค่าที่ให้มา - คืน True ถ้ามีข้อมูลใหม่"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.seq == seq:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self):
+        """ปล่อย mapping (feeder จะลบ segment ด้วย)"""
+        self.header = self.times = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def run_feeder(name=None, interval=FEED_INTERVAL, days_back=90):
+    """Data feeder loop - ดาวน์โหลด + คำนวณ indicators ครั้งเดียว แล้ว publish ให้ทุก process"""
+    from market_data import download_bars
+    from strategy import calculate_indicators
+
+    name = name or default_bus_name()
+    bus = MarketBus.create(name)
+    running = True
+
+    def stop(sig, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"📡 Market Data Feeder: {SYMBOL} {TIMEFRAME} -> shared memory '{name}'")
+    if not MARKET_BUS:
+        print(f"💡 ตั้ง MARKET_BUS={name} ใน .env เพื่อให้ strategy อ่านจาก feeder นี้")
+
+    try:
+        while running:
+            df = download_bars(SYMBOL, TIMEFRAME, days_back)
+            if df is not None and len(df) > 0:
+                written = bus.publish(calculate_indicators(df))
+                log.info(f"Published {written} bars (seq={bus.seq}, size={len(bus)})")
+            else:
+                log.error("ไม่สามารถดึงข้อมูลได้")
+
+            deadline = time.monotonic() + interval
+            while running and time.monotonic() < deadline:
+                time.sleep(0.5)
+    finally:
+        bus.close()
+        print("🛑 Market Data Feeder หยุดทำงาน")
+
+if __name__ == "__main__":
+    run_feeder()
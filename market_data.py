@@ -0,0 +1,91 @@
+"""
+📥 Market Data
+ดึงข้อมูลราคาจาก Yahoo Finance ในรูปแบบคอลัมน์ที่ strategy ใช้ (time, open, high, low, close, volume)
+DATA_SOURCE=synthetic ใช้ข้อมูลจำลอง (synthetic.py) แทน - ไม่ต้องต่อเน็ต
+ทุกชุดผ่าน data_quality.clean_bars (คอลัมน์ตามชื่อ, ตัดซ้ำ/spike/roll, รายงาน gap) ก่อนคืนค่า
+"""
+
+from datetime import datetime, timedelta
+import pandas as pd
+from config import DATA_SOURCE, TF_MAP
+from data_quality import clean_bars, log_report
+from utils.logger import get_logger
+
+log = get_logger("market_data")
+
+def yahoo_symbol(symbol: str):
+    """แปลงชื่อ symbol ของ MT5 เป็น ticker ของ Yahoo"""
+    if symbol == "XAUUSD":
+        return "GC=F"
+    elif symbol == "EURUSD":
+        return "EURUSD=X"
+    return f"{symbol}=X"
+
+def yahoo_interval(timeframe: str):
+    """interval ของ Yahoo ที่ใช้กับ TIMEFRAME (H4 ดึง 1h แล้ว resample)"""
+    if timeframe in ["M1", "M5", "M15", "M30"]:
+        return "5m" if timeframe in ["M1", "M5"] else "15m" if timeframe == "M15" else "30m"
+    elif timeframe in ["H1", "H4"]:
+        return "1h"
+    return "1d"
+
+def interval_minutes(interval: str):
+    """ความยาวแท่งของ interval แบบ Yahoo เป็นนาที (5m, 1h, 1d)"""
+    return int(interval[:-1]) * {'m': 1, 'h': 60, 'd': 1440}[interval[-1]]
+
+def download_bars(symbol: str, timeframe: str, days_back=60):
+    """ดึงข้อมูลล่าสุดตาม TIMEFRAME - คืน DataFrame หรือ None"""
+    if DATA_SOURCE == "synthetic":
+        from synthetic import synthetic_history
+        df, report = clean_bars(synthetic_history(symbol, timeframe, days_back), TF_MAP[timeframe])
+        log_report(f"{symbol} {timeframe}", report)
+        return df
+
+    import yfinance as yf  # import ตอนใช้งาน - ลดเวลา startup
+
+    try:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        interval = yahoo_interval(timeframe)
+
+        data = yf.download(yahoo_symbol(symbol), start=start_date, end=end_date, interval=interval)
+
+        if data.empty:
+            return None
+
+        # ตรวจ/ซ่อมที่ interval ดิบก่อน resample (yfinance อาจคืนคอลัมน์ MultiIndex เรียงตามตัวอักษร)
+        df, report = clean_bars(data, interval_minutes(interval))
+        log_report(f"{symbol} {interval}", report)
+
+        # Resample เป็น H4 ถ้าจำเป็น
+        if timeframe == "H4" and interval == "1h":
+            df = df.set_index('time')
+            df_4h = df.resample('4h').agg({
+                'open': 'first',
+                'high': 'max',
+                'low': 'min',
+                'close': 'last',
+                'volume': 'sum'
+            }).dropna().reset_index()
+            df = df_4h
+
+        return df
+
+    except Exception as e:
+        log.error(f"Error getting data: {e}")
+        return None
+
+def merge_bars(cached, fresh, keep=None):
+    """
+    ต่อแท่งใหม่เข้ากับแท่งที่ cache ไว้ (เวลาซ้ำใช้ค่าจาก fresh - แท่งที่กำลังก่อตัวจะถูกแทนที่)
+    keep: จำนวนแท่งล่าสุดที่เก็บ (None = ทั้งหมด)
+    """
+    if cached is None or cached.empty:
+        df = fresh
+    elif fresh is None or fresh.empty:
+        df = cached
+    else:
+        df = pd.concat([cached[cached['time'] < fresh['time'].iloc[0]], fresh], ignore_index=True)
+    if df is None:
+        return None
+    return (df.tail(keep) if keep else df).reset_index(drop=True)
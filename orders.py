@@ -0,0 +1,158 @@
+"""
+📐 Order Construction
+คำนวณ lot จากความเสี่ยงด้วยข้อมูล symbol_info ของ broker (cache ไว้) แล้วปัดและตรวจ order ในเครื่อง
+ก่อน order_send - กัน reject จาก volume/stops ไม่ถูกต้องที่เสีย round trip และพลาดจุดเข้า
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from utils.logger import get_logger
+
+log = get_logger("orders")
+
+# ค่าคงที่ของ MetaTrader5
+ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN = 0, 1, 2
+SYMBOL_FILLING_FOK, SYMBOL_FILLING_IOC = 1, 2
+
+@dataclass(frozen=True)
+class SymbolSpec:
+    """ข้อจำกัดของ symbol ที่ใช้สร้าง order (จาก mt5.symbol_info)"""
+    name: str
+    digits: int
+    point: float
+    tick_size: float
+    tick_value: float      # $ ต่อ 1 lot เมื่อราคาขยับ 1 tick_size
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    stops_level: int = 0   # ระยะ SL/TP ขั้นต่ำจากราคา (points)
+    freeze_level: int = 0  # ห้ามแก้ SL/TP เมื่อราคาอยู่ใกล้กว่านี้ (points)
+    filling_mode: int = SYMBOL_FILLING_IOC
+
+    @classmethod
+    def from_info(cls, info):
+        return cls(
+            name=info.name, digits=info.digits, point=info.point,
+            tick_size=info.trade_tick_size or info.point, tick_value=info.trade_tick_value,
+            volume_min=info.volume_min, volume_max=info.volume_max, volume_step=info.volume_step,
+            stops_level=info.trade_stops_level, freeze_level=info.trade_freeze_level,
+            filling_mode=info.filling_mode,
+        )
+
+    @property
+    def min_stop_distance(self):
+        """ระยะ SL/TP ขั้นต่ำจากราคา (หน่วยราคา) - ใช้ค่ามากกว่าระหว่าง stops_level กับ freeze_level"""
+        return max(self.stops_level, self.freeze_level) * self.point
+
+    def normalize_price(self, price):
+        """ปัดราคาให้ตรง tick_size และจำนวนทศนิยมของ symbol"""
+        return round(round(price / self.tick_size) * self.tick_size, self.digits)
+
+    def round_volume(self, volume):
+        """ปัด lot ลงให้ตรง volume_step (ไม่ปัดขึ้น - ความเสี่ยงจริงไม่เกินที่คำนวณ) และไม่เกิน volume_max"""
+        decimals = max(0, -int(math.floor(math.log10(self.volume_step))))
+        steps = math.floor(volume / self.volume_step + 1e-9)
+        return round(min(steps * self.volume_step, self.volume_max), decimals)
+
+    def loss_per_lot(self, entry, sl):
+        """ขาดทุนเป็น $ ต่อ 1 lot เมื่อโดน SL"""
+        return abs(entry - sl) / self.tick_size * self.tick_value
+
+    def filling_type(self):
+        """โหมด filling ที่ symbol รองรับ (IOC > FOK > RETURN)"""
+        if self.filling_mode & SYMBOL_FILLING_IOC:
+            return ORDER_FILLING_IOC
+        if self.filling_mode & SYMBOL_FILLING_FOK:
+            return ORDER_FILLING_FOK
+        return ORDER_FILLING_RETURN
+
+class SymbolSpecCache:
+    """
+    Cache ของ SymbolSpec ต่อ symbol (symbol_info ถามครั้งเดียวต่อ ttl วินาที)
+
+    Args:
+        source: module MetaTrader5 (หรือ object ที่มี symbol_info)
+    """
+
+    def __init__(self, source, ttl=3600):
+        self.source = source
+        self.ttl = ttl
+        self.specs = {}
+
+    def get(self, symbol):
+        cached = self.specs.get(symbol)
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        info = self.source.symbol_info(symbol)
+        if info is None:
+            log.error(f"symbol_info failed for {symbol}")
+            return cached[0] if cached else None
+        spec = SymbolSpec.from_info(info)
+        self.specs[symbol] = (spec, time.monotonic())
+        return spec
+
+    def invalidate(self, symbol=None):
+        if symbol is None:
+            self.specs.clear()
+        else:
+            self.specs.pop(symbol, None)
+
+def size_from_risk(spec, entry, sl, risk_amount, max_lot=None):
+    """
+    Lot ที่ขาดทุนไม่เกิน risk_amount ($) เมื่อโดน SL - ปัดลงตาม volume_step
+    คืน 0 ถ้าแม้ volume_min ก็เสี่ยงเกิน risk_amount
+    """
+    loss = spec.loss_per_lot(entry, sl)
+    if loss <= 0 or risk_amount <= 0:
+        return 0.0
+    lot = risk_amount / loss
+    if max_lot is not None:
+        lot = min(lot, max_lot)
+    lot = spec.round_volume(lot)
+    return lot if lot >= spec.volume_min else 0.0
+
+def close_price(is_buy, bid, ask):
+    """ราคาที่ position จะปิด - MT5 ตรวจ SL/TP ของ buy กับ Bid และของ sell กับ Ask"""
+    return bid if is_buy else ask
+
+def fit_stops(spec, is_buy, bid, ask, sl, tp):
+    """
+    เลื่อน SL/TP ออกให้ห่างจากราคาปิดของ position (buy = Bid, sell = Ask) อย่างน้อย stops_level (+1 point)
+    และปัดราคา (SL ที่ถูกเลื่อนจะถูกใช้คำนวณ lot ต่อ - ความเสี่ยงเป็น $ ยังเท่าเดิม)
+    """
+    price = close_price(is_buy, bid, ask)
+    gap = spec.min_stop_distance + spec.point
+    if sl:
+        sl = min(sl, price - gap) if is_buy else max(sl, price + gap)
+        sl = spec.normalize_price(sl)
+    if tp:
+        tp = max(tp, price + gap) if is_buy else min(tp, price - gap)
+        tp = spec.normalize_price(tp)
+    return sl, tp
+
+def validate_order(spec, is_buy, volume, bid, ask, sl=0.0, tp=0.0):
+    """ตรวจ order ในเครื่องก่อนส่ง (SL/TP เทียบกับราคาปิดของ position เหมือน MT5) - คืนรายการปัญหา (ว่าง = ผ่าน)"""
+    problems = []
+    if volume < spec.volume_min or volume > spec.volume_max:
+        problems.append(f"volume {volume} นอกช่วง {spec.volume_min}-{spec.volume_max}")
+    elif abs(volume / spec.volume_step - round(volume / spec.volume_step)) > 1e-6:
+        problems.append(f"volume {volume} ไม่ตรง step {spec.volume_step}")
+
+    price = close_price(is_buy, bid, ask)
+    min_distance = spec.min_stop_distance
+    for name, level, wrong_side in (('SL', sl, (sl >= price) if is_buy else (sl <= price)),
+                                    ('TP', tp, (tp <= price) if is_buy else (tp >= price))):
+        if not level:
+            continue
+        if wrong_side:
+            problems.append(f"{name} {level} อยู่ผิดฝั่งของราคา {price}")
+        elif abs(price - level) < min_distance:
+            problems.append(f"{name} ห่างราคา {abs(price - level):.{spec.digits}f} < ขั้นต่ำ {min_distance:.{spec.digits}f}")
+    return problems
+
+def can_modify_stop(spec, is_buy, current_price, new_sl):
+    """แก้ SL ได้หรือไม่ (ไม่อยู่ใน freeze/stops level ของราคาปัจจุบัน)"""
+    if (new_sl >= current_price) if is_buy else (new_sl <= current_price):
+        return False
+    return abs(current_price - new_sl) >= spec.min_stop_distance
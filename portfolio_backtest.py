@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+🌐 Portfolio Backtest
+รัน Golden Trend หลาย symbols บนบัญชีเดียว (balance ร่วมกัน)
+- indicators, สัญญาณ และจุดชน SL/TP ของแต่ละ symbol คำนวณขนานกันใน worker processes
+- รวมสัญญาณทุก symbol ตามลำดับเวลาด้วย heap event loop เดียว
+- จำกัดจำนวน position รวม/ต่อ symbol, ความเสี่ยงรวม และ position ที่ correlate กันในทิศเดียวกัน
+"""
+
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from config import (PORTFOLIO_SYMBOLS, PORTFOLIO_TIMEFRAME, PORTFOLIO_MAX_POSITIONS, PORTFOLIO_MAX_PER_SYMBOL,
+                    PORTFOLIO_MAX_RISK, CORR_THRESHOLD, CORR_MAX_POSITIONS, CORR_WINDOW,
+                    RISK_PERCENT, BACKTEST_DAYS, BACKTEST_WORKERS, INTRABAR_EXIT_RULE)
+from strategy import calculate_indicators, trade_candidates
+from instruments import instrument
+from costs import CostModel
+from market_data import download_bars
+from utils.logger import get_logger
+
+log = get_logger("portfolio_backtest")
+
+WARMUP_BARS = 200        # แท่งแรกที่ indicator ครบ (เหมือน golden_backtest)
+_EXIT, _ENTRY = 0, 1     # ที่เวลาเดียวกัน ปิด position ก่อนเปิดใหม่
+
+@dataclass(frozen=True)
+class PortfolioLimits:
+    """ข้อจำกัดความเสี่ยงระดับพอร์ต"""
+    max_positions: int = PORTFOLIO_MAX_POSITIONS
+    max_per_symbol: int = PORTFOLIO_MAX_PER_SYMBOL
+    max_risk_pct: float = PORTFOLIO_MAX_RISK
+    corr_threshold: float = CORR_THRESHOLD
+    max_correlated: int = CORR_MAX_POSITIONS
+    corr_window: int = CORR_WINDOW
+
+@dataclass
+class SymbolBook:
+    """ผลการเตรียมข้อมูลของ symbol เดียว (ส่งกลับจาก worker) - candidates เรียงตามเวลา"""
+    symbol: str
+    times: np.ndarray       # เวลาแท่ง (int64 ns, UTC)
+    close: np.ndarray
+    bar: np.ndarray         # index แท่งที่เข้า
+    is_buy: np.ndarray
+    entry: np.ndarray
+    sl: np.ndarray
+    tp: np.ndarray
+    exit_bar: np.ndarray
+    exit_code: np.ndarray   # EXIT_NONE = ยังไม่ปิดจนจบข้อมูล (ปิดที่ราคาปิดแท่งสุดท้าย)
+    exit_price: np.ndarray
+    cost: np.ndarray        # ต้นทุน $ ต่อ lot (spread/commission/swap/slippage)
+
+def _time_ns(times):
+    """แปลงเวลาเป็น int64 nanoseconds (UTC) - เวลาแบบ naive ถือเป็น UTC"""
+    times = pd.to_datetime(pd.Series(times))
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    return times.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def prepare_symbol(symbol, df=None, timeframe=PORTFOLIO_TIMEFRAME, days=BACKTEST_DAYS,
+                   params=None, costs=None, exit_rule=INTRABAR_EXIT_RULE):
+    """ดึงข้อมูล (ถ้าไม่ส่ง df มา) คำนวณ indicators, สัญญาณ, จุดปิด และต้นทุนของทุก candidate - รันใน worker"""
+    if df is None:
+        df = download_bars(symbol, timeframe, days)
+        if df is None or len(df) <= WARMUP_BARS:
+            log.warning(f"{symbol}: ข้อมูลไม่เพียงพอ - ข้าม")
+            return None
+
+    df = calculate_indicators(df.reset_index(drop=True), params)
+    c = trade_candidates(df, exit_rule=exit_rule, warmup=WARMUP_BARS)
+    times = _time_ns(df['time'])
+    cost = (costs or CostModel.from_config()).per_lot(symbol, c['is_buy'], times[c['bar']],
+                                                     times[c['exit_bar']], c['entry'])['total']
+
+    return SymbolBook(symbol, times, df['close'].to_numpy(dtype=float), c['bar'], c['is_buy'], c['entry'],
+                      c['sl'], c['tp'], c['exit_bar'], c['exit_code'], c['exit_price'], cost)
+
+def _prepare_job(job):
+    return prepare_symbol(*job)
+
+def align_closes(books):
+    """รวม close ของทุก symbol บน timeline เดียวกัน (ffill ช่วงที่ symbol ไม่มีแท่ง)"""
+    timeline = np.unique(np.concatenate([b.times for b in books]))
+    closes = np.full((len(timeline), len(books)), np.nan)
+    rows = []
+    for s, b in enumerate(books):
+        pos = np.searchsorted(timeline, b.times)
+        closes[pos, s] = b.close
+        rows.append(pos)
+    closes = pd.DataFrame(closes).ffill().to_numpy()
+    return timeline, closes, rows
+
+def correlation_checkpoints(timeline, closes, window):
+    """
+    Correlation ของ log returns ย้อนหลัง window แท่ง คำนวณเป็นช่วงๆ (ใช้เฉพาะข้อมูลก่อนหน้า - ไม่มี lookahead)
+
+    Returns:
+        (times, corr): corr[k] ใช้ได้ตั้งแต่เวลา times[k]
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.diff(np.log(closes), axis=0)  # returns[i] = จาก close[i] ถึง close[i + 1]
+    step = max(1, window // 10)
+    ends = np.arange(window, len(timeline), step)  # checkpoint ที่ close[end] ใช้ returns ถึงแท่งนั้น
+    corr = np.empty((len(ends), closes.shape[1], closes.shape[1]))
+    for k, end in enumerate(ends):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr[k] = np.corrcoef(returns[end - window:end].T)
+    corr = np.nan_to_num(corr)  # symbol ที่ข้อมูลยังไม่ครบ window ถือว่าไม่ correlate
+    return timeline[ends], corr
+
+class PortfolioBacktest:
+    def __init__(self, symbols=None, initial_balance=10000, timeframe=PORTFOLIO_TIMEFRAME, days=BACKTEST_DAYS,
+                 limits=None, risk_pct=RISK_PERCENT, workers=BACKTEST_WORKERS, params=None, costs=None):
+        self.symbols = list(symbols or PORTFOLIO_SYMBOLS)
+        self.instruments = {s: instrument(s) for s in self.symbols}  # ขนาดสัญญาต่อ symbol ($ ต่อ lot)
+        self.initial_balance = initial_balance
+        self.timeframe = timeframe
+        self.days = days
+        self.limits = limits or PortfolioLimits()
+        self.risk_pct = risk_pct
+        self.workers = workers or os.cpu_count() or 1
+        self.params = params
+        self.costs = costs or CostModel.from_config()
+        self.books = []
+        self.trades = None
+        self.equity = None
+        self.skipped = {}
+
+    def prepare(self, frames=None):
+        """เตรียมทุก symbol ขนานกันใน worker processes (frames = {symbol: DataFrame} ถ้ามีข้อมูลแล้ว)"""
+        frames = frames or {}
+        jobs = [(s, frames.get(s), self.timeframe, self.days, self.params, self.costs) for s in self.symbols]
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                books = list(pool.map(_prepare_job, jobs))
+        else:
+            books = [_prepare_job(job) for job in jobs]
+        self.books = [b for b in books if b is not None]
+        return self.books
+
+    def run(self, frames=None):
+        """รัน backtest ทั้งพอร์ต - คืน DataFrame ของ trades"""
+        started = time.perf_counter()
+        books = self.prepare(frames)
+        if not books:
+            print("❌ ไม่มีข้อมูลสำหรับ symbol ใดเลย")
+            return None
+        log.info(f"Prepared {len(books)} symbols in {time.perf_counter() - started:.1f}s")
+
+        specs = [self.instruments[b.symbol] for b in books]
+        timeline, closes, rows = align_closes(books)
+        corr_times, corr = correlation_checkpoints(timeline, closes, self.limits.corr_window)
+
+        # แปลงเป็น list ครั้งเดียว - loop ด้านล่างเข้าถึงทีละตัว
+        cols = [{name: getattr(b, name).tolist() for name in
+                 ('times', 'bar', 'is_buy', 'entry', 'sl', 'tp', 'exit_bar', 'exit_code', 'exit_price', 'cost')}
+                for b in books]
+
+        heap = [(c['times'][c['bar'][0]], _ENTRY, s, 0) for s, c in enumerate(cols) if c['bar']]
+        heapq.heapify(heap)
+
+        limits = self.limits
+        balance = self.initial_balance
+        open_positions = {}          # (symbol index, candidate index) -> position
+        per_symbol = [0] * len(books)
+        open_risk = 0.0
+        trades = []
+        skipped = {'max_positions': 0, 'max_per_symbol': 0, 'max_risk': 0, 'correlation': 0}
+
+        while heap:
+            t, kind, s, k = heapq.heappop(heap)
+            c = cols[s]
+
+            if kind == _EXIT:
+                pos = open_positions.pop((s, k))
+                move = (pos['exit_price'] - pos['entry_price']) * pos['direction']
+                gross = specs[s].usd_per_lot(move, pos['exit_price']) * pos['lot_size']
+                pnl = gross - pos['costs']
+                balance += pnl
+                per_symbol[s] -= 1
+                open_risk -= pos['risk']
+                pos.update(exit_time=t, gross_pnl=gross, pnl=pnl, balance=balance)
+                trades.append(pos)
+                continue
+
+            # candidate ถัดไปของ symbol นี้
+            if k + 1 < len(c['bar']):
+                heapq.heappush(heap, (c['times'][c['bar'][k + 1]], _ENTRY, s, k + 1))
+
+            if len(open_positions) >= limits.max_positions:
+                skipped['max_positions'] += 1
+                continue
+            if per_symbol[s] >= limits.max_per_symbol:
+                skipped['max_per_symbol'] += 1
+                continue
+
+            direction = 1 if c['is_buy'][k] else -1
+            if open_positions and self._correlated(s, direction, t, open_positions, corr_times, corr):
+                skipped['correlation'] += 1
+                continue
+
+            entry, sl = c['entry'][k], c['sl'][k]
+            lot = specs[s].position_size(entry, sl, self.risk_pct, balance)
+            risk = lot * specs[s].usd_per_lot(abs(entry - sl), entry)
+            if (open_risk + risk) / balance * 100 > limits.max_risk_pct:
+                skipped['max_risk'] += 1
+                continue
+
+            open_positions[(s, k)] = {
+                'symbol': books[s].symbol,
+                'symbol_index': s,
+                'action': 'BUY' if direction > 0 else 'SELL',
+                'direction': direction,
+                'time': t,
+                'entry_bar': c['bar'][k],
+                'exit_bar': c['exit_bar'][k],
+                'entry_price': entry,
+                'sl_price': sl,
+                'tp_price': c['tp'][k],
+                'exit_price': c['exit_price'][k],
+                'exit_code': c['exit_code'][k],
+                'lot_size': lot,
+                'costs': c['cost'][k] * lot,
+                'risk': risk,
+            }
+            per_symbol[s] += 1
+            open_risk += risk
+            heapq.heappush(heap, (c['times'][c['exit_bar'][k]], _EXIT, s, k))
+
+        self.skipped = skipped
+        self.trades = pd.DataFrame(trades)
+        if not self.trades.empty:
+            self.trades['time'] = pd.to_datetime(self.trades['time'])
+            self.trades['exit_time'] = pd.to_datetime(self.trades['exit_time'])
+        self.equity = self.equity_curve(timeline, closes, rows)
+        log.info(f"Portfolio backtest finished in {time.perf_counter() - started:.1f}s ({len(trades)} trades)")
+        return self.trades
+
+    def _correlated(self, s, direction, t, open_positions, corr_times, corr):
+        """True ถ้ามี position ที่ correlate ทิศเดียวกันครบจำนวนที่อนุญาตแล้ว"""
+        k = np.searchsorted(corr_times, t, side='right') - 1
+        if k < 0:
+            return False  # ข้อมูลยังไม่พอคำนวณ correlation
+        row = corr[k, s]
+        same_risk = sum(1 for p in open_positions.values()
+                        if row[p['symbol_index']] * direction * p['direction'] >= self.limits.corr_threshold)
+        return same_risk >= self.limits.max_correlated
+
+    def equity_curve(self, timeline, closes, rows):
+        """Equity รวมทั้งพอร์ตทุกจุดเวลา (balance + กำไร/ขาดทุนที่ยังไม่ปิด) - คืน pd.Series"""
+        realized = np.zeros(len(timeline))
+        unrealized = np.zeros(len(timeline))
+        if self.trades is not None and not self.trades.empty:
+            for trade in self.trades.itertuples(index=False):
+                s = trade.symbol_index
+                spec = self.instruments[trade.symbol]
+                start, stop = rows[s][trade.entry_bar], rows[s][trade.exit_bar]
+                price = closes[start:stop, s]
+                unrealized[start:stop] += (spec.usd_per_lot((price - trade.entry_price) * trade.direction, price)
+                                           * trade.lot_size)
+                unrealized[start:stop] -= trade.costs
+                realized[stop] += trade.pnl
+        equity = self.initial_balance + np.cumsum(realized) + unrealized
+        return pd.Series(equity, index=pd.to_datetime(timeline), name='equity')
+
+    def show_results(self):
+        """แสดงผลลัพธ์ทั้งพอร์ตและราย symbol"""
+        if self.trades is None or self.trades.empty:
+            print("\n❌ ไม่มี Trade ใน Portfolio Backtest")
+            return
+
+        trades = self.trades
+        pnl = trades['pnl'].to_numpy()
+        wins = pnl > 0
+        total_profit = pnl[wins].sum()
+        total_loss = pnl[pnl < 0].sum()
+        profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
+        final_balance = self.initial_balance + pnl.sum()
+        net_profit = final_balance - self.initial_balance
+
+        equity = self.equity.to_numpy()
+        peak = np.maximum.accumulate(equity)
+        max_drawdown = ((peak - equity) / peak).max() * 100
+
+        print(f"""
+🌐 Portfolio Backtest Results
+=============================
+📊 Symbols: {len(self.books)} | Timeframe: {self.timeframe}
+📈 Trades: {len(trades)} | 🎯 Win Rate: {wins.mean() * 100:.1f}%
+💰 Final Balance: ${final_balance:,.2f} | Net P&L: ${net_profit:,.2f} ({net_profit / self.initial_balance * 100:+.2f}%)
+⚖️ Profit Factor: {profit_factor:.2f}
+💸 Costs: ${trades['costs'].sum():,.2f} (spread/commission/swap/slippage)
+📉 Max Drawdown (equity): {max_drawdown:.2f}%
+🚫 สัญญาณที่ถูกข้าม: {', '.join(f'{k}={v}' for k, v in self.skipped.items())}
+        """)
+
+        summary = trades.groupby('symbol').agg(trades=('pnl', 'size'), win_rate=('pnl', lambda p: (p > 0).mean() * 100),
+                                               pnl=('pnl', 'sum'))
+        print("📋 ราย Symbol:")
+        for symbol, row in summary.sort_values('pnl', ascending=False).iterrows():
+            print(f"   • {symbol}: {int(row['trades'])} trades, Win {row['win_rate']:.1f}%, ${row['pnl']:+,.2f}")
+
+def main():
+    backtest = PortfolioBacktest(initial_balance=10000)
+    print(f"""
+🌐 Golden Trend Portfolio Backtest
+==================================
+📊 Symbols: {', '.join(backtest.symbols)}
+📅 Period: {backtest.days} days ({backtest.timeframe})
+💰 Initial Balance: ${backtest.initial_balance:,.2f}
+🛡️ Risk per Trade: {backtest.risk_pct}% | Max Portfolio Risk: {backtest.limits.max_risk_pct}%
+⚙️ Workers: {backtest.workers}
+    """)
+    backtest.run()
+    backtest.show_results()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+🔬 Run Profiler
+เก็บ cProfile + stack แบบ sampling + tracemalloc ของการรันหนึ่งครั้ง (เปิดด้วย --profile เท่านั้น)
+- <name>_<เวลา>.prof       : cProfile (เปิดด้วย snakeviz / pstats)
+- <name>_<เวลา>.collapsed  : collapsed stacks (flamegraph.pl, speedscope, inferno)
+- <name>_<เวลา>.txt        : สรุปฟังก์ชันที่ใช้เวลามาก, เวลาใน calculate_indicators แยกตาม call ของ pandas,
+                             allocation มากสุด N อันดับ
+
+ไม่ได้ใส่ --profile = ไม่ import module นี้เลย (ไม่มี overhead)
+
+Usage:
+    python golden_backtest.py --profile
+    python golden_live_demo.py --profile      # Ctrl+C แล้วจึงเขียนผล
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from config import PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_TOP, PROFILE_TRACE_FRAMES
+from utils.logger import get_logger
+
+log = get_logger("profiler")
+
+# ฟังก์ชันที่ต้องการแยกเวลา/หน่วยความจำ (ไฟล์, ชื่อฟังก์ชัน)
+FOCUS = (('strategy.py', 'calculate_indicators'),)
+_LIBRARIES = ('pandas', 'numpy', 'numba')
+
+def short_path(filename):
+    """pandas/core/frame.py (ใน site-packages) หรือชื่อไฟล์ของโปรเจกต์"""
+    path = filename.replace(os.sep, '/')
+    if 'site-packages/' in path:
+        return path.rsplit('site-packages/', 1)[1]
+    return os.path.basename(path)
+
+def frame_label(code):
+    """ชื่อ frame แบบสั้น: pandas/core/frame.py:__setitem__ หรือ strategy.py:calculate_indicators"""
+    return f"{short_path(code.co_filename)}:{code.co_name}"
+
+def _is_focus(code):
+    return any(code.co_name == name and code.co_filename.endswith(filename) for filename, name in FOCUS)
+
+def _is_library(label):
+    return label.split('/', 1)[0] in _LIBRARIES
+
+class StackSampler(threading.Thread):
+    """
+    สุ่ม stack ของ thread เป้าหมายทุก interval วินาที (sys._current_frames) - นับเป็น collapsed stack
+    ไม่ขึ้นกับ cProfile จึงเห็นเวลาใน C extension (numpy/pandas) ตาม frame Python ที่เรียก
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+    def collapsed(self):
+        """บรรทัด 'root;...;leaf count' ต่อ stack"""
+        lines = Counter()
+        for stack, count in self.stacks.items():
+            lines[';'.join(frame_label(code) for code in stack)] += count
+        return [f"{stack} {count}" for stack, count in sorted(lines.items())]
+
+    def attribute(self):
+        """
+        sample ที่อยู่ใน FOCUS แยกตาม call แรกที่เข้า pandas/numpy ใต้ฟังก์ชันนั้น
+        คืน (จำนวน sample ทั้งหมด, sample ใน FOCUS, Counter ของ label → sample)
+        """
+        total = sum(self.stacks.values())
+        inside, calls = 0, Counter()
+        for stack, count in self.stacks.items():
+            start = next((i for i, code in enumerate(stack) if _is_focus(code)), None)
+            if start is None:
+                continue
+            inside += count
+            below = [frame_label(code) for code in stack[start + 1:]]
+            label = next((l for l in below if _is_library(l)), below[0] if below else '(self)')
+            calls[label] += count
+        return total, inside, calls
+
+def _focus_lines():
+    """ช่วงบรรทัดของฟังก์ชันใน FOCUS (สำหรับกรอง allocation ของ tracemalloc)"""
+    import inspect
+    import strategy
+    ranges = []
+    for filename, name in FOCUS:
+        func = getattr(strategy, name, None) if filename == 'strategy.py' else None
+        if func is not None:
+            lines, first = inspect.getsourcelines(func)
+            ranges.append((inspect.getsourcefile(func), first, first + len(lines) - 1))
+    return ranges
+
+def _focus_allocations(snapshot, top):
+    """
+    allocation ที่ค้างอยู่และเกิดภายใน FOCUS - แยกตามบรรทัดแรกที่เข้า pandas/numpy ใต้ฟังก์ชันนั้น
+    (ไม่มี = บรรทัดที่จองจริง)
+    """
+    ranges = _focus_lines()
+    sizes, total = Counter(), 0
+    for trace in snapshot.traces:
+        frames = list(trace.traceback)  # เก่าสุด → ใหม่สุด
+        start = next((i for i, frame in enumerate(frames)
+                      if any(frame.filename == path and first <= frame.lineno <= last
+                             for path, first, last in ranges)), None)
+        if start is None:
+            continue
+        below = [f"{short_path(frame.filename)}:{frame.lineno}" for frame in frames[start:]]
+        sizes[next((l for l in below[1:] if _is_library(l)), below[-1])] += trace.size
+        total += trace.size
+    return total, sizes.most_common(top)
+
+def _line(frame):
+    return f"{short_path(frame.filename)}:{frame.lineno}"
+
+def _mb(size):
+    return f"{size / 1024 ** 2:,.2f} MB"
+
+def write_report(path, name, elapsed, profile, sampler, snapshot, baseline, peak, top):
+    out = io.StringIO()
+    out.write(f"🔬 Profile: {name} ({elapsed:.2f}s, peak traced memory {_mb(peak)})\n\n")
+
+    out.write(f"=== cProfile: {top} ฟังก์ชันที่ใช้เวลาสะสมมากสุด ===\n")
+    stats = pstats.Stats(profile, stream=out).strip_dirs().sort_stats('cumulative')
+    stats.print_stats(top)
+    for _, func in FOCUS:
+        out.write(f"=== cProfile: call ที่ {func} เรียกตรงๆ ===\n")
+        stats.sort_stats('cumulative').print_callees(func)
+
+    total, inside, calls = sampler.attribute()
+    out.write(f"=== Sampling ({total} samples ทุก {sampler.interval * 1000:.0f} ms) ===\n")
+    for _, func in FOCUS:
+        share = inside / total * 100 if total else 0.0
+        out.write(f"{func}: {inside} samples ({share:.1f}% ของทั้งหมด)\n")
+    for label, count in calls.most_common(top):
+        out.write(f"  {count:>7}  {count / max(inside, 1) * 100:5.1f}%  {label}\n")
+
+    out.write(f"\n=== tracemalloc: {top} บรรทัดที่จองหน่วยความจำค้างมากสุดตอนจบ ===\n")
+    for stat in snapshot.statistics('lineno')[:top]:
+        out.write(f"  {_mb(stat.size):>12}  {stat.count:>8} blocks  {_line(stat.traceback[0])}\n")
+    out.write(f"\n=== tracemalloc: {top} บรรทัดที่เพิ่มขึ้นมากสุดระหว่างรัน ===\n")
+    for stat in snapshot.compare_to(baseline, 'lineno')[:top]:
+        out.write(f"  {stat.size_diff / 1024 ** 2:>+10,.2f} MB  {_line(stat.traceback[0])}\n")
+    for _, func in FOCUS:
+        size, lines = _focus_allocations(snapshot, top)
+        out.write(f"\n=== tracemalloc: จองภายใน {func} (ค้างตอนจบ {_mb(size)}) ===\n")
+        for line, line_size in lines:
+            out.write(f"  {_mb(line_size):>12}  {line}\n")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
+
+def run_profiled(func, name, *args, out_dir=PROFILE_DIR, interval_ms=PROFILE_INTERVAL_MS, top=PROFILE_TOP,
+                 frames=PROFILE_TRACE_FRAMES, **kwargs):
+    """
+    รัน func(*args, **kwargs) พร้อม cProfile, stack sampler และ tracemalloc แล้วเขียนผลลง out_dir
+    ผลถูกเขียนแม้ func จะ error หรือถูกหยุดด้วย Ctrl+C
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = os.path.join(out_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    tracemalloc.start(frames)
+    baseline = tracemalloc.take_snapshot()
+    sampler = StackSampler(threading.get_ident(), interval_ms / 1000)
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    sampler.start()
+    profile.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profile.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        profile.dump_stats(f"{prefix}.prof")
+        with open(f"{prefix}.collapsed", 'w', encoding='utf-8') as f:
+            f.write('\n'.join(sampler.collapsed()) + '\n')
+        write_report(f"{prefix}.txt", name, elapsed, profile, sampler, snapshot, baseline, peak, top)
+        log.info(f"🔬 Profile saved: {prefix}.txt / .collapsed / .prof")
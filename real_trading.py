@@ -5,16 +5,44 @@
 """
 
 import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
+import sys
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from config import *
-from strategy import ema_strategy
-from risk import check_daily_limits, calculate_position_size
+from strategy import ema_strategy, calculate_indicators
+from trade_management import manage_stops, should_modify, DEFAULT_RULES as MANAGEMENT_RULES
+from risk import check_daily_limits, today_bounds_utc
+from orders import SymbolSpecCache, size_from_risk, fit_stops, validate_order, can_modify_stop
+from sessions import get_calendar
+from ticks import TickFeed
+from bar_store import BAR_DTYPE, to_frame
+from reconcile import Reconciler
+from signal_gate import SignalGate, SIGNAL_DIRECTION
+from service import install_shutdown, save_state, load_state, EXIT_CONFIG
 from utils.logger import get_logger
 
 log = get_logger("real_trading")
 
+STATE_NAME = "real_trading"
+
+# SIGTERM/SIGINT → ออกจาก loop แล้วบันทึก state (ทุก sleep รอบนี้ event จึงหยุดได้ทันที)
+stopping = threading.Event()
+
+# tickets ที่ปิดบางส่วน (partial TP) ไปแล้ว
+partial_closed = set()
+
+# mirror ของ position ของบอท (bootstrap หลังเชื่อมต่อ MT5)
+book = Reconciler(mt5, MAGIC, SYMBOL, full_interval=RECONCILE_FULL_INTERVAL)
+
+# edge + cooldown ของสัญญาณ นับเป็นแท่ง (กฎเดียวกับ backtest)
+gate = SignalGate()
+
+# ข้อจำกัดของ symbol (volume step/min/max, stops/freeze level, tick value) - ถาม broker ชั่วโมงละครั้ง
+specs = SymbolSpecCache(mt5)
+
 def initialize_mt5():
     """เชื่อมต่อ MT5"""
     if not mt5.initialize():
@@ -36,23 +64,54 @@ def initialize_mt5():
     log.info(f"Connected to {account_info.name}, Balance: {account_info.balance}")
     return True
 
-def place_order(symbol, order_type, lot, sl, tp):
-    """วางออเดอร์"""
+def today_pnl():
+    """กำไร/ขาดทุนที่ปิดแล้ววันนี้ของบอท (profit + commission + swap จาก deal history)"""
+    start, _ = today_bounds_utc()
+    deals = mt5.history_deals_get(start, datetime.now(timezone.utc) + timedelta(days=1)) or ()
+    return sum(d.profit + d.commission + d.swap for d in deals if d.magic == MAGIC)
+
+def place_order(symbol, order_type, sl, tp, settings):
+    """
+    วางออเดอร์ - lot คำนวณจาก RISK_PERCENT ของ balance ด้วยข้อมูล symbol ของ broker (ไม่เกิน LOT)
+    ปรับ SL/TP ให้ผ่าน stops_level และตรวจ order ในเครื่องก่อนส่ง
+    """
+    account = mt5.account_info()
+    if account is None:
+        log.error("Failed to get account info")
+        return False
+    
     # ตรวจสอบ Risk Management ก่อน
-    if not check_daily_limits():
-        log.warning("Daily limits reached - No new trades")
+    pnl = today_pnl()
+    allowed, reason = check_daily_limits(pnl, account.balance - pnl, settings)
+    if not allowed:
+        log.warning(f"{reason} - No new trades")
+        return False
+    
+    spec = specs.get(symbol)
+    if spec is None:
         return False
     
-    # คำนวณขนาด Position
-    position_size = calculate_position_size(symbol, sl)
+    is_buy = order_type == mt5.ORDER_TYPE_BUY
+    tick = mt5.symbol_info_tick(symbol)
+    price = tick.ask if is_buy else tick.bid
     
-    point = mt5.symbol_info(symbol).point
-    price = mt5.symbol_info_tick(symbol).ask if order_type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(symbol).bid
+    # คำนวณขนาด Position จากระยะ SL จริง (หลังเลื่อนให้ผ่าน stops_level)
+    sl, tp = fit_stops(spec, is_buy, tick.bid, tick.ask, sl, tp)
+    risk_amount = account.balance * settings.RISK_PERCENT / 100
+    lot = size_from_risk(spec, price, sl, risk_amount, max_lot=settings.LOT)
+    if not lot:
+        log.warning(f"Risk ${risk_amount:.2f} ไม่พอสำหรับ volume ขั้นต่ำ {spec.volume_min} - ข้าม order")
+        return False
+    
+    problems = validate_order(spec, is_buy, lot, tick.bid, tick.ask, sl, tp)
+    if problems:
+        log.error(f"Order rejected locally: {'; '.join(problems)}")
+        return False
     
     request = {
         "action": mt5.TRADE_ACTION_DEAL,
         "symbol": symbol,
-        "volume": position_size,
+        "volume": lot,
         "type": order_type,
         "price": price,
         "sl": sl,
@@ -61,19 +120,272 @@ def place_order(symbol, order_type, lot, sl, tp):
         "magic": MAGIC,
         "comment": "EMA Strategy Bot",
         "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_IOC,
+        "type_filling": spec.filling_type(),
     }
     
     result = mt5.order_send(request)
-    if result.retcode != mt5.TRADE_RETCODE_DONE:
-        log.error(f"Order failed: {result.comment}")
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        log.error(f"Order failed: {result.comment if result else mt5.last_error()}")
+        if result is not None and result.retcode in (mt5.TRADE_RETCODE_INVALID_VOLUME, mt5.TRADE_RETCODE_INVALID_STOPS):
+            specs.invalidate(symbol)  # ข้อจำกัดของ broker อาจเปลี่ยน - ดึงใหม่รอบหน้า
         return False
     
-    log.info(f"Order successful: {result.order}")
+    log.info(f"Order successful: {result.order} ({lot} lot, risk ${lot * spec.loss_per_lot(price, sl):.2f})")
+    book.expect(result, request)
+    sync_positions()
     return True
 
+def close_partial_position(position, spec):
+    """ปิดบางส่วนของ position ตาม PARTIAL_TP_FRACTION"""
+    volume = spec.round_volume(position.volume * MANAGEMENT_RULES.partial_fraction)
+    if volume < spec.volume_min or volume >= position.volume:
+        return False
+    
+    is_buy = position.type == mt5.POSITION_TYPE_BUY
+    tick = mt5.symbol_info_tick(SYMBOL)
+    request = {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": SYMBOL,
+        "position": position.ticket,
+        "volume": volume,
+        "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+        "price": tick.bid if is_buy else tick.ask,
+        "deviation": MAX_SLIPPAGE,
+        "magic": MAGIC,
+        "comment": "Partial TP",
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": spec.filling_type(),
+    }
+    result = mt5.order_send(request)
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        log.error(f"Partial close failed: {result.comment if result else mt5.last_error()}")
+        return False
+    
+    log.info(f"✅ Partial TP #{position.ticket}: closed {volume:.2f} lot")
+    return True
+
+def manage_open_positions(df, ring=None):
+    """
+    Trailing stop / break-even / partial TP - ส่ง TRADE_ACTION_SLTP เฉพาะเมื่อ SL ขยับ >= SLTP_STEP_POINTS
+    ring: TickRing (ถ้ามี) ใช้ราคา tick ตั้งแต่เปิด position หาราคาที่ดีที่สุดภายในแท่งที่ยังไม่ปิด
+    """
+    if not MANAGEMENT_RULES.enabled or not book.count(SYMBOL):
+        return
+    
+    positions = [p for p in (mt5.positions_get(symbol=SYMBOL) or []) if p.magic == MAGIC]
+    if not positions:
+        return
+    
+    spec = specs.get(SYMBOL)
+    if spec is None:
+        return
+    atr = calculate_indicators(df)['atr'].iloc[-1]
+    min_step = MANAGEMENT_RULES.sltp_step_points * spec.point
+    
+    for position in positions:
+        is_buy = position.type == mt5.POSITION_TYPE_BUY
+        
+        # ราคาที่ดีที่สุดตั้งแต่เปิด position (จากแท่งย้อนหลัง + ราคาปัจจุบัน) - tick ใช้ราคาที่ปิดได้จริง (BUY ปิดที่ bid, SELL ที่ ask)
+        since_open = df[df['time'] >= pd.to_datetime(position.time, unit='s')]
+        if is_buy:
+            best = max(since_open['high'].max(), position.price_current) if len(since_open) else position.price_current
+        else:
+            best = min(since_open['low'].min(), position.price_current) if len(since_open) else position.price_current
+        if ring is not None:
+            ticks = ring.since(position.time_msc)
+            if len(ticks):
+                best = max(best, ticks['bid'].max()) if is_buy else min(best, ticks['ask'].min())
+        
+        result = manage_stops(
+            is_buy=[is_buy],
+            entry=[position.price_open],
+            sl=[position.sl or np.nan],
+            atr=[atr],
+            best=[best],
+            bar_high=best,
+            bar_low=best,
+            partial_done=[position.ticket in partial_closed],
+            rules=MANAGEMENT_RULES,
+        )
+        
+        if result['partial'][0] and close_partial_position(position, spec):
+            partial_closed.add(position.ticket)
+        
+        new_sl = float(result['sl'][0])
+        if np.isnan(new_sl):
+            continue
+        new_sl = spec.normalize_price(new_sl)
+        if not should_modify(position.sl, new_sl, is_buy, min_step):
+            continue
+        if not can_modify_stop(spec, is_buy, position.price_current, new_sl):
+            continue  # อยู่ใน stops/freeze level - broker จะ reject
+        
+        request = {
+            "action": mt5.TRADE_ACTION_SLTP,
+            "symbol": SYMBOL,
+            "position": position.ticket,
+            "sl": new_sl,
+            "tp": position.tp,
+            "magic": MAGIC,
+        }
+        result = mt5.order_send(request)
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            log.error(f"SL modify failed #{position.ticket}: {result.comment if result else mt5.last_error()}")
+        else:
+            log.info(f"🔧 #{position.ticket} SL: {position.sl} → {new_sl}")
+            book.note_sltp(position.ticket, sl=new_sl)
+
+def sync_positions():
+    """อัปเดต mirror จาก deal ใหม่ (SL/TP ชน, ปิดเอง, partial fill) และล้างสถานะของ position ที่ปิดแล้ว"""
+    for event in book.sync():
+        if event.remaining == 0:
+            partial_closed.discard(event.ticket)
+            log.info(f"📕 #{event.ticket} ปิดแล้ว ({event.reason}) P&L: {event.profit:+.2f}")
+
+def on_bar_close(df, settings, ring=None):
+    """ตัดสินใจเมื่อแท่งปิด: จัดการ position ที่เปิดอยู่ แล้ววิเคราะห์ signal และวาง order"""
+    # จัดการ position ที่เปิดอยู่ (trailing stop / break-even / partial TP)
+    manage_open_positions(df, ring)
+    
+    # วิเคราะห์ Strategy
+    signal = ema_strategy(df, settings.EMA_SHORT, settings.EMA_LONG)
+    if not gate.update(df['time'].iloc[-1], SIGNAL_DIRECTION[signal]):
+        return
+    
+    log.info(f"Signal: {signal}")
+    
+    # ตรวจสอบจำนวน position จาก mirror (ไม่ต้องถาม terminal)
+    if book.count(SYMBOL) >= settings.MAX_OPEN_TRADES:
+        log.info("Max positions reached")
+        return
+    
+    # วาง Order
+    spec = specs.get(SYMBOL)
+    if spec is None:
+        return
+    tick = mt5.symbol_info_tick(SYMBOL)
+    if signal == "BUY":
+        price = tick.ask
+        sl = price - (SL_PIPS * spec.point * 10)
+        tp = price + (TP_PIPS * spec.point * 10)
+        place_order(SYMBOL, mt5.ORDER_TYPE_BUY, sl, tp, settings)
+    
+    elif signal == "SELL":
+        price = tick.bid
+        sl = price + (SL_PIPS * spec.point * 10)
+        tp = price - (TP_PIPS * spec.point * 10)
+        place_order(SYMBOL, mt5.ORDER_TYPE_SELL, sl, tp, settings)
+
+def wait_for_market():
+    """หลับข้ามช่วงตลาดปิด (หรือนอก London/NY เมื่อเปิด SESSION_FILTER) - คืน True ถ้าได้หลับ"""
+    wait = get_calendar().seconds_until_open(require_session=SESSION_FILTER)
+    if wait > 0:
+        log.info(f"💤 ตลาดปิด/นอก session - รอ {wait / 3600:.1f} ชม.")
+        stopping.wait(wait)
+        return True
+    return False
+
+def reload_settings(config):
+    """ใช้ค่าใหม่จาก .env ถ้าแก้ระหว่างรัน (ค่าที่ไม่ผ่าน validation จะถูกปฏิเสธ)"""
+    for name, (old, new) in config.poll().items():
+        log.info(f"⚙️ {name}: {old} → {new}")
+    return config.current
+
+def run_polling_loop(config):
+    """แบบเดิม: ดึง 200 แท่งล่าสุดทุก 60 วินาที"""
+    while not stopping.is_set():
+        settings = reload_settings(config)
+        if wait_for_market():
+            continue
+        
+        # ดึงข้อมูล
+        rates = mt5.copy_rates_from_pos(SYMBOL, getattr(mt5, f"TIMEFRAME_{TIMEFRAME}"), 0, 200)
+        if rates is None:
+            log.error("Failed to get market data")
+            stopping.wait(60)
+            continue
+        
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        sync_positions()
+        on_bar_close(df, settings)
+        persist_state()
+        
+        stopping.wait(60)  # รอ 1 นาที
+
+def load_closed_bars(count):
+    """แท่งที่ปิดแล้ว count แท่งล่าสุด (ไม่รวมแท่งที่กำลังก่อตัว) ในรูปแบบคอลัมน์เดียวกับ BarBuilder"""
+    rates = mt5.copy_rates_from_pos(SYMBOL, getattr(mt5, f"TIMEFRAME_{TIMEFRAME}"), 1, count)
+    if rates is None or not len(rates):
+        return None
+    df = pd.DataFrame(rates).rename(columns={'tick_volume': 'volume'})
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df[list(BAR_DTYPE.names)]
+
+def run_tick_loop(config):
+    """
+    สร้างแท่งจาก tick: ดึง tick ทุก TICK_POLL_MS แล้วเรียก on_bar_close ทันทีที่แท่งปิด
+    ระหว่างแท่งใช้ tick ล่าสุดจัดการ trailing stop / break-even
+    """
+    tf_seconds = TF_MAP[TIMEFRAME] * 60
+    df = load_closed_bars(TICK_HISTORY_BARS)
+    while df is None:
+        log.error("Failed to get market data")
+        if stopping.wait(60):
+            return
+        df = load_closed_bars(TICK_HISTORY_BARS)
+    
+    # เริ่มรับ tick ตั้งแต่ต้นแท่งถัดจากแท่งปิดล่าสุด เพื่อให้แท่งแรกที่สร้างเองครบทั้งแท่ง
+    feed = TickFeed(mt5, SYMBOL, tf_seconds, capacity=TICK_RING_CAPACITY)
+    last_closed = df['time'].iloc[-1].value // 10**9
+    feed.start((last_closed + tf_seconds) * 1000)
+    log.info(f"📡 Tick feed {SYMBOL} {TIMEFRAME} - เริ่มจาก {df['time'].iloc[-1]}")
+    
+    last_sync = 0.0
+    while not stopping.is_set():
+        settings = reload_settings(config)
+        if wait_for_market():
+            continue
+        
+        if time.monotonic() - last_sync >= RECONCILE_INTERVAL:
+            sync_positions()
+            last_sync = time.monotonic()
+        
+        seen = feed.last_msc
+        bars = feed.poll()
+        
+        if len(bars):
+            df = pd.concat([df, to_frame(bars)], ignore_index=True).tail(TICK_HISTORY_BARS).reset_index(drop=True)
+            bar_start = int(bars['time'][-1] // 1_000_000)
+            spread = feed.ring.spread_stats(since_msc=bar_start)
+            if spread:
+                log.info(f"🕯️ Bar closed {df['time'].iloc[-1]} close={bars['close'][-1]} | "
+                         f"spread mean={spread['mean']:.5f} max={spread['max']:.5f} ({spread['ticks']} ticks)")
+            on_bar_close(df, settings, feed.ring)
+            persist_state()
+        elif feed.last_msc != seen:
+            manage_open_positions(df, feed.ring)
+        
+        stopping.wait(TICK_POLL_MS / 1000)
+
+def persist_state():
+    """บันทึกสถานะที่ broker ไม่รู้ (partial TP ที่ทำไปแล้ว, edge/cooldown ของสัญญาณ) - position ดึงจาก broker เสมอ"""
+    save_state(STATE_NAME, {'saved_at': datetime.now(), 'partial_closed': sorted(partial_closed),
+                            'gate': gate.state()})
+
+def restore_state():
+    """ทำงานต่อจาก state ล่าสุด (เรียกหลัง book.bootstrap - เก็บเฉพาะ ticket ที่ยังเปิดอยู่)"""
+    state = load_state(STATE_NAME)
+    if state is None:
+        return
+    partial_closed.update(t for t in state['partial_closed'] if t in book.positions)
+    gate.restore(state['gate'])
+    log.info(f"♻️ Warm start: state {state['saved_at']:%Y-%m-%d %H:%M:%S}, "
+             f"{len(partial_closed)} partial-closed positions")
+
 def main():
     """Main trading loop"""
+    headless = "--headless" in sys.argv
     print("""
 ╔══════════════════════════════════════════════════════════════╗
 ║                🚀 MT5 REAL TRADING BOT                       ║
@@ -83,60 +395,40 @@ def main():
 ╚══════════════════════════════════════════════════════════════╝
     """)
     
-    # ยืนยันก่อนเริ่ม
-    confirm = input("\n⚠️  คุณแน่ใจหรือไม่ที่จะเทรดด้วยเงินจริง? (พิมพ์ 'YES' เพื่อยืนยัน): ")
-    if confirm != "YES":
-        print("❌ ยกเลิกการเทรด")
-        return
+    # ยืนยันก่อนเริ่ม (headless ไม่มีคนพิมพ์ - ต้องยืนยันไว้ใน .env)
+    if REAL_TRADING_CONFIRM == "YES":
+        log.warning("⚠️ REAL_TRADING_CONFIRM=YES - เริ่มเทรดเงินจริงโดยไม่ถามยืนยัน")
+    elif headless:
+        log.error("❌ โหมด headless ต้องตั้ง REAL_TRADING_CONFIRM=YES ใน .env")
+        sys.exit(EXIT_CONFIG)
+    else:
+        confirm = input("\n⚠️  คุณแน่ใจหรือไม่ที่จะเทรดด้วยเงินจริง? (พิมพ์ 'YES' เพื่อยืนยัน): ")
+        if confirm != "YES":
+            print("❌ ยกเลิกการเทรด")
+            return
     
     # เชื่อมต่อ MT5
     if not initialize_mt5():
         print("❌ ไม่สามารถเชื่อมต่อ MT5 ได้")
+        if headless:
+            sys.exit(1)  # terminal อาจยังไม่พร้อม - ให้ supervisor ลองใหม่ตาม backoff
         return
     
     print("✅ เชื่อมต่อ MT5 สำเร็จ - เริ่มเทรด...")
     
+    config = ConfigWatcher()
+    book.bootstrap()
+    restore_state()
+    install_shutdown(stopping.set)
+    
     try:
-        while True:
-            # ดึงข้อมูล
-            rates = mt5.copy_rates_from_pos(SYMBOL, getattr(mt5, f"TIMEFRAME_{TIMEFRAME}"), 0, 200)
-            if rates is None:
-                log.error("Failed to get market data")
-                time.sleep(60)
-                continue
-            
-            df = pd.DataFrame(rates)
-            df['time'] = pd.to_datetime(df['time'], unit='s')
-            
-            # วิเคราะห์ Strategy
-            signal = ema_strategy(df, EMA_SHORT, EMA_LONG)
-            
-            if signal != "HOLD":
-                log.info(f"Signal: {signal}")
-                
-                # ตรวจสอบว่ามี position เปิดอยู่หรือไม่
-                positions = mt5.positions_get(symbol=SYMBOL)
-                if len(positions) >= MAX_OPEN_TRADES:
-                    log.info("Max positions reached")
-                else:
-                    # วาง Order
-                    if signal == "BUY":
-                        price = mt5.symbol_info_tick(SYMBOL).ask
-                        sl = price - (SL_PIPS * mt5.symbol_info(SYMBOL).point * 10)
-                        tp = price + (TP_PIPS * mt5.symbol_info(SYMBOL).point * 10)
-                        place_order(SYMBOL, mt5.ORDER_TYPE_BUY, LOT, sl, tp)
-                    
-                    elif signal == "SELL":
-                        price = mt5.symbol_info_tick(SYMBOL).bid
-                        sl = price + (SL_PIPS * mt5.symbol_info(SYMBOL).point * 10)
-                        tp = price - (TP_PIPS * mt5.symbol_info(SYMBOL).point * 10)
-                        place_order(SYMBOL, mt5.ORDER_TYPE_SELL, LOT, sl, tp)
-            
-            time.sleep(60)  # รอ 1 นาที
-            
-    except KeyboardInterrupt:
+        if TICK_FEED:
+            run_tick_loop(config)
+        else:
+            run_polling_loop(config)
         print("\n🛑 หยุดการเทรด...")
     finally:
+        persist_state()
         mt5.shutdown()
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""
+🔄 Position Reconciliation
+กระจกสถานะ position/order ของบอทในหน่วยความจำ อัปเดตจาก deal ใหม่ (history_deals_get) ทีละส่วน
+ตอบ "เปิดอยู่กี่ position" ได้โดยไม่ต้องถาม terminal และตรวจ drift กับ positions_get เป็นระยะ
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from utils.logger import get_logger
+
+log = get_logger("reconcile")
+
+# ค่าคงที่ของ MetaTrader5 (ใช้ตัวเลขตรงๆ เพื่อให้ทดสอบกับ source จำลองได้)
+DEAL_TYPE_BUY, DEAL_TYPE_SELL = 0, 1
+DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT, DEAL_ENTRY_OUT_BY = 0, 1, 2, 3
+POSITION_TYPE_BUY = 0
+
+DEAL_REASONS = {0: "client", 1: "mobile", 2: "web", 3: "expert", 4: "sl", 5: "tp", 6: "stop_out"}
+
+@dataclass
+class MirrorPosition:
+    """position ที่บอทถือ (ตามที่ mirror เห็น)"""
+    ticket: int
+    symbol: str
+    is_buy: bool
+    volume: float
+    price_open: float
+    sl: float = None     # None = ยังไม่รู้ (รอ snapshot หรือ order ของบอทเอง)
+    tp: float = None
+    time_msc: int = 0
+
+@dataclass
+class ClosedEvent:
+    """position ที่ถูกปิด (ทั้งหมดหรือบางส่วน) ตาม deal จาก broker"""
+    ticket: int
+    symbol: str
+    volume: float
+    price: float
+    profit: float
+    reason: str
+    remaining: float
+
+class Reconciler:
+    """
+    Mirror ของ position (magic เดียวกับบอท) อัปเดตจาก deal ใหม่ตั้งแต่ deal ticket ล่าสุด
+
+    Args:
+        source: module MetaTrader5 (หรือ object ที่มี positions_get, history_deals_get)
+        magic: เลข magic ของบอท - deal เปิด position ของ magic อื่น (เช่นเปิดเอง) จะไม่ถูกนับ
+        full_interval: วินาทีระหว่างการตรวจเทียบกับ snapshot เต็ม (positions_get)
+
+    Usage:
+        book = Reconciler(mt5, MAGIC, SYMBOL)
+        book.bootstrap()
+        events = book.sync()         # เรียกบ่อยได้ - ดึงเฉพาะ deal ใหม่
+        book.count(SYMBOL)           # ไม่ต้องถาม terminal
+    """
+
+    def __init__(self, source, magic, symbol=None, full_interval=300):
+        self.source = source
+        self.magic = magic
+        self.symbol = symbol
+        self.full_interval = full_interval
+        self.positions = {}
+        self.expected = {}        # order ticket -> (request, เวลาที่ส่ง) ที่ยังไม่เห็น deal
+        self.last_ticket = 0
+        self.last_time = 0        # เวลา deal ล่าสุด (วินาที, เวลา server)
+        self.last_full = 0.0
+
+    # ---------- query จากหน่วยความจำ ----------
+
+    def count(self, symbol=None):
+        """จำนวน position ที่เปิดอยู่ (ไม่ถาม terminal)"""
+        return sum(1 for p in self.positions.values() if symbol is None or p.symbol == symbol)
+
+    def open_volume(self, symbol=None):
+        return sum(p.volume for p in self.positions.values() if symbol is None or p.symbol == symbol)
+
+    # ---------- อัปเดตจาก broker ----------
+
+    def bootstrap(self, lookback_days=7):
+        """เริ่มจาก snapshot เต็ม และตั้ง cursor ที่ deal ล่าสุด (deal เก่ากว่านั้นไม่ถูก apply ซ้ำ)"""
+        self.positions = self._snapshot() or {}
+        now = datetime.now(timezone.utc)
+        deals = self.source.history_deals_get(now - timedelta(days=lookback_days), now + timedelta(days=1)) or ()
+        if deals:
+            last = max(deals, key=lambda d: d.ticket)
+            self.last_ticket, self.last_time = last.ticket, last.time
+        else:
+            self.last_time = int(now.timestamp()) - 86400
+        self.last_full = time.monotonic()
+        log.info(f"🔄 Mirror: {len(self.positions)} positions, deal cursor #{self.last_ticket}")
+
+    def sync(self):
+        """
+        Apply deal ใหม่ตั้งแต่ cursor - คืน ClosedEvent ของ position ที่ถูกปิดจาก deal เหล่านั้น
+        (SL/TP, ปิดเอง, stop out หรือบอทปิดเอง) และตรวจ drift ถ้าถึงรอบ full_interval
+        """
+        # เวลา deal เป็นเวลา server: ใช้ cursor ของ deal เองเป็นจุดเริ่ม และเผื่อปลายทาง 1 วัน
+        start = datetime.fromtimestamp(self.last_time, tz=timezone.utc)
+        end = datetime.now(timezone.utc) + timedelta(days=1)
+        deals = self.source.history_deals_get(start, end)
+        if deals is None:
+            log.warning("history_deals_get failed - mirror ไม่ได้อัปเดต")
+            return []
+
+        events = []
+        for deal in sorted((d for d in deals if d.ticket > self.last_ticket), key=lambda d: d.ticket):
+            event = self.apply(deal)
+            if event:
+                events.append(event)
+            self.last_ticket, self.last_time = deal.ticket, deal.time
+
+        if time.monotonic() - self.last_full >= self.full_interval:
+            self.check_drift()
+        return events
+
+    def apply(self, deal):
+        """อัปเดต mirror จาก deal เดียว"""
+        position = self.positions.get(deal.position_id)
+        if self.symbol and deal.symbol != self.symbol:
+            return None
+        if deal.type not in (DEAL_TYPE_BUY, DEAL_TYPE_SELL):
+            return None  # balance/credit/commission deals
+
+        is_buy = deal.type == DEAL_TYPE_BUY
+        if deal.entry == DEAL_ENTRY_IN:
+            if deal.magic != self.magic and position is None:
+                return None
+            self._open(deal, is_buy, deal.volume, position)
+            self.expected.pop(deal.order, None)
+            return None
+
+        if position is None:
+            return None  # ปิด position ที่ไม่ใช่ของบอท
+
+        if deal.entry == DEAL_ENTRY_INOUT:
+            # netting: กลับทิศ - ปิดของเดิมทั้งหมด แล้วเปิดส่วนที่เหลือฝั่งตรงข้าม
+            closed = position.volume
+            event = self._close(deal, position, closed)
+            if deal.volume > closed:
+                self._open(deal, is_buy, round(deal.volume - closed, 8), None)
+            return event
+        return self._close(deal, position, deal.volume)
+
+    def _open(self, deal, is_buy, volume, position):
+        if position is not None and position.is_buy == is_buy:
+            # partial fill / เพิ่ม volume (netting) - ราคาเฉลี่ยถ่วงน้ำหนัก
+            total = position.volume + volume
+            position.price_open = (position.price_open * position.volume + deal.price * volume) / total
+            position.volume = round(total, 8)
+            return
+        request = self.expected.get(deal.order, ({}, 0))[0]
+        self.positions[deal.position_id] = MirrorPosition(
+            ticket=deal.position_id, symbol=deal.symbol, is_buy=is_buy, volume=volume,
+            price_open=deal.price, sl=request.get('sl'), tp=request.get('tp'), time_msc=deal.time_msc,
+        )
+
+    def _close(self, deal, position, volume):
+        remaining = round(position.volume - volume, 8)
+        if remaining <= 0:
+            del self.positions[position.ticket]
+            remaining = 0.0
+        else:
+            position.volume = remaining
+        reason = DEAL_REASONS.get(deal.reason, str(deal.reason))
+        log.info(f"🔄 #{position.ticket} closed {volume} lot @ {deal.price} ({reason}), เหลือ {remaining}")
+        return ClosedEvent(position.ticket, position.symbol, volume, deal.price, deal.profit, reason, remaining)
+
+    # ---------- บันทึกการกระทำของบอท ----------
+
+    def expect(self, result, request):
+        """บันทึก order ที่บอทส่ง (ใช้ SL/TP ของ request กับ position ที่เกิดจาก order นี้)"""
+        self.expected[result.order] = (request, time.monotonic())
+
+    def note_sltp(self, ticket, sl=None, tp=None):
+        """บันทึก SL/TP ใหม่หลังบอทแก้ไขสำเร็จ"""
+        position = self.positions.get(ticket)
+        if position is None:
+            return
+        if sl is not None:
+            position.sl = sl
+        if tp is not None:
+            position.tp = tp
+
+    # ---------- ตรวจเทียบกับ snapshot เต็ม ----------
+
+    def check_drift(self, tolerance=1e-6):
+        """
+        เทียบ mirror กับ positions_get - คืนรายการความต่าง (ว่าง = ตรงกัน)
+        ถ้าไม่ตรง จะใช้ snapshot ของ broker แทน mirror
+        """
+        now = self.last_full = time.monotonic()
+        broker = self._snapshot()
+        if broker is None:
+            return []
+
+        drift = []
+        for order, (request, sent) in list(self.expected.items()):
+            if now - sent >= self.full_interval:
+                drift.append(f"order #{order} ส่งแล้วแต่ไม่มี deal ({request.get('volume')} lot)")
+                del self.expected[order]
+        for ticket in self.positions.keys() - broker.keys():
+            drift.append(f"#{ticket} อยู่ใน mirror แต่ broker ปิดไปแล้ว")
+        for ticket in broker.keys() - self.positions.keys():
+            drift.append(f"#{ticket} เปิดอยู่ที่ broker แต่ไม่อยู่ใน mirror")
+        for ticket in broker.keys() & self.positions.keys():
+            mine, theirs = self.positions[ticket], broker[ticket]
+            if abs(mine.volume - theirs.volume) > tolerance:
+                drift.append(f"#{ticket} volume {mine.volume} ≠ {theirs.volume}")
+            for name in ('sl', 'tp'):
+                ours = getattr(mine, name)
+                if ours is not None and abs(ours - getattr(theirs, name)) > tolerance:
+                    drift.append(f"#{ticket} {name.upper()} {ours} ≠ {getattr(theirs, name)}")
+
+        for line in drift:
+            log.warning(f"⚠️ Drift: {line}")
+        self.positions = broker
+        return drift
+
+    def _snapshot(self):
+        kwargs = {'symbol': self.symbol} if self.symbol else {}
+        positions = self.source.positions_get(**kwargs)
+        if positions is None:
+            log.warning("positions_get failed")
+            return None
+        return {
+            p.ticket: MirrorPosition(
+                ticket=p.ticket, symbol=p.symbol, is_buy=p.type == POSITION_TYPE_BUY, volume=p.volume,
+                price_open=p.price_open, sl=p.sl, tp=p.tp, time_msc=p.time_msc,
+            )
+            for p in positions if p.magic == self.magic
+        }
@@ -0,0 +1,249 @@
+"""
+🗃️ Backtest Results Store
+เก็บผล backtest ทุกครั้ง (trades, equity, พารามิเตอร์, hash ของข้อมูล) ลง SQLite
+- รันซ้ำด้วยพารามิเตอร์และข้อมูลเดิม → ดึงผลจาก store แทนการคำนวณใหม่
+- เทียบ metrics ข้ามหลายร้อย run ด้วย SQL query เดียว
+
+Usage:
+    python results_store.py                          # 20 run ล่าสุด
+    python results_store.py --by profit_factor --top 10 --symbol XAUUSD
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import RESULTS_DB
+from analytics import summary
+from utils.logger import get_logger
+
+log = get_logger("results_store")
+
+METRICS = ('trades', 'win_rate', 'net_profit', 'return_pct', 'profit_factor', 'max_drawdown', 'total_costs')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    engine TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    symbol TEXT,
+    timeframe TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    bars INTEGER,
+    param_hash TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    initial_balance REAL,
+    final_balance REAL,
+    trades INTEGER,
+    win_rate REAL,
+    net_profit REAL,
+    return_pct REAL,
+    profit_factor REAL,
+    max_drawdown REAL,
+    total_costs REAL
+);
+CREATE INDEX IF NOT EXISTS runs_param ON runs (param_hash);
+CREATE INDEX IF NOT EXISTS runs_range ON runs (symbol, start_time, end_time);
+CREATE TABLE IF NOT EXISTS trades (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    time TEXT, exit_time TEXT, action TEXT,
+    entry_price REAL, exit_price REAL, sl_price REAL, tp_price REAL, lot_size REAL,
+    gross_pnl REAL, costs REAL, pnl REAL, exit_reason TEXT, balance REAL, mae REAL, mfe REAL,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE TABLE IF NOT EXISTS equity (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    time TEXT,
+    equity REAL,
+    PRIMARY KEY (run_id, seq)
+);
+"""
+
+_TRADE_COLUMNS = ('time', 'exit_time', 'action', 'entry_price', 'exit_price', 'sl_price', 'tp_price',
+                  'lot_size', 'gross_pnl', 'costs', 'pnl', 'exit_reason', 'balance', 'mae', 'mfe')
+
+# คอลัมน์ที่เพิ่มหลังสร้างตาราง - ไฟล์ store เก่าเติมให้ตอนเปิด (run เก่าได้ค่า NULL)
+_ADDED_COLUMNS = {'trades': (('mae', 'REAL'), ('mfe', 'REAL'))}
+
+def _json_default(value):
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+def canonical_json(params):
+    """JSON ที่เรียง key แล้ว - พารามิเตอร์ชุดเดียวกันได้ string เดียวกันเสมอ"""
+    return json.dumps(params, sort_keys=True, default=_json_default, separators=(',', ':'))
+
+def param_hash(params):
+    return hashlib.blake2b(canonical_json(params).encode(), digest_size=16).hexdigest()
+
+def run_key(engine, params, data_hash):
+    """ID ของ run = engine + พารามิเตอร์ + ข้อมูล (รันซ้ำแบบเดียวกันได้ ID เดิม)"""
+    return hashlib.blake2b(f"{engine}|{param_hash(params)}|{data_hash}".encode(), digest_size=16).hexdigest()
+
+def code_version(*paths):
+    """hash ของ source ที่คำนวณผล - แก้ logic แล้ว run เดิมใน store จะไม่ถูกใช้ซ้ำ"""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def summarize(trades, initial_balance):
+    """Metrics หลักจาก trades (DataFrame ที่มี pnl, costs, balance)"""
+    stats = summary(trades, initial_balance)
+    return {key: stats[key] for key in METRICS + ('final_balance',)}
+
+class ResultsStore:
+    """
+    SQLite store ของผล backtest (ไฟล์เดียว ไม่ต้องมี server)
+
+    Args:
+        path: ไฟล์ฐานข้อมูล (default: RESULTS_DB), ":memory:" สำหรับทดสอบ
+    """
+
+    def __init__(self, path=RESULTS_DB):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """เพิ่มคอลัมน์ใหม่ให้ตารางของ store ที่สร้างด้วย schema เก่า"""
+        with self.conn:
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                for name, kind in columns:
+                    if name not in existing:
+                        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, run_id):
+        """ข้อมูลของ run (dict) หรือ None ถ้ายังไม่เคยรัน"""
+        cursor = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        run = dict(zip([c[0] for c in cursor.description], row))
+        run['params'] = json.loads(run['params'])
+        return run
+
+    def save(self, run_id, engine, params, data_hash, trades, equity=None, initial_balance=10000,
+             symbol=None, timeframe=None, start_time=None, end_time=None, bars=None):
+        """
+        บันทึก run (แทนที่ของเดิมถ้า run_id ซ้ำ) - คืน metrics ที่บันทึก
+
+        Args:
+            trades: list ของ dict หรือ DataFrame (คอลัมน์ตาม GoldenTrendBacktest.execute_trade)
+            equity: pd.Series ที่ index เป็นเวลา (None = ใช้ balance หลังปิดแต่ละ trade)
+        """
+        trades = pd.DataFrame(list(trades)) if not isinstance(trades, pd.DataFrame) else trades
+        metrics = summarize(trades, initial_balance)
+        if equity is None:
+            equity = (pd.Series(trades['balance'].to_numpy(), index=trades['exit_time'])
+                      if not trades.empty else pd.Series(dtype=float))
+
+        rows = trades.reindex(columns=_TRADE_COLUMNS).copy()
+        for column in ('time', 'exit_time'):
+            rows[column] = rows[column].astype(str)
+        with self.conn:
+            for table in ('runs', 'trades', 'equity'):
+                self.conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, engine, datetime.now().isoformat(timespec='seconds'), symbol, timeframe,
+                 str(start_time) if start_time is not None else None,
+                 str(end_time) if end_time is not None else None, bars,
+                 param_hash(params), data_hash, canonical_json(params), float(initial_balance),
+                 metrics['final_balance'], *(metrics[m] for m in METRICS)),
+            )
+            self.conn.executemany(
+                f"INSERT INTO trades (run_id, seq, {', '.join(_TRADE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(_TRADE_COLUMNS) + 2))})",
+                ((run_id, i, *row) for i, row in enumerate(rows.itertuples(index=False, name=None))),
+            )
+            self.conn.executemany(
+                "INSERT INTO equity VALUES (?, ?, ?, ?)",
+                ((run_id, i, str(t), float(v)) for i, (t, v) in enumerate(equity.items())),
+            )
+        log.info(f"🗃️ Saved run {run_id[:12]} ({metrics['trades']} trades) → {self.path}")
+        return metrics
+
+    def load_trades(self, run_id):
+        """trades ของ run เป็น DataFrame (คอลัมน์เดียวกับ GoldenTrendBacktest.trades)"""
+        df = pd.read_sql_query(f"SELECT {', '.join(_TRADE_COLUMNS)} FROM trades WHERE run_id = ? ORDER BY seq",
+                               self.conn, params=(run_id,))
+        for column in ('time', 'exit_time'):
+            df[column] = pd.to_datetime(df[column])
+        return df
+
+    def load_equity(self, run_id):
+        df = pd.read_sql_query("SELECT time, equity FROM equity WHERE run_id = ? ORDER BY seq",
+                               self.conn, params=(run_id,))
+        return pd.Series(df['equity'].to_numpy(), index=pd.to_datetime(df['time']), name='equity')
+
+    def compare(self, by='net_profit', top=None, ascending=False, engine=None, symbol=None,
+                since=None, until=None, param_hash=None, params=False):
+        """
+        ตาราง metrics ของหลาย run เรียงตาม `by` - filter ตาม engine/symbol/ช่วงข้อมูล/ชุดพารามิเตอร์
+
+        Args:
+            since/until: เลือก run ที่ข้อมูลครอบคลุมอยู่ในช่วงนี้ (เทียบกับ start_time/end_time)
+            params: True = แตกพารามิเตอร์เป็นคอลัมน์ (p.<ชื่อ>) ไว้ดูว่าต่างกันตรงไหน
+        """
+        if by not in METRICS + ('created_at', 'start_time'):
+            raise ValueError(f"Unknown metric '{by}' (เลือกจาก {', '.join(METRICS)})")
+        where, args = [], []
+        for column, value, op in (('engine', engine, '='), ('symbol', symbol, '='),
+                                  ('param_hash', param_hash, '='), ('start_time', since, '>='),
+                                  ('end_time', until, '<=')):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                args.append(str(value))
+        sql = (f"SELECT run_id, engine, created_at, symbol, timeframe, start_time, end_time, bars, "
+               f"param_hash, params, {', '.join(METRICS)} FROM runs")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {by} {'ASC' if ascending else 'DESC'}"
+        if top:
+            sql += f" LIMIT {int(top)}"
+
+        df = pd.read_sql_query(sql, self.conn, params=args)
+        decoded = df.pop('params').map(json.loads)
+        if params and not df.empty:
+            flat = pd.json_normalize(decoded.tolist()).add_prefix('p.')
+            df = pd.concat([df, flat], axis=1)
+        return df
+
+def main():
+    args = sys.argv[1:]
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    store = ResultsStore(option("--db", RESULTS_DB))
+    df = store.compare(by=option("--by", "created_at"), top=int(option("--top", "20")),
+                       symbol=option("--symbol"), engine=option("--engine"))
+    if df.empty:
+        print(f"❌ ยังไม่มีผล backtest ใน {store.path}")
+        return
+    columns = ['run_id', 'created_at', 'symbol', 'start_time', 'end_time', *METRICS]
+    df['run_id'] = df['run_id'].str[:12]
+    print(f"\n🗃️ Backtest runs ({store.path})\n")
+    print(df[columns].to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+if __name__ == "__main__":
+    main()
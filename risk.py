@@ -30,14 +30,16 @@ def can_trade():
     return True, "OK"
 
 # Demo-specific risk functions (used by live_demo.py)
-def check_daily_limits(current_pnl, initial_balance):
-    """Check daily P&L limits for demo trading"""
+def check_daily_limits(current_pnl, initial_balance, settings=None):
+    """Check daily P&L limits (settings = config.Settings ปัจจุบันจาก ConfigWatcher, None = ค่าตอนเริ่มโปรแกรม)"""
+    target = settings.DAILY_PROFIT_TARGET if settings else DAILY_PROFIT_TARGET
+    limit = settings.DAILY_DRAWDOWN_LIMIT if settings else DAILY_DRAWDOWN_LIMIT
     pnl_pct = (current_pnl / initial_balance) * 100
     
-    if pnl_pct >= DAILY_PROFIT_TARGET:
+    if pnl_pct >= target:
         return False, f"Daily profit target reached: {pnl_pct:.2f}%"
     
-    if pnl_pct <= -DAILY_DRAWDOWN_LIMIT:
+    if pnl_pct <= -limit:
         return False, f"Daily drawdown limit reached: {pnl_pct:.2f}%"
     
     return True, "OK"
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+📐 Strategy Rules
+กฎกลยุทธ์แบบ declarative (Python expression) ที่ compile ครั้งเดียวเป็น NumPy predicate
+
+ตัวอย่าง setup:
+    {
+        'name': 'golden_buy',
+        'signal': 'BUY',
+        'when': ['ema20 > ema50', '40 <= rsi <= 70', 'adx > 20'],
+        'sl_atr': 1.5,
+        'tp_atr': 2.5,
+        'reason': 'Golden Trend BUY: RSI:{rsi:.1f}'
+    }
+
+setup แรกที่เงื่อนไขผ่านทั้งหมดจะถูกเลือก (เรียงตามลำดับใน list)
+"""
+
+import ast
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div)
+_UNARYOPS = (ast.USub, ast.UAdd, ast.Not)
+_CMPOPS = (ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq)
+_FUNCTIONS = {'abs': np.abs, 'min': np.minimum, 'max': np.maximum}
+
+class _Vectorize(ast.NodeTransformer):
+    """แปลง and/or/not และ chained comparison ให้เป็น operator แบบ element-wise"""
+
+    def visit_BoolOp(self, node):
+        values = [self.visit(v) for v in node.values]
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = values[0]
+        for value in values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=operand)
+        return ast.UnaryOp(op=node.op, operand=operand)
+
+    def visit_Compare(self, node):
+        left = self.visit(node.left)
+        comparators = [self.visit(c) for c in node.comparators]
+        parts = []
+        for op, right in zip(node.ops, comparators):
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        result = parts[0]
+        for part in parts[1:]:
+            result = ast.BinOp(left=result, op=ast.BitAnd(), right=part)
+        return result
+
+_ALLOWED_NODES = (ast.Expression, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call,
+                  ast.Name, ast.Constant, ast.Load, ast.And, ast.Or) + _BINOPS + _UNARYOPS + _CMPOPS
+
+def _validate(tree, expr):
+    """อนุญาตเฉพาะ node ที่ปลอดภัย และคืนชื่อคอลัมน์ที่ใช้"""
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Syntax not allowed in rule: {expr}")
+        if isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+            names.add(node.id)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+                raise ValueError(f"Function not allowed in rule: {expr}")
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                raise ValueError(f"Only numeric constants allowed in rule: {expr}")
+    return names
+
+def compile_conditions(conditions):
+    """
+    Compile รายการเงื่อนไข (AND กันทั้งหมด) เป็น code object ที่ทำงานกับ NumPy arrays
+
+    Returns:
+        (code, columns): code object และ set ของคอลัมน์ที่ต้องใช้
+    """
+    if isinstance(conditions, str):
+        conditions = [conditions]
+    if not conditions:
+        raise ValueError("Setup must have at least one condition")
+
+    expr = " and ".join(f"({c})" for c in conditions)
+    tree = ast.parse(expr, mode='eval')
+    columns = _validate(tree, expr)
+    tree = ast.fix_missing_locations(_Vectorize().visit(tree))
+    return compile(tree, f"<rule: {expr}>", 'eval'), columns
+
+@dataclass(frozen=True)
+class CompiledSetup:
+    name: str
+    signal: str
+    code: object
+    columns: frozenset
+    sl_atr: float
+    tp_atr: float
+    reason: str
+
+    def predicate(self, arrays):
+        """คืน bool array ว่าแต่ละแท่งผ่านเงื่อนไขหรือไม่"""
+        with np.errstate(invalid='ignore'):
+            result = eval(self.code, {'__builtins__': {}, **_FUNCTIONS}, arrays)
+        return np.broadcast_to(np.asarray(result, dtype=bool), len(next(iter(arrays.values()))))
+
+class CompiledStrategy:
+    """ชุด setup ที่ compile แล้ว ใช้ได้ทั้งแท่งล่าสุด (live) และทุกแท่ง (backtest)"""
+
+    def __init__(self, setups):
+        self.setups = list(setups)
+        self.columns = frozenset().union(*(s.columns for s in self.setups))
+
+    def arrays(self, df, start=None):
+        """ดึงคอลัมน์ที่กฎต้องใช้ออกมาเป็น float arrays"""
+        missing = self.columns.difference(df.columns)
+        if missing:
+            raise KeyError(f"Missing columns for rules: {', '.join(sorted(missing))}")
+        return {c: df[c].to_numpy(dtype=float)[start:] for c in self.columns}
+
+    def evaluate(self, arrays):
+        """คืน index ของ setup ที่ผ่านสำหรับทุกแท่ง (-1 = ไม่มีสัญญาณ)"""
+        n = len(next(iter(arrays.values())))
+        result = np.full(n, -1, dtype=np.int16)
+        # ไล่จาก setup ท้ายสุด เพื่อให้ setup ที่มาก่อนมีลำดับความสำคัญสูงกว่า
+        for i in range(len(self.setups) - 1, -1, -1):
+            result[self.setups[i].predicate(arrays)] = i
+        return result
+
+    def evaluate_frame(self, df):
+        """ประเมินกฎทุกแท่งใน DataFrame ที่มี indicators แล้ว"""
+        return self.evaluate(self.arrays(df))
+
+    def evaluate_last(self, df):
+        """ประเมินกฎเฉพาะแท่งล่าสุด - คืน CompiledSetup หรือ None"""
+        idx = self.evaluate(self.arrays(df, start=-1))[0]
+        return self.setups[idx] if idx >= 0 else None
+
+def compile_strategy(spec):
+    """Compile รายการ setup (list ของ dict) เป็น CompiledStrategy"""
+    setups = []
+    for item in spec:
+        signal = item['signal'].upper()
+        if signal not in ('BUY', 'SELL'):
+            raise ValueError(f"Invalid signal '{item['signal']}' in setup {item.get('name')}")
+        code, columns = compile_conditions(item['when'])
+        setups.append(CompiledSetup(
+            name=item.get('name', f"setup_{len(setups) + 1}"),
+            signal=signal,
+            code=code,
+            columns=frozenset(columns | {'close', 'atr'}),
+            sl_atr=float(item['sl_atr']),
+            tp_atr=float(item['tp_atr']),
+            reason=item.get('reason', f"{signal} setup"),
+        ))
+    return CompiledStrategy(setups)
+
+def load_strategy(path):
+    """โหลดกฎจากไฟล์ JSON แล้ว compile"""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    if isinstance(spec, dict):
+        spec = spec['setups']
+    return compile_strategy(spec)
@@ -7,9 +7,24 @@
 import sys
 import os
 import subprocess
+import threading
 import time
+import importlib.util
+from functools import lru_cache
 from datetime import datetime
 
+# งบเวลา import (ms, cumulative จาก python -X importtime) ของแต่ละ entry point
+IMPORT_BUDGET_MS = {
+    "run_bot": 100,
+    "strategy": 600,
+    "golden_live_demo": 700,
+    "golden_backtest": 700,
+    "test_golden_trend": 700,
+}
+
+# โมดูลที่ import ล่วงหน้าในโหมด inprocess ระหว่างรอผู้ใช้เลือกเมนู
+PREWARM_MODULES = ("numpy", "pandas", "strategy", "market_data")
+
 def clear_screen():
     """ล้างหน้าจอ"""
     os.system('clear')
@@ -28,19 +43,63 @@ def print_banner():
     print(f"💻 ระบบ: macOS Compatible")
     print("=" * 60)
 
+@lru_cache(maxsize=1)
+def missing_dependencies():
+    """หา dependencies ที่ไม่ได้ติดตั้ง (ใช้ find_spec - ไม่ import จริง, ตรวจครั้งเดียว)"""
+    return tuple(name for name in ("pandas", "numpy", "yfinance", "dotenv")
+                 if importlib.util.find_spec(name) is None)
+
 def check_dependencies():
     """ตรวจสอบ dependencies"""
-    try:
-        import pandas
-        import numpy
-        import yfinance
-        from dotenv import load_dotenv
-        print("✅ Dependencies: OK")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+    missing = missing_dependencies()
+    if missing:
+        print(f"❌ Missing dependency: {', '.join(missing)}")
         print("🔧 Please install: pip install -r requirements.txt")
         return False
+    print("✅ Dependencies: OK")
+    return True
+
+def prewarm_imports():
+    """import โมดูลหนัก (pandas, strategy) เบื้องหลังระหว่างที่ผู้ใช้ดูเมนู"""
+    def worker():
+        for name in PREWARM_MODULES:
+            try:
+                __import__(name)
+            except Exception:
+                pass
+    
+    threading.Thread(target=worker, daemon=True).start()
+
+def measure_import_time(module):
+    """วัดเวลา import (ms) ของโมดูลใน process ใหม่ด้วย python -X importtime"""
+    result = subprocess.run(
+        [python_executable(), "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+def check_import_budget():
+    """ตรวจเวลา import ของทุก entry point เทียบกับ IMPORT_BUDGET_MS"""
+    print("⏱️ Import-time budget (python -X importtime, cumulative):")
+    print("=" * 50)
+    ok = True
+    for module, budget in IMPORT_BUDGET_MS.items():
+        elapsed = measure_import_time(module)
+        if elapsed is None:
+            print(f"   ❌ {module:20s} import failed")
+            ok = False
+        elif elapsed > budget:
+            print(f"   ❌ {module:20s} {elapsed:7.1f} ms > {budget} ms")
+            ok = False
+        else:
+            print(f"   ✅ {module:20s} {elapsed:7.1f} ms ≤ {budget} ms")
+    return ok
 
 def show_menu():
     """แสดงเมนูหลัก"""
@@ -55,27 +114,56 @@ def show_menu():
     print("0. ❌ Exit")
     print("=" * 40)
 
+def python_executable():
+    """Python ของ virtual environment ถ้ามี ไม่งั้นใช้ python3"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    venv_python = os.path.join(current_dir, ".venv", "bin", "python")
+    return venv_python if os.path.exists(venv_python) else "python3"
+
+def ensure_market_feeder():
+    """เริ่ม Market Data Feeder เบื้องหลัง ถ้าตั้ง MARKET_BUS ไว้ใน .env"""
+    from config import MARKET_BUS
+    if not MARKET_BUS:
+        return
+    
+    import atexit
+    from market_bus import ensure_feeder, stop_feeder, FEEDER_LOG
+    feeder = ensure_feeder(python_executable())
+    if feeder is not None:
+        atexit.register(stop_feeder, feeder)  # หยุด feeder เมื่อออกจาก launcher
+        print(f"📡 เริ่ม Market Data Feeder ('{MARKET_BUS}') เบื้องหลัง - log: {FEEDER_LOG}")
+
+def run_in_process(script_name):
+    """รันสคริปต์ใน process เดิม - โมดูลที่ import แล้วไม่ต้อง import ซ้ำ"""
+    import runpy
+    import signal
+    
+    previous_handler = signal.getsignal(signal.SIGINT)
+    try:
+        runpy.run_path(script_name, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise subprocess.CalledProcessError(e.code, script_name)
+    finally:
+        # สคริปต์อาจตั้ง signal handler ของตัวเองไว้
+        signal.signal(signal.SIGINT, previous_handler)
+
 def run_script(script_name, description):
     """รันสคริปต์"""
+    from config import LAUNCH_MODE
+    
     print(f"\n🔄 กำลังรัน {description}...")
     print("=" * 50)
     
     try:
-        # รันสคริปต์ใน virtual environment - ใช้ path ปัจจุบัน
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        venv_python = os.path.join(current_dir, ".venv", "bin", "python")
-        
-        if os.path.exists(venv_python):
-            cmd = [venv_python, script_name]
+        if LAUNCH_MODE == "inprocess":
+            run_in_process(script_name)
         else:
-            cmd = ["python3", script_name]
-        
-        process = subprocess.run(cmd, check=True)
+            # รันสคริปต์ใน virtual environment - ใช้ path ปัจจุบัน
+            cmd = [python_executable(), script_name]
+            subprocess.run(cmd, check=True)
         
-        if process.returncode == 0:
-            print(f"\n✅ {description} เสร็จสิ้น")
-        else:
-            print(f"\n❌ {description} เกิดข้อผิดพลาด")
+        print(f"\n✅ {description} เสร็จสิ้น")
             
     except subprocess.CalledProcessError as e:
         print(f"\n❌ Error: {e}")
@@ -127,6 +215,13 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     
+    if "--import-budget" in sys.argv:
+        sys.exit(0 if check_import_budget() else 1)
+    
+    from config import LAUNCH_MODE
+    if LAUNCH_MODE == "inprocess" and not missing_dependencies():
+        prewarm_imports()
+    
     while True:
         clear_screen()
         print_banner()
@@ -142,6 +237,7 @@ def main():
             choice = input("\n🎯 เลือก (0-6): ").strip()
             
             if choice == "1":
+                ensure_market_feeder()
                 run_script("golden_live_demo.py", "🏆 Golden Trend Live Demo")
             elif choice == "2":
                 run_script("test_golden_trend.py", "🔍 Golden Trend System Test")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+🛰️ Headless Service
+รันบอทแบบไม่มีหน้าจอ (server / launchd / systemd) - supervisor คุม worker แต่ละตัวเป็น subprocess
+- worker ที่ crash (exit code ≠ 0) ถูก restart ด้วย exponential backoff
+- SIGTERM/SIGINT ส่งต่อให้ worker หยุดอย่างสุภาพ (บันทึก state ก่อนออก) แล้วจึง SIGKILL ถ้าเกินเวลา
+- worker เริ่มใหม่จาก state + แท่งที่ cache ไว้ (warm start) ไม่ต้องดาวน์โหลดย้อนหลังทั้งหมด
+
+Usage:
+    python service.py                 # worker ตาม SERVICE_WORKERS (default: demo)
+    python service.py demo real       # ระบุเอง (real ต้องตั้ง REAL_TRADING_CONFIRM=YES)
+"""
+
+import os
+import pickle
+import signal
+import sys
+import threading
+import time
+from config import (SERVICE_WORKERS, SERVICE_STATE_DIR, SERVICE_BACKOFF_MIN, SERVICE_BACKOFF_MAX,
+                    SERVICE_STABLE_SECONDS, SERVICE_STOP_TIMEOUT)
+from utils.jobs import JobManager, CANCELLED
+from utils.logger import get_logger
+
+log = get_logger("service")
+
+# exit code ของ worker ที่ restart แล้วไม่ช่วย (เช่นยังไม่ได้ยืนยันเทรดเงินจริงใน .env)
+EXIT_CONFIG = 2
+
+WORKER_SCRIPTS = {
+    'demo': "golden_live_demo.py",
+    'real': "real_trading.py",
+}
+
+# ---------- ใช้ใน worker ----------
+
+def install_shutdown(callback):
+    """เรียก callback เมื่อได้ SIGTERM หรือ SIGINT (Ctrl+C)"""
+    def handler(sig, frame):
+        log.info(f"🛑 ได้รับ {signal.Signals(sig).name} - กำลังหยุด")
+        callback()
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+
+def state_path(name):
+    return os.path.join(SERVICE_STATE_DIR, f"{name}.pkl")
+
+def save_state(name, state):
+    """บันทึก state แบบ atomic (เขียนไฟล์ชั่วคราวแล้ว rename) - ไฟล์เดิมไม่เสียแม้ถูก kill กลางทาง"""
+    os.makedirs(SERVICE_STATE_DIR, exist_ok=True)
+    path = state_path(name)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def load_state(name):
+    """state ที่บันทึกไว้ครั้งล่าสุด หรือ None"""
+    try:
+        with open(state_path(name), 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning(f"⚠️ อ่าน state '{name}' ไม่ได้ ({e}) - เริ่มใหม่")
+        return None
+
+# ---------- supervisor ----------
+
+class Supervisor:
+    """
+    คุม worker หลายตัว (ตัวละ subprocess ผ่าน JobManager) - restart เมื่อ crash ด้วย backoff
+    min → 2x ทุกครั้งที่ crash ติดกัน → สูงสุด max, รีเซ็ตเมื่อ worker รันได้นานกว่า stable_seconds
+    """
+
+    def __init__(self, workers, backoff_min=SERVICE_BACKOFF_MIN, backoff_max=SERVICE_BACKOFF_MAX,
+                 stable_seconds=SERVICE_STABLE_SECONDS, stop_timeout=SERVICE_STOP_TIMEOUT):
+        self.workers = dict(workers)  # ชื่อ -> command
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self.manager = JobManager(max_workers=len(self.workers), cancel_timeout=stop_timeout)
+        self.jobs = {}
+        self.failures = {name: 0 for name in self.workers}
+        self.restart_at = {}
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def launch(self, name):
+        self.restart_at.pop(name, None)
+        log.info(f"▶️ Starting worker '{name}': {' '.join(self.workers[name])}")
+        self.jobs[name] = self.manager.submit(
+            name, self.workers[name],
+            on_output=lambda line, name=name: print(f"[{name}] {line}", flush=True),
+            on_exit=self._on_exit,
+        )
+
+    def _on_exit(self, job):
+        """เรียกจาก thread ของ JobManager เมื่อ worker จบ"""
+        with self._lock:
+            if self.stopping.is_set() or job.status == CANCELLED:
+                return
+            if job.returncode == 0:
+                log.info(f"✅ Worker '{job.name}' จบการทำงานปกติ")
+                return
+            if job.returncode == EXIT_CONFIG:
+                log.error(f"❌ Worker '{job.name}' หยุดเพราะการตั้งค่า (exit {job.returncode}) - ไม่ restart")
+                return
+            if job.runtime() >= self.stable_seconds:
+                self.failures[job.name] = 0
+            delay = min(self.backoff_max, self.backoff_min * 2 ** self.failures[job.name])
+            self.failures[job.name] += 1
+            self.restart_at[job.name] = time.monotonic() + delay
+            log.warning(f"💥 Worker '{job.name}' crash (exit {job.returncode}) หลังรัน {job.runtime():.0f}s "
+                        f"- restart ใน {delay:.0f}s (ครั้งที่ {self.failures[job.name]})")
+
+    def alive(self):
+        return bool(self.manager.active() or self.restart_at)
+
+    def stop(self):
+        self.stopping.set()
+
+    def run(self):
+        install_shutdown(self.stop)
+        for name in self.workers:
+            self.launch(name)
+        try:
+            while not self.stopping.wait(0.5):
+                with self._lock:
+                    due = [name for name, at in self.restart_at.items() if time.monotonic() >= at]
+                    for name in due:
+                        self.launch(name)
+                    if not self.alive():
+                        break
+        finally:
+            log.info("🛑 หยุด worker ทั้งหมด...")
+            self.manager.shutdown(wait=True)
+            log.info("👋 Service หยุดทำงาน")
+
+def worker_command(name, python=None):
+    """คำสั่งรัน worker แบบ headless (-u = ไม่ buffer output เพื่อให้ log ออกทันที)"""
+    script = WORKER_SCRIPTS.get(name)
+    if script is None:
+        raise ValueError(f"Unknown worker '{name}' (เลือกจาก {', '.join(WORKER_SCRIPTS)})")
+    return [python or sys.executable, "-u", script, "--headless"]
+
+def main():
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    names = sys.argv[1:] or [name.strip() for name in SERVICE_WORKERS.split(",") if name.strip()]
+    try:
+        workers = {name: worker_command(name) for name in names}
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(EXIT_CONFIG)
+    print(f"🛰️ Headless service: {', '.join(workers)} (state: {SERVICE_STATE_DIR}/)")
+    Supervisor(workers).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+🕒 Trading Sessions
+ปฏิทินช่วงเวลาเทรด (Asia, London, New York) และช่วงตลาดปิด คำนวณล่วงหน้าเป็น UTC arrays ที่เรียงแล้ว
+ตรวจเวลาใดๆ ด้วย binary search (O(log n)) และกรองทุกแท่งของ backtest ได้ในครั้งเดียว
+"""
+
+from datetime import datetime, time as dt_time, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+# เวลาเปิด/ปิดของแต่ละ session ตามเวลาท้องถิ่น (รองรับ DST อัตโนมัติ)
+SESSIONS = {
+    'asia': ('Asia/Tokyo', dt_time(9, 0), dt_time(18, 0)),
+    'london': ('Europe/London', dt_time(8, 0), dt_time(17, 0)),
+    'new_york': ('America/New_York', dt_time(8, 0), dt_time(17, 0)),
+}
+
+# ตลาด FX/ทองคำปิดสุดสัปดาห์: ศุกร์ 17:00 ถึง อาทิตย์ 17:00 (เวลา New York)
+MARKET_TZ = 'America/New_York'
+WEEKEND_CLOSE = (4, dt_time(17, 0))
+WEEKEND_OPEN = (6, dt_time(17, 0))
+HOLIDAYS = ('01-01', '12-25')  # ปิดทั้งวัน (เดือน-วัน, เวลา New York)
+
+DEFAULT_SESSIONS = ('london', 'new_york')
+
+def _to_utc_ns(ts):
+    """แปลงเวลา (scalar หรือ array) เป็น int64 ns UTC - เวลาแบบ naive ถือเป็น UTC"""
+    if np.isscalar(ts) or isinstance(ts, (datetime, pd.Timestamp)):
+        ts = pd.Timestamp(ts)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize('UTC')
+        return np.int64(ts.tz_convert('UTC').as_unit('ns').value)
+
+    times = pd.DatetimeIndex(pd.to_datetime(ts))
+    if times.tz is None:
+        times = times.tz_localize('UTC')
+    return times.tz_convert('UTC').tz_localize(None).as_unit('ns').asi8
+
+def _merge(starts, ends):
+    """รวม intervals ที่ทับกันให้เป็นชุดที่ไม่ซ้อนกันและเรียงตามเวลา"""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+    new_group = np.r_[True, starts[1:] > running_end[:-1]]
+    group = np.cumsum(new_group) - 1
+    merged_ends = np.full(group[-1] + 1, np.iinfo(np.int64).min)
+    np.maximum.at(merged_ends, group, ends)
+    return starts[new_group], merged_ends
+
+def _contains(starts, ends, ts):
+    """ts อยู่ใน interval ใดหรือไม่ (ts เป็น scalar หรือ array ของ int64 ns)"""
+    idx = np.searchsorted(starts, ts, side='right') - 1
+    safe = np.clip(idx, 0, max(len(ends) - 1, 0))
+    return (idx >= 0) & (ts < ends[safe]) if len(ends) else np.zeros(np.shape(ts), dtype=bool)
+
+def _local_intervals(days, tz, start, end, weekdays_only=True):
+    """สร้าง intervals รายวันตามเวลาท้องถิ่นแล้วแปลงเป็น UTC"""
+    if weekdays_only:
+        days = days[days.weekday < 5]
+    starts = (days + pd.Timedelta(hours=start.hour, minutes=start.minute)).tz_localize(
+        tz, ambiguous=False, nonexistent='shift_forward')
+    ends = (days + pd.Timedelta(hours=end.hour, minutes=end.minute)).tz_localize(
+        tz, ambiguous=False, nonexistent='shift_forward')
+    return (starts.tz_convert('UTC').tz_localize(None).as_unit('ns').asi8,
+            ends.tz_convert('UTC').tz_localize(None).as_unit('ns').asi8)
+
+class SessionCalendar:
+    """ปฏิทิน session และวันตลาดปิดเป็น sorted UTC arrays"""
+
+    def __init__(self, sessions=DEFAULT_SESSIONS, start=None, end=None):
+        unknown = set(sessions) - set(SESSIONS)
+        if unknown:
+            raise ValueError(f"Unknown session(s): {', '.join(sorted(unknown))}")
+        self.sessions = tuple(sessions)
+        now = datetime.now(timezone.utc)
+        self.build(start or now - timedelta(days=400), end or now + timedelta(days=30))
+
+    def settings(self):
+        """ค่าทั้งหมดที่กำหนดผลของ mask()/is_open() (ใช้เป็นส่วนหนึ่งของ key ของ results store)"""
+        return {
+            'sessions': {name: [SESSIONS[name][0], str(SESSIONS[name][1]), str(SESSIONS[name][2])]
+                         for name in self.sessions},
+            'market_tz': MARKET_TZ,
+            'weekend': [WEEKEND_CLOSE[0], str(WEEKEND_CLOSE[1]), WEEKEND_OPEN[0], str(WEEKEND_OPEN[1])],
+            'holidays': list(HOLIDAYS),
+        }
+
+    def build(self, start, end):
+        """คำนวณ intervals ทั้งหมดในช่วง [start, end]"""
+        start = pd.Timestamp(_to_utc_ns(start))
+        end = pd.Timestamp(_to_utc_ns(end))
+        days = pd.date_range(start.normalize() - pd.Timedelta(days=2),
+                             end.normalize() + pd.Timedelta(days=2), freq='D')
+
+        # Sessions (union ของทุก session ที่เลือก)
+        parts = [_local_intervals(days, *SESSIONS[name]) for name in self.sessions]
+        self.session_starts, self.session_ends = _merge(
+            np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
+
+        # ตลาดปิด: สุดสัปดาห์ + วันหยุด
+        close_day, close_time = WEEKEND_CLOSE
+        open_day, open_time = WEEKEND_OPEN
+        fridays = days[days.weekday == close_day]
+        weekend_starts, _ = _local_intervals(fridays, MARKET_TZ, close_time, close_time, False)
+        sundays = fridays + pd.Timedelta(days=(open_day - close_day) % 7)
+        weekend_ends, _ = _local_intervals(sundays, MARKET_TZ, open_time, open_time, False)
+
+        holidays = days[days.strftime('%m-%d').isin(HOLIDAYS)]
+        holiday_starts, holiday_ends = _local_intervals(holidays, MARKET_TZ, dt_time(0, 0), dt_time(0, 0), False)
+        holiday_ends = holiday_ends + np.int64(86400 * 10**9)
+
+        self.closed_starts, self.closed_ends = _merge(
+            np.concatenate([weekend_starts, holiday_starts]), np.concatenate([weekend_ends, holiday_ends]))
+        self.start_ns = _to_utc_ns(start)
+        self.end_ns = _to_utc_ns(end)
+
+    def _ensure(self, ts_min, ts_max):
+        """ขยายช่วงปฏิทินถ้าเวลาที่ถามอยู่นอกช่วงที่คำนวณไว้"""
+        if ts_min < self.start_ns or ts_max > self.end_ns:
+            self.build(pd.Timestamp(min(ts_min, self.start_ns), tz='UTC'),
+                       pd.Timestamp(max(ts_max, self.end_ns), tz='UTC'))
+
+    def market_open(self, ts):
+        """ตลาดเปิดอยู่หรือไม่ (ไม่ใช่สุดสัปดาห์/วันหยุด) - scalar"""
+        ns = _to_utc_ns(ts)
+        self._ensure(ns, ns)
+        return not bool(_contains(self.closed_starts, self.closed_ends, ns))
+
+    def is_open(self, ts):
+        """อยู่ใน session ที่เลือกและตลาดเปิดหรือไม่ - scalar, O(log n)"""
+        ns = _to_utc_ns(ts)
+        self._ensure(ns, ns)
+        return bool(_contains(self.session_starts, self.session_ends, ns)) and \
+            not bool(_contains(self.closed_starts, self.closed_ends, ns))
+
+    def mask(self, times):
+        """bool array สำหรับทุกแท่ง (vectorized) - True = อยู่ใน session และตลาดเปิด"""
+        ns = _to_utc_ns(times)
+        if len(ns) == 0:
+            return np.zeros(0, dtype=bool)
+        self._ensure(ns.min(), ns.max())
+        return _contains(self.session_starts, self.session_ends, ns) & \
+            ~_contains(self.closed_starts, self.closed_ends, ns)
+
+    def open_seconds(self, start, end):
+        """เวลาที่ตลาดเปิดในช่วง [start, end) เป็นวินาที - ไม่นับสุดสัปดาห์/วันหยุด"""
+        a, b = _to_utc_ns(start), _to_utc_ns(end)
+        if b <= a:
+            return 0.0
+        self._ensure(a, b)
+        overlap = np.clip(np.minimum(self.closed_ends, b) - np.maximum(self.closed_starts, a), 0, None).sum()
+        return float(b - a - overlap) / 1e9
+
+    def next_open(self, ts, require_session=True):
+        """เวลา (UTC) ที่เร็วที่สุดตั้งแต่ ts ที่ตลาดเปิด (และอยู่ใน session ถ้า require_session)"""
+        ns = _to_utc_ns(ts)
+        self._ensure(ns, ns + np.int64(14 * 86400 * 10**9))
+        for _ in range(64):
+            # ข้ามช่วงตลาดปิด
+            i = np.searchsorted(self.closed_starts, ns, side='right') - 1
+            if i >= 0 and ns < self.closed_ends[i]:
+                ns = self.closed_ends[i]
+                continue
+            if not require_session:
+                break
+            # ข้ามไปยัง session ถัดไป
+            j = np.searchsorted(self.session_starts, ns, side='right') - 1
+            if j >= 0 and ns < self.session_ends[j]:
+                break
+            if j + 1 >= len(self.session_starts):
+                self._ensure(ns, ns + np.int64(14 * 86400 * 10**9))
+                continue
+            ns = self.session_starts[j + 1]
+        return pd.Timestamp(int(ns), tz='UTC')
+
+    def seconds_until_open(self, ts=None, require_session=True):
+        """จำนวนวินาทีที่ต้องรอจนตลาด/session เปิด (0 ถ้าเปิดอยู่)"""
+        ts = ts if ts is not None else datetime.now(timezone.utc)
+        wait = self.next_open(ts, require_session) - pd.Timestamp(_to_utc_ns(ts), tz='UTC')
+        return max(0.0, wait.total_seconds())
+
+_calendar = None
+
+def get_calendar():
+    """ปฏิทิน London/NY ที่ใช้ร่วมกันทั้งโปรแกรม (สร้างครั้งแรกที่เรียก)"""
+    global _calendar
+    if _calendar is None:
+        _calendar = SessionCalendar()
+    return _calendar
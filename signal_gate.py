@@ -0,0 +1,106 @@
+"""
+🚦 Signal Gate
+กฎเดียวกันทั้ง backtest และ live: เข้าเฉพาะตอนสัญญาณเปลี่ยน (HOLD→BUY, BUY→SELL) และพัก cooldown เป็นจำนวนแท่ง
+- backtest: filter() ทั้งชุด/ทีละ chunk (สถานะต่อเนื่องข้าม chunk)
+- live: update() ทีละรอบ O(1) - ประเมินแท่งเดิมซ้ำได้ แต่ยิงได้ไม่เกินครั้งเดียวต่อแท่ง
+  แท่งที่ไม่ได้เห็น (หลับข้าม session, warm start, poll หลุด) นับจากเวลาของแท่งและถือเป็น HOLD เหมือน filter()
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from config import SIGNAL_EDGE_ONLY, SIGNAL_COOLDOWN_BARS, TIMEFRAME, TF_MAP
+from sessions import get_calendar
+
+SIGNAL_DIRECTION = {'BUY': 1, 'SELL': -1, 'HOLD': 0}
+
+@dataclass(frozen=True)
+class GateRules:
+    edge_only: bool = SIGNAL_EDGE_ONLY          # True = ยิงเฉพาะแท่งที่ทิศต่างจากแท่งก่อนหน้า
+    cooldown_bars: int = SIGNAL_COOLDOWN_BARS   # หลังยิงแล้ว ไม่รับสัญญาณอีกกี่แท่ง
+
+class SignalGate:
+    """
+    สถานะของสัญญาณ: ทิศของแท่งก่อนหน้า และจำนวนแท่งที่ยังติด cooldown
+
+    direction ต่อแท่ง: 1 = BUY, -1 = SELL, 0 = HOLD
+    แท่งแรกที่เห็น (ยังไม่รู้ทิศก่อนหน้า) จะไม่ถือเป็น edge
+    """
+
+    def __init__(self, rules=None, timeframe=TIMEFRAME):
+        self.rules = rules or GateRules()
+        self.bar_seconds = TF_MAP[timeframe] * 60  # ใช้นับแท่งที่ผ่านไปใน update()
+        self.prev = None      # ทิศของแท่งก่อนหน้า
+        self.blocked = 0      # จำนวนแท่งถัดไปที่ยังติด cooldown
+        # live: แท่งที่กำลังประเมิน
+        self.bar_time = None
+        self.direction = 0
+        self.fired = False
+
+    def filter(self, direction):
+        """
+        แท่งที่ยิงสัญญาณ (bool array) ของแท่งต่อเนื่องชุดหนึ่ง - เรียกทีละ chunk ได้ ผลเท่ากับเรียกครั้งเดียว
+        """
+        d = np.asarray(direction, dtype=np.int8)
+        fired = np.zeros(len(d), dtype=bool)
+        if not len(d):
+            return fired
+
+        prev = np.empty_like(d)
+        prev[1:] = d[:-1]
+        prev[0] = d[0] if self.prev is None else self.prev
+        wanted = d != 0
+        if self.rules.edge_only:
+            wanted &= d != prev
+
+        # cooldown ขึ้นกับการยิงครั้งก่อน - วนเฉพาะแท่งที่มีสัญญาณ (ส่วนน้อยของทั้งชุด)
+        ready = self.blocked
+        for i in np.flatnonzero(wanted):
+            if i >= ready:
+                fired[i] = True
+                ready = i + self.rules.cooldown_bars + 1
+
+        self.prev = int(d[-1])
+        self.blocked = max(0, ready - len(d))
+        return fired
+
+    def update(self, bar_time, direction):
+        """
+        Live: ประเมินแท่ง bar_time (เรียกซ้ำกับแท่งเดิมได้) - คืน True ถ้าควรเข้า order ตอนนี้
+        เปลี่ยนแท่งเมื่อ bar_time เปลี่ยน จึงไม่ขึ้นกับความถี่ของ loop หรือเวลาเครื่อง
+        """
+        if bar_time != self.bar_time:
+            if self.bar_time is not None:
+                self._close_bar()
+                self._skip(self.bars_between(self.bar_time, bar_time) - 1)
+            self.bar_time, self.fired = bar_time, False
+        self.direction = int(direction)
+
+        if self.fired or self.direction == 0 or self.blocked > 0:
+            return False
+        if self.rules.edge_only and (self.prev is None or self.direction == self.prev):
+            return False
+        self.fired = True
+        return True
+
+    def state(self):
+        """สถานะที่ต้องเก็บไว้ข้าม restart (กฎมาจาก config ปัจจุบันเสมอ)"""
+        return {name: getattr(self, name) for name in ('prev', 'blocked', 'bar_time', 'direction', 'fired')}
+
+    def restore(self, state):
+        for name, value in (state or {}).items():
+            setattr(self, name, value)
+
+    def bars_between(self, earlier, later):
+        """จำนวนแท่งจาก earlier ถึง later ตามเวลาที่ตลาดเปิด (สุดสัปดาห์/วันหยุดไม่นับ)"""
+        return max(1, round(get_calendar().open_seconds(earlier, later) / self.bar_seconds))
+
+    def _skip(self, bars):
+        """แท่งที่ผ่านไปโดยไม่ได้ประเมิน = HOLD: ทิศก่อนหน้าเป็น 0 และ cooldown ลดตามจำนวนแท่ง"""
+        if bars > 0:
+            self.prev = 0
+            self.blocked = max(0, self.blocked - bars)
+
+    def _close_bar(self):
+        """ปิดแท่งที่ประเมินอยู่ - สถานะเหมือน filter() กับแท่งนั้น"""
+        self.prev = self.direction
+        self.blocked = self.rules.cooldown_bars if self.fired else max(0, self.blocked - 1)
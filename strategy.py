@@ -1,68 +1,101 @@
 import pandas as pd
 import numpy as np
-from config import EMA_SHORT, EMA_LONG
-from datetime import datetime, time as dt_time
+from dataclasses import replace
+from config import (EMA_SHORT, EMA_LONG, EMA_VERY_LONG, MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+                    RSI_PERIOD, ADX_PERIOD, ATR_PERIOD, STRATEGY_RULES, SESSION_FILTER, SYMBOL)
+from datetime import datetime, timezone
+from sessions import get_calendar
+from rules import compile_strategy, load_strategy
+from indicators import IndicatorParams, indicator_set
+from exits import scan_exits
+from signal_gate import SignalGate
+from instruments import instrument
 
-def calculate_indicators(df: pd.DataFrame):
-    """คำนวณ indicators ทั้งหมดสำหรับ Golden Trend System"""
+# Periods จาก config (ema_short/ema_long/ema_very_long ในกฎ = EMA_SHORT/EMA_LONG/EMA_VERY_LONG)
+DEFAULT_PARAMS = IndicatorParams(EMA_SHORT, EMA_LONG, EMA_VERY_LONG, MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+                                 RSI_PERIOD, ADX_PERIOD, ATR_PERIOD)
+
+# Golden Trend Rules - setup แรกที่ผ่านเงื่อนไขทั้งหมดจะถูกใช้
+GOLDEN_TREND_RULES = [
+    # เงื่อนไข BUY Setup (ปรับให้อ่อนลง)
+    {
+        'name': 'golden_buy',
+        'signal': 'BUY',
+        'when': [
+            'ema_short > ema_long',          # EMA20 > EMA50
+            'ema_long > ema_very_long',      # EMA50 > EMA200
+            'macd > -0.5',             # MACD > -0.5 (อ่อนลง)
+            '40 <= rsi <= 70',         # RSI between 40-70 (กว้างขึ้น)
+            'adx > 20',                # ADX > 20 (อ่อนลง)
+        ],
+        'sl_atr': 1.5,
+        'tp_atr': 2.5,
+        'reason': 'Golden Trend BUY: EMA Stack✅ MACD+✅ RSI:{rsi:.1f}✅ ADX:{adx:.1f}✅',
+    },
+    # เงื่อนไข SELL Setup (ปรับให้อ่อนลง)
+    {
+        'name': 'golden_sell',
+        'signal': 'SELL',
+        'when': [
+            'ema_short < ema_long',          # EMA20 < EMA50
+            'ema_long < ema_very_long',      # EMA50 < EMA200
+            'macd < 0.5',              # MACD < 0.5 (อ่อนลง)
+            '30 <= rsi <= 60',         # RSI between 30-60 (กว้างขึ้น)
+            'adx > 20',                # ADX > 20 (อ่อนลง)
+        ],
+        'sl_atr': 1.5,
+        'tp_atr': 2.5,
+        'reason': 'Golden Trend SELL: EMA Stack✅ MACD-✅ RSI:{rsi:.1f}✅ ADX:{adx:.1f}✅',
+    },
+    # Alternative Strategy - Simple EMA Cross + RSI เมื่อ Golden Trend ไม่ได้สัญญาณ
+    {
+        'name': 'alternative_buy',
+        'signal': 'BUY',
+        'when': ['ema_short > ema_long', '50 < rsi < 80', 'macd > -1.0'],
+        'sl_atr': 1.2,
+        'tp_atr': 2.0,
+        'reason': 'Alternative BUY: EMA Cross + RSI:{rsi:.1f}',
+    },
+    {
+        'name': 'alternative_sell',
+        'signal': 'SELL',
+        'when': ['ema_short < ema_long', '20 < rsi < 50', 'macd < 1.0'],
+        'sl_atr': 1.2,
+        'tp_atr': 2.0,
+        'reason': 'Alternative SELL: EMA Cross + RSI:{rsi:.1f}',
+    },
+]
+
+# Compile ครั้งเดียวตอน import (หรือโหลดจากไฟล์ JSON ถ้าตั้ง STRATEGY_RULES)
+GOLDEN_TREND = load_strategy(STRATEGY_RULES) if STRATEGY_RULES else compile_strategy(GOLDEN_TREND_RULES)
+
+def calculate_indicators(df: pd.DataFrame, params: IndicatorParams = None):
+    """
+    คำนวณ indicators ทั้งหมดสำหรับ Golden Trend System
+
+    Args:
+        params: IndicatorParams (None = periods จาก config)
+
+    คอลัมน์ EMA มีทั้งชื่อตาม period (ema20, ema50, ...) และชื่อบทบาท (ema_short, ema_long, ema_very_long)
+    ผลที่เคยคำนวณบนแท่งชุดเดียวกันด้วย period เดียวกันจะดึงจาก indicator cache
+    """
     df = df.copy()
-    
-    # EMA 20, 50, 200
-    df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
-    df['ema50'] = df['close'].ewm(span=50, adjust=False).mean()
-    df['ema200'] = df['close'].ewm(span=200, adjust=False).mean()
-    
-    # MACD (12, 26, 9)
-    exp12 = df['close'].ewm(span=12, adjust=False).mean()
-    exp26 = df['close'].ewm(span=26, adjust=False).mean()
-    df['macd'] = exp12 - exp26
-    df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-    df['macd_histogram'] = df['macd'] - df['macd_signal']
-    
-    # RSI (14)
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-    
-    # ADX (14) - Simplified version
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift(1))
-    low_close = np.abs(df['low'] - df['close'].shift(1))
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-    
-    plus_dm = df['high'].diff()
-    minus_dm = df['low'].diff() * -1
-    plus_dm[plus_dm < 0] = 0
-    minus_dm[minus_dm < 0] = 0
-    
-    plus_di = 100 * (plus_dm.rolling(14).mean() / true_range.rolling(14).mean())
-    minus_di = 100 * (minus_dm.rolling(14).mean() / true_range.rolling(14).mean())
-    
-    dx = (np.abs(plus_di - minus_di) / np.abs(plus_di + minus_di)) * 100
-    df['adx'] = dx.rolling(14).mean()
-    
-    # ATR (14)
-    df['atr'] = true_range.rolling(window=14).mean()
+    values = indicator_set(df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+                           df['close'].to_numpy(dtype=float), params or DEFAULT_PARAMS)
+    for name, column in values.items():
+        df[name] = column
     
     return df
 
-def is_london_or_ny_session():
-    """ตรวจสอบว่าอยู่ในช่วงเวลา London หรือ NY session หรือไม่"""
-    # สำหรับ Backtest - อนุญาตทุกเวลา (คืน True เสมอ)
-    return True
+def is_london_or_ny_session(ts=None):
+    """ตรวจสอบว่าอยู่ในช่วงเวลา London หรือ NY session หรือไม่ (ts = เวลาแท่ง, None = ตอนนี้)"""
+    # SESSION_FILTER ปิดอยู่ - อนุญาตทุกเวลา (คืน True เสมอ)
+    if not SESSION_FILTER:
+        return True
     
-    # Code เดิมสำหรับ Live Trading
-    # now = datetime.now().time()
-    # london_start = dt_time(15, 0)
-    # london_end = dt_time(23, 59)
-    # ny_start = dt_time(20, 0)
-    # ny_end = dt_time(5, 0)
-    # return (london_start <= now <= london_end) or (now >= ny_start or now <= ny_end)
-
-def golden_trend_system(df: pd.DataFrame, risk_pct=1.5, account_balance=10000):
+    return get_calendar().is_open(ts if ts is not None else datetime.now(timezone.utc))
+
+def golden_trend_system(df: pd.DataFrame, risk_pct=1.5, account_balance=10000, params=None):
     """
     Golden Trend System สำหรับ XAUUSD
     
@@ -70,6 +103,7 @@ def golden_trend_system(df: pd.DataFrame, risk_pct=1.5, account_balance=10000):
         df: DataFrame with OHLC data
         risk_pct: Risk percentage per trade (1-2%)
         account_balance: Account balance for position sizing
+        params: IndicatorParams (None = periods จาก config)
     
     Returns:
         dict: {
@@ -87,139 +121,122 @@ def golden_trend_system(df: pd.DataFrame, risk_pct=1.5, account_balance=10000):
         return {'signal': 'HOLD', 'reason': 'ข้อมูลไม่เพียงพอ (ต้อง >= 200 candles)'}
     
     # คำนวณ indicators
-    df = calculate_indicators(df)
+    df = calculate_indicators(df, params)
     
     # ใช้ข้อมูล candle ล่าสุด (closed candle)
     current = df.iloc[-1]
     
     # ตรวจสอบเวลา trading
-    if not is_london_or_ny_session():
+    if not is_london_or_ny_session(current['time'] if 'time' in df.columns else None):
         return {'signal': 'HOLD', 'reason': 'นอกเวลา London/NY session'}
     
-    # เงื่อนไข BUY Setup (ปรับให้อ่อนลง)
-    buy_conditions = [
-        current['ema20'] > current['ema50'],           # EMA20 > EMA50
-        current['ema50'] > current['ema200'],          # EMA50 > EMA200  
-        current['macd'] > -0.5,                        # MACD > -0.5 (อ่อนลง)
-        40 <= current['rsi'] <= 70,                    # RSI between 40-70 (กว้างขึ้น)
-        current['adx'] > 20                            # ADX > 20 (อ่อนลง)
-    ]
-    
-    # เงื่อนไข SELL Setup (ปรับให้อ่อนลง)  
-    sell_conditions = [
-        current['ema20'] < current['ema50'],           # EMA20 < EMA50
-        current['ema50'] < current['ema200'],          # EMA50 < EMA200
-        current['macd'] < 0.5,                         # MACD < 0.5 (อ่อนลง)
-        30 <= current['rsi'] <= 60,                    # RSI between 30-60 (กว้างขึ้น)
-        current['adx'] > 20                            # ADX > 20 (อ่อนลง)
-    ]
+    # ประเมินกฎที่ compile แล้วกับแท่งล่าสุด
+    setup = GOLDEN_TREND.evaluate_last(df)
+    if setup is not None:
+        return build_signal(setup, current, risk_pct, account_balance)
+    
+    # วิเคราะห์เงื่อนไขที่ไม่ผ่าน
+    failed_conditions = []
+    if (not (current['ema_short'] > current['ema_long'] > current['ema_very_long'])
+            and not (current['ema_short'] < current['ema_long'] < current['ema_very_long'])):
+        failed_conditions.append("EMA Stack")
+    if abs(current['macd']) > 2:
+        failed_conditions.append("MACD ผันผวนมาก")
+    if current['rsi'] < 30 or current['rsi'] > 70:
+        failed_conditions.append(f"RSI:{current['rsi']:.1f} extreme")
+    if current['adx'] <= 15:
+        failed_conditions.append(f"ADX:{current['adx']:.1f} ไม่มี trend")
+        
+    return {
+        'signal': 'HOLD',
+        'reason': f'รอสัญญาณ: {", ".join(failed_conditions) if failed_conditions else "ตรวจสอบเงื่อนไข"}'
+    }
+
+def signal_setups(df: pd.DataFrame, strategy=None):
+    """ประเมินกฎทุกแท่งในครั้งเดียว (สำหรับ backtest) - df ต้องผ่าน calculate_indicators แล้ว
+
+    Returns:
+        np.ndarray: index ของ setup ใน strategy.setups (-1 = HOLD)
+    """
+    setup_idx = (strategy or GOLDEN_TREND).evaluate_frame(df)
     
+    # กรองแท่งนอก London/NY session ทั้งหมดในครั้งเดียว
+    if SESSION_FILTER and 'time' in df.columns:
+        setup_idx[~get_calendar().mask(df['time'])] = -1
+    return setup_idx
+
+def setup_directions(setup_idx, strategy=None):
+    """index ของ setup ต่อแท่ง → ทิศ (1 = BUY, -1 = SELL, 0 = HOLD)"""
+    setups = (strategy or GOLDEN_TREND).setups
+    table = np.array([1 if s.signal == 'BUY' else -1 for s in setups] + [0], dtype=np.int8)
+    return table[setup_idx]  # -1 (HOLD) ชี้ไปช่องสุดท้าย = 0
+
+def trade_candidates(df: pd.DataFrame, strategy=None, exit_rule="sl_first", warmup=200, gate=None):
+    """
+    แท่งที่สัญญาณผ่าน SignalGate (edge + cooldown) พร้อม SL/TP และแท่ง/ราคาที่ชน SL/TP
+    (df ต้องผ่าน calculate_indicators แล้ว)
+
+    Returns:
+        dict of arrays: bar, is_buy, entry, sl, tp, exit_bar, exit_code, exit_price
+        position ที่ไม่ชนจนจบข้อมูลจะปิดที่ราคาปิดแท่งสุดท้าย (exit_code = EXIT_NONE)
+    """
+    strategy = strategy or GOLDEN_TREND
+    setup_idx = signal_setups(df, strategy)
+    close = df['close'].to_numpy(dtype=float)
+    atr = df['atr'].to_numpy(dtype=float)
+
+    fired = (gate or SignalGate()).filter(setup_directions(setup_idx, strategy))
+    bar = np.flatnonzero(fired[warmup:]) + warmup
+    bar = bar[np.isfinite(atr[bar]) & (bar < len(df) - 1)]  # แท่งสุดท้ายไม่มีแท่งถัดไปให้ถือ
+    chosen = setup_idx[bar]
+    direction = np.array([1.0 if s.signal == 'BUY' else -1.0 for s in strategy.setups])[chosen]
+    sl_atr = np.array([s.sl_atr for s in strategy.setups])[chosen]
+    tp_atr = np.array([s.tp_atr for s in strategy.setups])[chosen]
+
+    entry = close[bar]
+    sl = entry - direction * sl_atr * atr[bar]
+    tp = entry + direction * tp_atr * atr[bar]
+    is_buy = direction > 0
+    exit_bar, exit_code, exit_price = scan_exits(bar, is_buy, sl, tp, df['open'].to_numpy(dtype=float),
+                                                 df['high'].to_numpy(dtype=float),
+                                                 df['low'].to_numpy(dtype=float), exit_rule)
+    still_open = exit_bar < 0
+    exit_bar[still_open] = len(df) - 1
+    exit_price[still_open] = close[-1]
+
+    return {'bar': bar, 'is_buy': is_buy, 'entry': entry, 'sl': sl, 'tp': tp,
+            'exit_bar': exit_bar, 'exit_code': exit_code, 'exit_price': exit_price}
+
+def position_size(entry_price, sl_price, risk_pct=1.5, account_balance=10000, symbol=SYMBOL):
+    """Lot size ตามความเสี่ยง (risk_pct ของ balance เมื่อโดน SL) ตามขนาดสัญญาของ symbol (instruments.INSTRUMENTS)"""
+    return instrument(symbol).position_size(entry_price, sl_price, risk_pct, account_balance)
+
+def build_signal(setup, current, risk_pct=1.5, account_balance=10000):
+    """สร้าง signal dict จาก setup ที่ผ่านและแท่งปัจจุบัน"""
     entry_price = current['close']
     atr = current['atr']
-    
-    # BUY Signal
-    if all(buy_conditions):
-        sl_price = entry_price - (1.5 * atr)
-        tp_price = entry_price + (2.5 * atr)
-        
-        # คำนวณ lot size based on risk
-        sl_distance_points = (entry_price - sl_price) * 100  # XAUUSD: 1 point = $0.01
-        risk_amount = account_balance * (risk_pct / 100)
-        lot_size = min(0.1, max(0.01, risk_amount / sl_distance_points))
-        
-        return {
-            'signal': 'BUY',
-            'entry_price': entry_price,
-            'sl_price': sl_price,
-            'tp_price': tp_price,
-            'lot_size': round(lot_size, 2),
-            'atr': atr,
-            'reason': f'Golden Trend BUY: EMA Stack✅ MACD+✅ RSI:{current["rsi"]:.1f}✅ ADX:{current["adx"]:.1f}✅'
-        }
-    
-    # SELL Signal
-    elif all(sell_conditions):
-        sl_price = entry_price + (1.5 * atr)
-        tp_price = entry_price - (2.5 * atr)
-        
-        # คำนวณ lot size based on risk
-        sl_distance_points = (sl_price - entry_price) * 100  # XAUUSD: 1 point = $0.01
-        risk_amount = account_balance * (risk_pct / 100)
-        lot_size = min(0.1, max(0.01, risk_amount / sl_distance_points))
-        
-        return {
-            'signal': 'SELL',
-            'entry_price': entry_price,
-            'sl_price': sl_price,
-            'tp_price': tp_price,
-            'lot_size': round(lot_size, 2),
-            'atr': atr,
-            'reason': f'Golden Trend SELL: EMA Stack✅ MACD-✅ RSI:{current["rsi"]:.1f}✅ ADX:{current["adx"]:.1f}✅'
-        }
-    
-    # Alternative Strategy - เมื่อ Golden Trend ไม่ได้สัญญาณ
-    else:
-        # ลองใช้ Simple EMA Cross + RSI
-        if (current['ema20'] > current['ema50'] and 
-            current['rsi'] > 50 and current['rsi'] < 80 and
-            current['macd'] > -1.0):
-            
-            sl_price = entry_price - (1.2 * atr)
-            tp_price = entry_price + (2.0 * atr)
-            
-            sl_distance_points = (entry_price - sl_price) * 100
-            risk_amount = account_balance * (risk_pct / 100)
-            lot_size = min(0.1, max(0.01, risk_amount / sl_distance_points))
-            
-            return {
-                'signal': 'BUY',
-                'entry_price': entry_price,
-                'sl_price': sl_price,
-                'tp_price': tp_price,
-                'lot_size': round(lot_size, 2),
-                'atr': atr,
-                'reason': f'Alternative BUY: EMA Cross + RSI:{current["rsi"]:.1f}'
-            }
-            
-        elif (current['ema20'] < current['ema50'] and 
-              current['rsi'] < 50 and current['rsi'] > 20 and
-              current['macd'] < 1.0):
-            
-            sl_price = entry_price + (1.2 * atr)
-            tp_price = entry_price - (2.0 * atr)
-            
-            sl_distance_points = (sl_price - entry_price) * 100
-            risk_amount = account_balance * (risk_pct / 100)
-            lot_size = min(0.1, max(0.01, risk_amount / sl_distance_points))
-            
-            return {
-                'signal': 'SELL',
-                'entry_price': entry_price,
-                'sl_price': sl_price,
-                'tp_price': tp_price,
-                'lot_size': round(lot_size, 2),
-                'atr': atr,
-                'reason': f'Alternative SELL: EMA Cross + RSI:{current["rsi"]:.1f}'
-            }
-        
-        # วิเคราะห์เงื่อนไขที่ไม่ผ่าน
-        failed_conditions = []
-        if not (current['ema20'] > current['ema50'] > current['ema200']) and not (current['ema20'] < current['ema50'] < current['ema200']):
-            failed_conditions.append("EMA Stack")
-        if abs(current['macd']) > 2:
-            failed_conditions.append("MACD ผันผวนมาก")
-        if current['rsi'] < 30 or current['rsi'] > 70:
-            failed_conditions.append(f"RSI:{current['rsi']:.1f} extreme")
-        if current['adx'] <= 15:
-            failed_conditions.append(f"ADX:{current['adx']:.1f} ไม่มี trend")
-            
-        return {
-            'signal': 'HOLD',
-            'reason': f'รอสัญญาณ: {", ".join(failed_conditions) if failed_conditions else "ตรวจสอบเงื่อนไข"}'
-        }
+    direction = 1 if setup.signal == 'BUY' else -1
+    
+    sl_price = entry_price - direction * (setup.sl_atr * atr)
+    tp_price = entry_price + direction * (setup.tp_atr * atr)
+    
+    lot_size = position_size(entry_price, sl_price, risk_pct, account_balance)
+    
+    return {
+        'signal': setup.signal,
+        'entry_price': entry_price,
+        'sl_price': sl_price,
+        'tp_price': tp_price,
+        'lot_size': lot_size,
+        'atr': atr,
+        'reason': setup.reason.format(**current.to_dict())
+    }
 
 # Backward compatibility - เก็บ function เก่าไว้
-def ema_strategy(df: pd.DataFrame):
-    """Legacy EMA strategy - ใช้ Golden Trend แทน"""
-    result = golden_trend_system(df)
+def ema_strategy(df: pd.DataFrame, ema_short=None, ema_long=None):
+    """Legacy EMA strategy - ใช้ Golden Trend แทน (ema_short/ema_long แทนที่ period จาก config)"""
+    params = DEFAULT_PARAMS
+    if ema_short or ema_long:
+        params = replace(params, ema_short=ema_short or params.ema_short, ema_long=ema_long or params.ema_long)
+    result = golden_trend_system(df, params=params)
     return result['signal']
@@ -4,11 +4,12 @@
 ทดสอบ Golden Trend System สำหรับ XAUUSD
 """
 
+import sys
+import numpy as np
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-from strategy import golden_trend_system, calculate_indicators
+from strategy import golden_trend_system, calculate_indicators, signal_setups, GOLDEN_TREND, DEFAULT_PARAMS
 from config import SYMBOL
+from market_data import download_bars
 
 def test_golden_trend():
     """ทดสอบ Golden Trend System"""
@@ -24,26 +25,13 @@ def test_golden_trend():
     # ดึงข้อมูล XAUUSD
     print("📥 ดึงข้อมูลตลาด...")
     try:
-        if SYMBOL == "XAUUSD":
-            yahoo_symbol = "GC=F"  # Gold Futures
-        else:
-            yahoo_symbol = f"{SYMBOL}=X"
-        
-        # ดึงข้อมูล 6 เดือนล่าสุด
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=180)
+        # ดึงข้อมูล 6 เดือนล่าสุด (DATA_SOURCE=synthetic ใช้ข้อมูลจำลองแทน Yahoo)
+        df = download_bars(SYMBOL, "H1", 180)
         
-        data = yf.download(yahoo_symbol, start=start_date, end=end_date, interval="1h")
-        
-        if data.empty:
+        if df is None or df.empty:
             print("❌ ไม่สามารถดึงข้อมูลได้")
             return
         
-        # เตรียมข้อมูล
-        df = data.reset_index()
-        df.columns = ['time', 'open', 'high', 'low', 'close', 'volume']
-        df = df.dropna()
-        
         print(f"✅ ข้อมูล: {len(df)} candles ({df['time'].iloc[0].strftime('%Y-%m-%d')} ถึง {df['time'].iloc[-1].strftime('%Y-%m-%d')})")
         
         # คำนวณ indicators
@@ -52,13 +40,14 @@ def test_golden_trend():
         
         # แสดงข้อมูลล่าสุด
         latest = df.iloc[-1]
+        short, long, very_long = DEFAULT_PARAMS.ema_short, DEFAULT_PARAMS.ema_long, DEFAULT_PARAMS.ema_very_long
         print(f"""
 📊 ข้อมูลล่าสุด ({latest['time'].strftime('%Y-%m-%d %H:%M')}):
 ----------------------------------------
 💰 ราคา: ${latest['close']:.2f}
-📈 EMA20: ${latest['ema20']:.2f}
-📈 EMA50: ${latest['ema50']:.2f} 
-📈 EMA200: ${latest['ema200']:.2f}
+📈 EMA{short}: ${latest['ema_short']:.2f}
+📈 EMA{long}: ${latest['ema_long']:.2f} 
+📈 EMA{very_long}: ${latest['ema_very_long']:.2f}
 🔄 MACD: {latest['macd']:.4f}
 ⚡ RSI: {latest['rsi']:.1f}
 💪 ADX: {latest['adx']:.1f} {'(Strong Trend)' if latest['adx'] > 25 else '(Weak Trend)'}
@@ -66,10 +55,10 @@ def test_golden_trend():
         """)
         
         # EMA Stack Analysis
-        if latest['ema20'] > latest['ema50'] > latest['ema200']:
-            ema_trend = "🟢 Bullish Stack (EMA20>50>200)"
-        elif latest['ema20'] < latest['ema50'] < latest['ema200']:
-            ema_trend = "🔴 Bearish Stack (EMA20<50<200)"
+        if latest['ema_short'] > latest['ema_long'] > latest['ema_very_long']:
+            ema_trend = f"🟢 Bullish Stack (EMA{short}>{long}>{very_long})"
+        elif latest['ema_short'] < latest['ema_long'] < latest['ema_very_long']:
+            ema_trend = f"🔴 Bearish Stack (EMA{short}<{long}<{very_long})"
         else:
             ema_trend = "🟡 Mixed/Sideways"
         
@@ -104,31 +93,34 @@ def test_golden_trend():
         print("\n📈 Quick Backtest (30 วันล่าสุด):")
         print("=" * 40)
         
-        recent_data = df.tail(720)  # 30 วัน × 24 ชั่วโมง
-        signals = []
-        
-        for i in range(200, len(recent_data)):  # เริ่มจากตำแหน่งที่มี indicator ครบ
-            test_df = recent_data.iloc[:i+1].copy()
-            signal_result = golden_trend_system(test_df, risk_pct=1.5, account_balance=10000)
-            if signal_result['signal'] in ['BUY', 'SELL']:
-                signals.append({
-                    'time': test_df.iloc[-1]['time'],
-                    'signal': signal_result['signal'],
-                    'price': signal_result['entry_price'],
-                    'sl': signal_result['sl_price'],
-                    'tp': signal_result['tp_price']
-                })
+        # ใช้ indicators ที่คำนวณจากข้อมูลทั้งหมดแล้ว (EMA200 อุ่นเครื่องครบ) และประเมินกฎทุกแท่งในครั้งเดียว
+        setup_idx = signal_setups(df)
+        recent = np.arange(max(200, len(df) - 720), len(df))  # 30 วัน × 24 ชั่วโมง
+        recent = recent[setup_idx[recent] >= 0]
+        
+        setups = GOLDEN_TREND.setups
+        chosen = setup_idx[recent]
+        is_buy = np.array([s.signal == 'BUY' for s in setups])[chosen]
+        direction = np.where(is_buy, 1, -1)
+        prices = df['close'].to_numpy()[recent]
+        atr = df['atr'].to_numpy()[recent]
+        
+        signals = pd.DataFrame({
+            'time': df['time'].to_numpy()[recent],
+            'signal': np.where(is_buy, 'BUY', 'SELL'),
+            'price': prices,
+            'sl': prices - direction * np.array([s.sl_atr for s in setups])[chosen] * atr,
+            'tp': prices + direction * np.array([s.tp_atr for s in setups])[chosen] * atr,
+        })
         
         print(f"🎯 Total Signals: {len(signals)}")
-        buy_signals = [s for s in signals if s['signal'] == 'BUY']
-        sell_signals = [s for s in signals if s['signal'] == 'SELL']
-        print(f"🟢 BUY Signals: {len(buy_signals)}")
-        print(f"🔴 SELL Signals: {len(sell_signals)}")
+        print(f"🟢 BUY Signals: {int(is_buy.sum())}")
+        print(f"🔴 SELL Signals: {int((~is_buy).sum())}")
         
-        if signals:
+        if len(signals):
             print(f"\n📅 ล่าสุด 3 สัญญาณ:")
-            for signal in signals[-3:]:
-                print(f"   {signal['time'].strftime('%m-%d %H:%M')} - {signal['signal']} @ ${signal['price']:.2f}")
+            for signal in signals.tail(3).itertuples():
+                print(f"   {signal.time.strftime('%m-%d %H:%M')} - {signal.signal} @ ${signal.price:.2f}")
         
         print(f"""
 🎯 Golden Trend System พร้อมใช้งาน!
@@ -144,4 +136,8 @@ def test_golden_trend():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    test_golden_trend()
\ No newline at end of file
+    if "--profile" in sys.argv:
+        from profiler import run_profiled
+        run_profiled(test_golden_trend, "test_golden_trend")
+    else:
+        test_golden_trend()
\ No newline at end of file
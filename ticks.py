@@ -0,0 +1,198 @@
+"""
+⏱️ Tick Ingestion
+เก็บ tick ใน ring buffer แบบ NumPy structured array (time_msc, bid, ask, flags)
+และสร้างแท่งเทียนจาก tick แบบ incremental - ปิดแท่งได้ทันทีที่ tick แรกของแท่งถัดไปเข้ามา
+"""
+
+import time
+from datetime import datetime, timezone
+import numpy as np
+from bar_store import BAR_DTYPE
+from utils.logger import get_logger
+
+log = get_logger("ticks")
+
+TICK_DTYPE = np.dtype([('time_msc', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('flags', '<u4')])
+
+def to_ticks(raw):
+    """แปลง array จาก copy_ticks_from/copy_ticks_range (มีหลาย field) เป็น TICK_DTYPE"""
+    ticks = np.empty(len(raw), dtype=TICK_DTYPE)
+    for name in TICK_DTYPE.names:
+        ticks[name] = raw[name]
+    return ticks
+
+class TickRing:
+    """Ring buffer ขนาดคงที่ของ tick ล่าสุด (เขียนทับตัวเก่าสุดเมื่อเต็ม)"""
+
+    def __init__(self, capacity=200_000):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.head = 0    # ตำแหน่งที่จะเขียนถัดไป
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def extend(self, ticks):
+        """เพิ่ม tick ต่อท้าย (vectorized - เขียนสูงสุด 2 ช่วงเมื่อวนรอบ)"""
+        ticks = ticks[-self.capacity:]
+        n = len(ticks)
+        first = min(n, self.capacity - self.head)
+        self.data[self.head:self.head + first] = ticks[:first]
+        self.data[:n - first] = ticks[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    def last(self, n=None):
+        """tick ล่าสุด n ตัว เรียงจากเก่าไปใหม่ (copy)"""
+        n = self.count if n is None else min(n, self.count)
+        idx = (self.head - n + np.arange(n)) % self.capacity
+        return self.data[idx]
+
+    def since(self, time_msc):
+        """tick ตั้งแต่เวลา time_msc (ms) เป็นต้นไป"""
+        ticks = self.last()
+        return ticks[np.searchsorted(ticks['time_msc'], time_msc):]
+
+    def spread_stats(self, since_msc=None):
+        """สถิติ spread จริง (ask - bid) ของ tick ในช่วงที่เลือก"""
+        ticks = self.last() if since_msc is None else self.since(since_msc)
+        if not len(ticks):
+            return None
+        spread = ticks['ask'] - ticks['bid']
+        return {'ticks': len(ticks), 'mean': float(spread.mean()), 'median': float(np.median(spread)),
+                'max': float(spread.max())}
+
+class BarBuilder:
+    """
+    สร้างแท่ง OHLC (ราคา bid เหมือนกราฟ MT5) จาก tick ทีละชุด
+    volume = จำนวน tick ในแท่ง
+    """
+
+    def __init__(self, timeframe_seconds):
+        self.period_msc = timeframe_seconds * 1000
+        self.current = None  # แท่งที่กำลังก่อตัว: [bucket, open, high, low, close, volume]
+        self.closed_bucket = None  # bucket ของแท่งล่าสุดที่ปิดไปแล้ว
+
+    def update(self, ticks):
+        """
+        ป้อน tick ใหม่ (เรียงตามเวลา) - คืนแท่งที่ปิดแล้วจาก tick ชุดนี้ (BAR_DTYPE, อาจว่าง)
+        """
+        bucket = ticks['time_msc'] // self.period_msc
+        if self.closed_bucket is not None:
+            late = bucket <= self.closed_bucket  # tick ที่มาถึงหลังแท่งของมันถูก flush ไปแล้ว
+            ticks, bucket = ticks[~late], bucket[~late]
+        if not len(ticks):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        bid = ticks['bid']
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        # OHLC ของทุก bucket ใน batch ในครั้งเดียว
+        ends = np.r_[starts[1:], len(ticks)] - 1
+        groups = np.column_stack([
+            bucket[starts], bid[starts], np.maximum.reduceat(bid, starts),
+            np.minimum.reduceat(bid, starts), bid[ends], ends - starts + 1,
+        ]).astype(float)
+
+        # รวม bucket แรกกับแท่งที่กำลังก่อตัวอยู่ถ้าเป็นแท่งเดียวกัน
+        closed = []
+        if self.current is not None:
+            if groups[0, 0] == self.current[0]:
+                first = groups[0]
+                first[1] = self.current[1]
+                first[2] = max(first[2], self.current[2])
+                first[3] = min(first[3], self.current[3])
+                first[5] += self.current[5]
+            else:
+                closed.append(self.current)
+
+        closed.extend(groups[:-1])
+        self.current = groups[-1].copy()
+        return self._to_bars(closed)
+
+    def flush(self, now_msc):
+        """ปิดแท่งปัจจุบันถ้าเลยเวลาสิ้นสุดแท่งแล้ว (ช่วงที่ไม่มี tick ใหม่เข้ามา)"""
+        if self.current is None or now_msc < (self.current[0] + 1) * self.period_msc:
+            return np.empty(0, dtype=BAR_DTYPE)
+        bar, self.current = self.current, None
+        return self._to_bars([bar])
+
+    def _to_bars(self, rows):
+        bars = np.empty(len(rows), dtype=BAR_DTYPE)
+        if len(rows):
+            rows = np.asarray(rows)
+            self.closed_bucket = rows[-1, 0]
+            bars['time'] = rows[:, 0].astype(np.int64) * self.period_msc * 1_000_000  # ms -> ns
+            for i, name in enumerate(('open', 'high', 'low', 'close', 'volume'), start=1):
+                bars[name] = rows[:, i]
+        return bars
+
+class TickFeed:
+    """
+    ดึง tick จาก MT5 ต่อเนื่องด้วย copy_ticks_from แล้วป้อนเข้า ring และ bar builder
+
+    Args:
+        source: module MetaTrader5 (หรือ object ที่มี copy_ticks_from และ COPY_TICKS_ALL)
+
+    หมายเหตุ: เวลา tick ของ MT5 เป็นเวลา server จึงไม่ใช้นาฬิกาเครื่องเป็นขอบเขตการดึง
+    """
+
+    def __init__(self, source, symbol, timeframe_seconds, capacity=200_000, batch=100_000):
+        self.source = source
+        self.symbol = symbol
+        self.batch = batch
+        self.ring = TickRing(capacity)
+        self.builder = BarBuilder(timeframe_seconds)
+        self.last_msc = 0
+        self.at_last = 0          # จำนวน tick ที่เวลา last_msc ที่รับไปแล้ว (หลาย tick อาจมี ms เดียวกัน)
+        self.clock_offset = None  # เวลา server - เวลาเครื่อง (ms) โดยประมาณจาก tick ล่าสุด
+
+    def start(self, from_msc):
+        """เริ่มรับ tick ตั้งแต่เวลา from_msc (ms, เวลา server) - ใช้ต้นแท่งที่ยังไม่ปิดเพื่อให้แท่งแรกครบ"""
+        self.last_msc = int(from_msc)
+        self.at_last = 0
+
+    def ingest(self, raw, wall_msc=None):
+        """รับ tick ดิบ (อาจซ้ำกับรอบก่อน) - คืนแท่งที่ปิดแล้ว"""
+        if raw is None or not len(raw):
+            return np.empty(0, dtype=BAR_DTYPE)
+        ticks = to_ticks(raw)
+
+        # ตัด tick ที่รับไปแล้ว: ก่อน last_msc ทั้งหมด และ at_last ตัวแรกที่ last_msc
+        times = ticks['time_msc']
+        new = times > self.last_msc
+        new[np.flatnonzero(times == self.last_msc)[self.at_last:]] = True
+        ticks = ticks[new]
+        if not len(ticks):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        newest = int(ticks['time_msc'][-1])
+        if newest == self.last_msc:
+            self.at_last += len(ticks)
+        else:
+            self.at_last = int(np.count_nonzero(ticks['time_msc'] == newest))
+            self.last_msc = newest
+
+        if wall_msc is not None:
+            offset = newest - wall_msc
+            self.clock_offset = offset if self.clock_offset is None else max(self.clock_offset, offset)
+
+        self.ring.extend(ticks)
+        return self.builder.update(ticks)
+
+    def poll(self):
+        """ดึง tick ใหม่จาก MT5 - คืนแท่งที่ปิดแล้ว (BAR_DTYPE) รวมแท่งที่หมดเวลาแต่ไม่มี tick ใหม่"""
+        wall_msc = int(time.time() * 1000)
+        start = datetime.fromtimestamp(self.last_msc / 1000, tz=timezone.utc)
+        raw = self.source.copy_ticks_from(self.symbol, start, self.batch, self.source.COPY_TICKS_ALL)
+        if raw is None:
+            log.warning(f"copy_ticks_from failed for {self.symbol}")
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        bars = self.ingest(raw, wall_msc)
+        if self.clock_offset is not None:
+            flushed = self.builder.flush(wall_msc + self.clock_offset)
+            if len(flushed):
+                bars = np.concatenate([bars, flushed])
+        return bars
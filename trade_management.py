@@ -0,0 +1,70 @@
+"""
+🛡️ Trade Management
+จัดการ position ที่เปิดอยู่: ATR trailing stop, break-even และ partial take-profit
+คำนวณแบบ vectorized ทีละแท่งสำหรับทุก position พร้อมกัน
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from config import TRAIL_ATR, BREAKEVEN_ATR, PARTIAL_TP_ATR, PARTIAL_TP_FRACTION, SLTP_STEP_POINTS
+
+@dataclass(frozen=True)
+class ManagementRules:
+    trail_atr: float = TRAIL_ATR                    # ระยะ trailing stop (× ATR), 0 = ปิด
+    breakeven_atr: float = BREAKEVEN_ATR            # ย้าย SL ไปที่ทุนเมื่อกำไรถึง N × ATR, 0 = ปิด
+    partial_tp_atr: float = PARTIAL_TP_ATR          # ปิดบางส่วนเมื่อกำไรถึง N × ATR, 0 = ปิด
+    partial_fraction: float = PARTIAL_TP_FRACTION   # สัดส่วน lot ที่ปิดเมื่อถึง partial TP
+    sltp_step_points: float = SLTP_STEP_POINTS      # MT5: ส่ง modify เมื่อ SL ขยับอย่างน้อยกี่ point
+
+    @property
+    def enabled(self):
+        return self.trail_atr > 0 or self.breakeven_atr > 0 or self.partial_tp_atr > 0
+
+DEFAULT_RULES = ManagementRules()
+
+def manage_stops(is_buy, entry, sl, atr, best, bar_high, bar_low, partial_done, rules=DEFAULT_RULES):
+    """
+    อัปเดต stop ของทุก position ด้วยแท่งที่ปิดแล้วหนึ่งแท่ง (เรียกหลังตรวจ SL/TP ของแท่งนั้น)
+
+    Args:
+        is_buy, entry, sl, atr, best, partial_done: arrays ต่อ position
+            (best = ราคาที่ดีที่สุดตั้งแต่เปิด position)
+        bar_high, bar_low: ราคาของแท่ง
+
+    Returns:
+        dict: {'sl': SL ใหม่, 'best': ราคาที่ดีที่สุดใหม่,
+               'partial': bool array ที่ถึง partial TP ในแท่งนี้, 'partial_price': ราคาที่ปิดบางส่วน}
+    """
+    is_buy = np.asarray(is_buy, dtype=bool)
+    entry = np.asarray(entry, dtype=float)
+    sl = np.asarray(sl, dtype=float)
+    atr = np.asarray(atr, dtype=float)
+    direction = np.where(is_buy, 1.0, -1.0)
+
+    best = np.where(is_buy, np.fmax(best, bar_high), np.fmin(best, bar_low))
+    excursion = (best - entry) * direction
+
+    # เทียบแบบ "ฝั่งกำไร" โดยคูณ direction ทำให้ BUY/SELL ใช้ max เดียวกัน
+    new_sl = sl * direction
+    if rules.trail_atr > 0:
+        trail = (best - direction * rules.trail_atr * atr) * direction
+        new_sl = np.fmax(new_sl, trail)
+    if rules.breakeven_atr > 0:
+        reached = excursion >= rules.breakeven_atr * atr
+        new_sl = np.where(reached, np.fmax(new_sl, entry * direction), new_sl)
+    new_sl = new_sl * direction
+
+    partial = np.zeros(is_buy.shape, dtype=bool)
+    partial_price = np.full(is_buy.shape, np.nan)
+    if rules.partial_tp_atr > 0:
+        partial = ~np.asarray(partial_done, dtype=bool) & (excursion >= rules.partial_tp_atr * atr)
+        partial_price = np.where(partial, entry + direction * rules.partial_tp_atr * atr, np.nan)
+
+    return {'sl': new_sl, 'best': best, 'partial': partial, 'partial_price': partial_price}
+
+def should_modify(old_sl, new_sl, is_buy, min_step):
+    """ส่ง modify ไป MT5 เฉพาะเมื่อ SL ขยับไปฝั่งกำไรอย่างน้อย min_step (ราคา)"""
+    if old_sl is None or old_sl == 0:
+        return True
+    moved = (new_sl - old_sl) if is_buy else (old_sl - new_sl)
+    return moved >= min_step and moved > 0
@@ -0,0 +1,202 @@
+"""
+🧵 Job Manager
+รันสคริปต์เป็น subprocess พร้อมกันแบบจำกัดจำนวน (worker pool) - สถานะ, output ต่อ job, ยกเลิกทั้ง process group
+CPU/RSS ของแต่ละ job วัดใน thread เบื้องหลัง (psutil หรือคำสั่ง ps) - GUI อ่านค่าล่าสุดได้โดยไม่ block
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import nullcontext
+from itertools import count
+
+try:
+    import psutil
+except ImportError:  # psutil เป็น optional - ใช้คำสั่ง ps แทน
+    psutil = None
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class Job:
+    """งานหนึ่งงาน = subprocess หนึ่งตัว พร้อมสถานะและเวลา"""
+
+    def __init__(self, job_id, name, cmd, on_output=None, on_exit=None, bounded=True):
+        self.id = job_id
+        self.name = name
+        self.cmd = cmd
+        self.bounded = bounded  # False = ไม่กิน worker slot (process เบื้องหลังที่รันตลอด เช่น market feeder)
+        self.on_output = on_output
+        self.on_exit = on_exit
+        self.status = QUEUED
+        self.process = None
+        self.returncode = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.cpu = None   # CPU % / RSS bytes ล่าสุดจาก sampler ของ JobManager
+        self.rss = None
+        self._ps = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    def runtime(self):
+        """เวลาที่รัน (วินาที)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def usage(self):
+        """(CPU %, RSS bytes) ล่าสุดที่ sampler วัดไว้ - ไม่ block (None, None ถ้าไม่ได้รันอยู่)"""
+        if self.status != RUNNING:
+            return None, None
+        return self.cpu, self.rss
+
+    def sample(self):
+        """วัด CPU/RSS ของ process ตอนนี้ (ช้าได้ถ้าไม่มี psutil - เรียกจาก thread ของ sampler เท่านั้น)"""
+        if self.status != RUNNING or self.process is None:
+            self.cpu = self.rss = None
+            return
+        try:
+            if psutil is not None:
+                if self._ps is None:
+                    self._ps = psutil.Process(self.pid)
+                    self._ps.cpu_percent(None)  # เริ่มนับช่วงแรก
+                self.cpu, self.rss = self._ps.cpu_percent(None), self._ps.memory_info().rss
+                return
+            out = subprocess.run(["ps", "-o", "%cpu=,rss=", "-p", str(self.pid)],
+                                 capture_output=True, text=True).stdout.split()
+            self.cpu, self.rss = float(out[0]), int(out[1]) * 1024
+        except Exception:
+            self.cpu = self.rss = None
+
+class JobManager:
+    """รันหลาย subprocess พร้อมกันด้วย worker pool จำกัดจำนวน"""
+
+    def __init__(self, max_workers=None, cancel_timeout=5.0, sample_interval=1.0):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.cancel_timeout = cancel_timeout
+        self.sample_interval = sample_interval
+        self.jobs = {}
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self._sampler = None
+        self._halt = threading.Event()
+
+    def submit(self, name, cmd, on_output=None, on_exit=None, bounded=True):
+        """เพิ่มงาน - จะเริ่มรันเมื่อมี worker ว่าง (bounded=False = รันทันทีโดยไม่นับใน max_workers)"""
+        job = Job(next(self._ids), name, cmd, on_output, on_exit, bounded)
+        with self._lock:
+            self.jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, name="job-sampler", daemon=True)
+            self._sampler.start()
+        return job
+
+    def _sample_loop(self):
+        """วัด CPU/RSS ของทุก job ที่รันอยู่ทุก sample_interval วินาที (นอก thread ของ GUI)"""
+        while not self._halt.wait(self.sample_interval):
+            for job in list(self.jobs.values()):
+                if job.status == RUNNING:
+                    job.sample()
+
+    def _run(self, job):
+        with (self._slots if job.bounded else nullcontext()):
+            with self._lock:
+                if job.cancel_requested:
+                    job.status = CANCELLED
+                else:
+                    job.status = RUNNING
+                    job.started_at = time.time()
+                    try:
+                        job.process = subprocess.Popen(
+                            job.cmd,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            text=True,
+                            bufsize=1,
+                            start_new_session=True,  # แยก process group เพื่อยกเลิกทั้งกลุ่มได้
+                        )
+                    except Exception as e:
+                        job.status = FAILED
+                        job.finished_at = time.time()
+                        self._emit(job, f"❌ Error: {e}")
+
+            if job.status == RUNNING:
+                for line in job.process.stdout:
+                    self._emit(job, line.rstrip())
+                job.returncode = job.process.wait()
+                job.finished_at = time.time()
+                if job.cancel_requested:
+                    job.status = CANCELLED
+                else:
+                    job.status = DONE if job.returncode == 0 else FAILED
+
+        if job.on_exit:
+            job.on_exit(job)
+
+    def _emit(self, job, line):
+        if job.on_output:
+            job.on_output(line)
+
+    def cancel(self, job_id):
+        """ยกเลิกงาน - ส่ง SIGTERM แล้ว SIGKILL ถ้าไม่หยุดภายใน cancel_timeout"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+
+        with self._lock:
+            job.cancel_requested = True
+            process = job.process
+        if process is None or process.poll() is not None:
+            return True
+
+        self._signal(process, signal.SIGTERM)
+
+        def force_kill():
+            try:
+                process.wait(timeout=self.cancel_timeout)
+            except subprocess.TimeoutExpired:
+                self._signal(process, signal.SIGKILL)
+
+        threading.Thread(target=force_kill, daemon=True).start()
+        return True
+
+    @staticmethod
+    def _signal(process, sig):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def active(self):
+        """งานที่ยังไม่จบ"""
+        return [job for job in self.jobs.values() if job.status not in FINISHED]
+
+    def remove_finished(self):
+        """ลบงานที่จบแล้วออกจากรายการ - คืน list ของงานที่ลบ"""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.status in FINISHED]
+            for job in finished:
+                del self.jobs[job.id]
+        return finished
+
+    def shutdown(self, wait=True):
+        """ยกเลิกทุกงาน (ใช้ตอนปิดโปรแกรม เพื่อไม่ให้เหลือ process ค้าง)"""
+        self._halt.set()
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        if wait:
+            for job in list(self.jobs.values()):
+                if job.process is not None:
+                    try:
+                        job.process.wait(timeout=self.cancel_timeout + 1)
+                    except subprocess.TimeoutExpired:
+                        self._signal(job.process, signal.SIGKILL)